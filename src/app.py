@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import yaml
-import sqlite3
 import time
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import deque
+from db_logger import get_logger
+from data_store import load_table, list_units
+from telemetry import TelemetryBuffer
+from features import model_input
+from regimes import load_regimes
+from metrics import REGISTRY as metrics
+from startup import warm_start
+from history import HistoryStore
+from drift import load_monitor
+from registry import build_registry
 
 # --- CONFIG PAGE ---
 st.set_page_config(page_title="Mission Control Dashboard", layout="wide")
@@ -17,37 +25,295 @@ st.set_page_config(page_title="Mission Control Dashboard", layout="wide")
 def load_assets():
     with open("configs/data.yaml", "r") as f:
         config = yaml.safe_load(f)
-    model = joblib.load("models/best_model.pkl")
-    scaler = joblib.load("models/scaler.pkl")
-    return config, model, scaler
+    # Snapshot kolumnar (mmap) + model fused (scaler sudah dilebur ke threshold -> scaler = None),
+    # fallback: forest ringkas / best_model.pkl + scaler.pkl. Model di-warm-up dengan 1 batch dummy.
+    # Head RUL (None jika belum dilatih) memakai ruang input yang sama dengan classifier.
+    model, scaler, rul_model, _ = warm_start(config)
+    return config, model, scaler, rul_model
+
+@st.cache_resource
+def load_normalizer():
+    # Statistik sensor per regime (None jika model dilatih tanpa normalisasi regime)
+    config, _, _, _ = load_assets()
+    return load_regimes(Path(config['model_dir']))
+
+def stream_columns(config):
+    # Hanya kolom yang dipakai dashboard (fitur model + sensor untuk grafik)
+    columns = ['unit_number', 'time_in_cycles'] + config['selected_features']
+    return columns + [c for c in ['sensor_4', 'sensor_9', 'sensor_11'] if c not in columns]
 
 @st.cache_data
 def load_data():
-    return pd.read_csv("data/processed/streaming_source.csv")
+    # Seluruh unit streaming (kolom yang dibutuhkan saja) untuk mode Fleet
+    config, _, _, _ = load_assets()
+    return load_table(Path(config['output_dir']), "streaming_source", columns=stream_columns(config))
+
+@st.cache_data
+def load_units():
+    config, _, _, _ = load_assets()
+    return list_units(Path(config['output_dir']), "streaming_source")
+
+@st.cache_data
+def load_engine(unit_id):
+    # Baca data 1 unit saja (slice dari tabel kolumnar), bukan seluruh streaming source
+    config, _, _, _ = load_assets()
+    return load_table(Path(config['output_dir']), "streaming_source",
+                      columns=stream_columns(config), units=[unit_id])
+
+@st.cache_data
+def engine_inputs(unit_id):
+    # Input model 1 unit penuh: normalisasi regime & fitur rolling vektorisasi untuk seluruh cycle
+    config, _, _, _ = load_assets()
+    return model_input(load_engine(unit_id), config, load_normalizer())
 
 # --- 2. DATABASE ---
 def init_db():
-    conn = sqlite3.connect('inference_logs.db', check_same_thread=False)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS prediction_logs 
-                 (id INTEGER PRIMARY KEY, timestamp TEXT, unit_id INTEGER, cycle INTEGER, 
-                 prediction INTEGER, probability REAL, status TEXT)''')
-    conn.commit()
-    return conn
-
-def log_to_db(conn, unit_id, cycle, pred, prob):
-    c = conn.cursor()
-    status = "CRITICAL" if pred == 1 else "NORMAL"
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("INSERT INTO prediction_logs (timestamp, unit_id, cycle, prediction, probability, status) VALUES (?, ?, ?, ?, ?, ?)", 
-              (timestamp, unit_id, cycle, pred, prob, status))
-    conn.commit()
-
-# --- 3. MAIN APP ---
+    # Satu koneksi + writer thread per proses (bukan koneksi baru tiap rerun Streamlit)
+    return get_logger("inference_logs.db")
+
+@st.cache_resource
+def load_drift_monitor():
+    # 1 DriftMonitor per proses (sketch memori tetap), alert ditulis ke inference_logs.db
+    config, _, _, _ = load_assets()
+    return load_monitor(config, on_alert=init_db().log_drift)
+
+@st.cache_resource
+def load_registry():
+    # Semua versi model di memori 1 proses (dipakai bersama semua sesi): ganti primary/shadow
+    # dari sidebar berlaku langsung tanpa restart. Prediksi primary & shadow dicatat ke DB.
+    config, model, scaler, rul_model = load_assets()
+    return build_registry(config, model, scaler, rul_model, logger=init_db())
+
+def model_panel(registry):
+    """Sidebar: pilih primary/shadow (hot-swap) + latency & kesepakatan per versi."""
+    with st.sidebar.expander("🧪 Model (A/B & Shadow)", expanded=False):
+        # Registry dipakai bersama semua sesi: widget selalu disinkronkan ke pilihan global,
+        # dan hanya perubahan dari user (on_change) yang mengganti versi
+        names = list(registry.versions)
+        st.session_state.model_primary = registry.primary
+        st.session_state.model_shadow = registry.shadow or "-"
+        st.selectbox("Primary", names, key="model_primary",
+                     on_change=lambda: registry.promote(st.session_state.model_primary))
+        st.selectbox("Shadow", ["-"] + [n for n in names if n != registry.primary], key="model_shadow",
+                     on_change=lambda: registry.set_shadow(None if st.session_state.model_shadow == "-"
+                                                           else st.session_state.model_shadow))
+        st.dataframe(registry.summary().drop(columns="Source").round(3), use_container_width=True, hide_index=True)
+
+@st.cache_resource
+def load_history():
+    # Koneksi read-only untuk query history (dibuat setelah init_db membuat schema)
+    init_db()
+    return HistoryStore("inference_logs.db")
+
+def build_history_figure(hourly, series):
+    # Rollup per jam: rata-rata risk + pita min/max; deret 1 unit (sudah di-downsample) di atasnya
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=hourly['hour'], y=hourly['max_prob'], mode='lines', line=dict(width=0),
+                             showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=hourly['hour'], y=hourly['min_prob'], mode='lines', line=dict(width=0),
+                             fill='tonexty', fillcolor='rgba(239,85,59,0.15)', name='Min-Max / jam'))
+    fig.add_trace(go.Scatter(x=hourly['hour'], y=hourly['mean_prob'], mode='lines+markers',
+                             name='Rata-rata / jam', line=dict(color='#EF553B')))
+    if series is not None:
+        fig.add_trace(go.Scatter(x=series['timestamp'], y=series['probability'], mode='lines',
+                                 name='Probabilitas', line=dict(color='#636EFA', width=1)))
+    fig.update_layout(height=350, margin=dict(t=30, b=30), yaxis_title="Risk Prob", yaxis_range=[0, 1])
+    return fig
+
+def render_db_history(config):
+    """Riwayat dari inference_logs.db: rollup per jam, deret ter-downsample, dan tabel per halaman."""
+    hc = config.get('history', {}) or {}
+    store = load_history()
+    st.markdown("##### Riwayat Database (inference_logs.db)")
+    first, last = store.time_range()
+    if first is None:
+        st.info("Belum ada prediksi di database.")
+        return
+
+    col_unit, col_range = st.columns(2)
+    unit = col_unit.selectbox("Unit", ["Semua"] + store.units(), key="hist_unit")
+    d_first, d_last = pd.Timestamp(first).date(), pd.Timestamp(last).date()
+    date_range = col_range.date_input("Rentang tanggal", (d_first, d_last), key="hist_range")
+    unit_id = None if unit == "Semua" else unit
+    start = str(date_range[0]) if date_range else None
+    end = str(date_range[-1] + timedelta(days=1)) if date_range else None
+
+    hourly = store.hourly(unit_id, start, end)
+    series = None
+    if unit_id is not None:
+        series = store.series(unit_id, start, end, hc.get('max_points', 1000), hc.get('minmax_ratio', 4))
+    st.plotly_chart(build_history_figure(hourly, series), use_container_width=True)
+    st.caption(f"{int(hourly['n'].sum())} prediksi | {int(hourly['n_critical'].sum())} CRITICAL | "
+               f"{len(hourly)} jam" + (f" | grafik unit {unit_id}: {len(series)} titik" if series is not None else ""))
+
+    # Keyset pagination: simpan cursor awal tiap halaman, reset jika filter berubah
+    filters = (unit_id, start, end)
+    if st.session_state.get('hist_filters') != filters:
+        st.session_state.hist_filters = filters
+        st.session_state.hist_cursors = [None]
+    cursors = st.session_state.hist_cursors
+    page, next_cursor = store.page(unit_id, start, end, after=cursors[-1], limit=hc.get('page_size', 200))
+    st.dataframe(page, use_container_width=True, hide_index=True)
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    if col_prev.button("⬅️ Sebelumnya", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    col_info.caption(f"Halaman {len(cursors)} (terbaru dulu)")
+    if col_next.button("Berikutnya ➡️", disabled=next_cursor is None, use_container_width=True):
+        cursors.append(next_cursor)
+        st.rerun()
+
+    with st.expander("🧪 Prediksi per Versi Model", expanded=False):
+        # Baris shadow tidak masuk rollup/grafik di atas, hanya dibandingkan di sini.
+        # Agregasi membaca log mentah di rentang terpilih -> hanya dijalankan saat diminta
+        if st.button("Hitung ringkasan per versi", key="hist_versions"):
+            st.dataframe(store.versions(start, end).round(4), use_container_width=True, hide_index=True)
+
+    alerts = store.drift_alerts()
+    with st.expander(f"🌡️ Drift Alerts ({len(alerts)} terbaru)", expanded=False):
+        if alerts.empty:
+            st.caption("Belum ada alert drift: distribusi input masih sesuai data training.")
+        else:
+            st.dataframe(alerts, use_container_width=True, hide_index=True)
+
+def purge_database(db_logger):
+    # Callback tombol Purge: dijalankan sebelum rerun, jadi checkbox konfirmasi bisa di-reset
+    db_logger.clear()
+    st.session_state.purge_confirm = False
+
+def render_purge(db_logger):
+    """Hapus permanen isi inference_logs.db: terpisah dari Hapus History dan wajib dikonfirmasi."""
+    with st.expander("⚠️ Purge Database", expanded=False):
+        st.caption("Menghapus SELURUH prediction_logs, rollup per jam & drift_alerts di inference_logs.db "
+                   "(dipakai bersama semua sesi dashboard & serve.py). Tidak bisa dibatalkan.")
+        confirm = st.checkbox("Saya yakin ingin menghapus seluruh isi database", key="purge_confirm")
+        st.button("🗑️ Purge Database", type="primary", disabled=not confirm,
+                  on_click=purge_database, args=(db_logger,))
+
+# --- 3. STATE GRAFIK & HISTORY (UKURAN TETAP) ---
+CHART_COLUMNS = ['Cycle', 'Sensor_11', 'Sensor_4', 'Sensor_9']
+
+def new_chart_data(config):
+    # Ring buffer: hanya `chart_window` cycle terakhir yang disimpan & digambar
+    window = config.get('dashboard', {}).get('chart_window', 200)
+    return TelemetryBuffer(CHART_COLUMNS, capacity=window)
+
+def new_logs_data(config):
+    window = config.get('dashboard', {}).get('history_window', 500)
+    return deque(maxlen=window)
+
+def build_chart_figure():
+    # Figure dibuat SEKALI per sesi, tiap tick cukup mengganti data trace-nya
+    from plotly.subplots import make_subplots
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        subplot_titles=("S11: Pressure (psia)", "S4: Temp (°R)", "S9: Speed (rpm)"))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Pressure', line=dict(color='#00CC96')), row=1, col=1)
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Temp', line=dict(color='#FFA15A')), row=2, col=1)
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='RPM', line=dict(color='#AB63FA')), row=3, col=1)
+    fig.update_layout(height=600, showlegend=False, margin=dict(t=30, b=30))
+    return fig
+
+# --- 4. FLEET MODE ---
+FLEET_MODE = "Fleet (Semua Unit)"
+
+def build_fleet_heatmap(sim):
+    fig = go.Figure(go.Heatmap(z=sim.risk_history, y=[str(u) for u in sim.units],
+                               zmin=0, zmax=1, colorscale='RdYlGn_r', colorbar=dict(title="Risk")))
+    fig.update_layout(height=max(400, 12 * len(sim.units)), margin=dict(t=30, b=30),
+                      xaxis_title=f"{sim.window} tick terakhir", yaxis_title="Unit", yaxis_type='category')
+    return fig
+
+def perf_panel():
+    # Panel metrik hot path di sidebar (diisi ulang oleh draw_perf selama loop berjalan)
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        return st.empty()
+
+def draw_perf(placeholder, config, force=False):
+    """Refresh tabel timer per stage + export file .prom, maksimal 1x per `refresh_s` detik."""
+    mc = config.get('metrics', {}) or {}
+    now = time.perf_counter()
+    if force or now - st.session_state.get('perf_drawn', 0.0) >= mc.get('refresh_s', 1.0):
+        st.session_state.perf_drawn = now
+        table = metrics.snapshot()
+        if table.empty:
+            placeholder.caption("Belum ada data timer.")
+        else:
+            table["Share"] *= 100
+            placeholder.dataframe(table.round(3), use_container_width=True, hide_index=True,
+                                  column_config={"Share": st.column_config.ProgressColumn(
+                                      "Share", min_value=0.0, max_value=100.0, format="%.0f%%")})
+    if mc.get('export_path'):
+        metrics.maybe_write(Path(mc['export_path']), mc.get('export_interval_s', 5))
+
+def render_fleet(config, registry, speed, perf, monitor=None):
+    # 1 tick = semua unit maju 1 cycle, scoring semua unit dalam SATU panggilan model
+    # (registry: primary + shadow paralel, keduanya dicatat ke inference_logs.db)
+    from fleet import FleetSimulator  # Import saat mode Fleet dibuka saja
+    if "fleet_sim" not in st.session_state:
+        window = config.get('dashboard', {}).get('fleet_window', 60)
+        st.session_state.fleet_sim = FleetSimulator(load_data(), config['selected_features'],
+                                                      window=window, cfg=config, regimes=load_normalizer())
+        st.session_state.fleet_fig = build_fleet_heatmap(st.session_state.fleet_sim)
+    sim = st.session_state.fleet_sim
+
+    st.title("🛰️ Fleet Monitoring")
+    st.caption(f"{len(sim.units)} unit | Tick: {sim.tick} | Status: **{st.session_state.sim_state}**")
+    st.divider()
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: metric_active = st.empty()
+    with col2: metric_critical = st.empty()
+    with col3: metric_max = st.empty()
+    with col4: metric_rul = st.empty()
+
+    col_table, col_heat = st.columns([2, 3])
+    with col_table:
+        st.markdown("##### Risk Table (klik header untuk sort)")
+        table_placeholder = st.empty()
+    with col_heat:
+        st.markdown("##### Risk Heatmap")
+        heatmap_placeholder = st.empty()
+
+    def draw_fleet():
+        table = sim.risk_table()
+        metric_active.metric("Unit Aktif", f"{int(sim.active.sum())} / {len(sim.units)}")
+        metric_critical.metric("CRITICAL", int((table['Status'] == "CRITICAL").sum()))
+        max_prob = table['Risk Prob'].max()
+        metric_max.metric("Max Risk", "-" if pd.isna(max_prob) else f"{max_prob:.2%}")
+        min_rul = table.loc[table['Aktif'], 'Pred RUL'].min() if 'Pred RUL' in table else float('nan')
+        metric_rul.metric("Min Pred RUL", "-" if pd.isna(min_rul) else f"{min_rul:.0f} cycle")
+        table_placeholder.dataframe(table, use_container_width=True, hide_index=True,
+                                    column_config={"Risk Prob": st.column_config.ProgressColumn(
+                                        "Risk Prob", min_value=0.0, max_value=1.0, format="%.2f"),
+                                        "Pred RUL": st.column_config.NumberColumn("Pred RUL", format="%.0f")})
+        fig = st.session_state.fleet_fig
+        fig.data[0].z = sim.risk_history
+        heatmap_placeholder.plotly_chart(fig, use_container_width=True)
+
+    draw_fleet()
+
+    if st.session_state.sim_state == "RUNNING":
+        while not sim.finished:
+            if st.session_state.sim_state != "RUNNING":
+                break
+            with metrics.timer("fleet_step"):
+                sim.step(monitor=monitor, registry=registry)
+            with metrics.timer("ui_render_fleet"):
+                draw_fleet()
+            draw_perf(perf, config)
+            with metrics.timer("ui_sleep"):
+                time.sleep(speed)
+
+        if sim.finished:
+            st.success("✅ Semua unit selesai disimulasikan.")
+
+# --- 5. MAIN APP ---
 def main():
-    config, model, scaler = load_assets()
-    df_stream = load_data()
-    conn = init_db()
+    config, _, _, _ = load_assets()
+    db_logger = init_db()
+    monitor = load_drift_monitor()
+    registry = load_registry()
 
     # --- STATE MANAGEMENT (Otak dari Logika Baru) ---
     # Status Simulasi: 'IDLE', 'RUNNING', 'PAUSED'
@@ -56,9 +322,11 @@ def main():
     
     # Data Persisten
     if "chart_data" not in st.session_state:
-        st.session_state.chart_data = pd.DataFrame(columns=['Cycle', 'Sensor_11', 'Sensor_4', 'Sensor_9'])
+        st.session_state.chart_data = new_chart_data(config)
+    if "chart_fig" not in st.session_state:
+        st.session_state.chart_fig = build_chart_figure()
     if "logs_data" not in st.session_state:
-        st.session_state.logs_data = []
+        st.session_state.logs_data = new_logs_data(config)
         
     # Penanda Posisi Data (Agar bisa Resume)
     if "current_index" not in st.session_state:
@@ -66,10 +334,16 @@ def main():
 
     # --- SIDEBAR ---
     st.sidebar.title("🎛️ Flight Control")
-    available_units = df_stream['unit_number'].unique()
-    selected_engine = st.sidebar.selectbox("Select Engine Unit", available_units)
+    mode = st.sidebar.radio("Mode Monitoring", ["Single Engine", FLEET_MODE])
+    available_units = load_units()
+    selected_engine = None
+    if mode != FLEET_MODE:
+        selected_engine = st.sidebar.selectbox("Select Engine Unit", available_units)
     speed = st.sidebar.slider("Simulation Speed", 0.05, 1.0, 0.1)
     
+    model_panel(registry)
+    perf = perf_panel()
+    draw_perf(perf, config, force=True)
     st.sidebar.divider()
     
     # --- LOGIKA TOMBOL CANGGIH ---
@@ -79,9 +353,11 @@ def main():
     # Logika: Selalu me-reset state ke awal dan mengubah status jadi RUNNING
     if col_btn1.button("▶️ Start / Reset", type="primary", use_container_width=True):
         st.session_state.sim_state = "RUNNING"
-        st.session_state.chart_data = pd.DataFrame(columns=['Cycle', 'Sensor_11', 'Sensor_4', 'Sensor_9'])
-        st.session_state.logs_data = []
+        st.session_state.chart_data.clear()
+        st.session_state.logs_data.clear()
         st.session_state.current_index = 0
+        if "fleet_sim" in st.session_state:
+            st.session_state.fleet_sim.reset()
         st.rerun()
 
     # 2. TOMBOL JEDA / LANJUT (TOGGLE)
@@ -99,21 +375,28 @@ def main():
     else: # IDLE
         col_btn2.button("⏹️ Berhenti", disabled=True, use_container_width=True)
 
+    # --- MODE FLEET ---
+    if mode == FLEET_MODE:
+        render_fleet(config, registry, speed, perf, monitor)
+        return
+
     # --- MAIN CONTENT ---
     st.title("🚀 Engine Telemetry System")
     st.caption(f"Unit: {selected_engine} | Status: **{st.session_state.sim_state}**")
     st.divider()
 
     # Metrics Layout
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3, col4, col5 = st.columns(5)
     with col1: metric_status = st.empty()
     with col2: metric_prob = st.empty()
-    with col3: metric_s4 = st.empty()
-    with col4: metric_rpm = st.empty()
+    with col3: metric_rul = st.empty()
+    with col4: metric_s4 = st.empty()
+    with col5: metric_rpm = st.empty()
 
     # Default Metrics Display
     metric_status.info("Ready")
     metric_prob.metric("Risk Prob", "-")
+    metric_rul.metric("Pred RUL", "-")
     metric_s4.metric("EGT", "-")
     metric_rpm.metric("RPM", "-")
 
@@ -126,24 +409,20 @@ def main():
         
         # Fungsi helper untuk gambar grafik
         def draw_chart():
-            if st.session_state.chart_data.empty:
+            chart_data = st.session_state.chart_data
+            if chart_data.empty:
                 # Grafik Kosong
+                from plotly.subplots import make_subplots
                 fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.1,
                                     subplot_titles=("Sensor 11 (Pressure)", "Sensor 4 (Temp)", "Sensor 9 (RPM)"))
                 fig.update_layout(height=500, title_text="Waiting for Start...")
             else:
-                # Grafik Isi
-                fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.05,
-                                    subplot_titles=("S11: Pressure (psia)", "S4: Temp (°R)", "S9: Speed (rpm)"))
-                
-                fig.add_trace(go.Scatter(x=st.session_state.chart_data['Cycle'], y=st.session_state.chart_data['Sensor_11'],
-                                         mode='lines', name='Pressure', line=dict(color='#00CC96')), row=1, col=1)
-                fig.add_trace(go.Scatter(x=st.session_state.chart_data['Cycle'], y=st.session_state.chart_data['Sensor_4'],
-                                         mode='lines', name='Temp', line=dict(color='#FFA15A')), row=2, col=1)
-                fig.add_trace(go.Scatter(x=st.session_state.chart_data['Cycle'], y=st.session_state.chart_data['Sensor_9'],
-                                         mode='lines', name='RPM', line=dict(color='#AB63FA')), row=3, col=1)
-                
-                fig.update_layout(height=600, showlegend=False, margin=dict(t=30, b=30))
+                # Grafik Isi: update data trace yang sudah ada (window tetap), tanpa rebuild subplot
+                fig = st.session_state.chart_fig
+                cycles = chart_data.view('Cycle')
+                for trace, col in zip(fig.data, CHART_COLUMNS[1:]):
+                    trace.x = cycles
+                    trace.y = chart_data.view(col)
             
             chart_placeholder.plotly_chart(fig, use_container_width=True)
 
@@ -156,92 +435,129 @@ def main():
         with col_hist_1:
             st.markdown("##### Log Data Simulasi")
         with col_hist_2:
-            # Tombol Hapus History
-            if st.button("🗑️ Hapus History"):
-                st.session_state.logs_data = []
-                st.session_state.chart_data = pd.DataFrame(columns=['Cycle', 'Sensor_11', 'Sensor_4', 'Sensor_9'])
-                c = conn.cursor()
-                c.execute("DELETE FROM prediction_logs")
-                conn.commit()
+            # Tombol Hapus History: hanya tampilan sesi ini, database tidak disentuh (lihat Purge Database)
+            if st.button("🗑️ Hapus History", help="Kosongkan log & grafik sesi ini. Data di database tetap."):
+                st.session_state.logs_data.clear()
+                st.session_state.chart_data.clear()
                 st.rerun()
 
         history_placeholder = st.empty()
         if len(st.session_state.logs_data) > 0:
-            df_hist = pd.DataFrame(st.session_state.logs_data)
+            df_hist = pd.DataFrame(list(st.session_state.logs_data))
             history_placeholder.dataframe(df_hist.sort_index(ascending=False), use_container_width=True)
         else:
             history_placeholder.info("Belum ada data history.")
 
+        st.divider()
+        render_db_history(config)
+        render_purge(db_logger)
+
     # --- CORE SIMULATION LOOP ---
-    # Hanya jalan jika status RUNNING
+    # Hanya jalan jika status RUNNING.
+    # Replay data berjalan di StreamRunner (asyncio, thread background) dengan laju 1/speed
+    # cycle per detik; script ini hanya menggambar hasil yang sudah di-scoring per tick UI.
     if st.session_state.sim_state == "RUNNING":
-        engine_data = df_stream[df_stream['unit_number'] == selected_engine]
+        from streaming import ReplaySource, StreamRunner, stream_config  # asyncio hanya saat replay jalan
+        engine_data = load_engine(selected_engine)
+        # Input model seluruh unit (di-cache per unit); scoring per batch replay lewat registry
+        inputs = engine_inputs(selected_engine)
         
-        # Kunci Logika Resume: Kita mulai loop dari 'current_index'
+        # Kunci Logika Resume: Kita mulai replay dari 'current_index'
         # Bukan dari 0 lagi.
         data_to_stream = engine_data.iloc[st.session_state.current_index:]
-        
-        for i, row in data_to_stream.iterrows():
-            # Cek jika user menekan Pause di tengah loop
-            if st.session_state.sim_state != "RUNNING": 
-                break
-            
-            # Update index agar nanti bisa resume dari sini
-            st.session_state.current_index += 1
-            
-            # 1. PREDIKSI
-            features = config['selected_features']
-            input_data = row[features].values.reshape(1, -1)
-            input_scaled = scaler.transform(input_data)
-            
-            pred = model.predict(input_scaled)[0]
-            prob = model.predict_proba(input_scaled)[0][1]
-            cycle = int(row['time_in_cycles'])
-            
-            # 2. UPDATE STATE (Chart)
-            new_row = pd.DataFrame({
-                'Cycle': [cycle], 'Sensor_11': [row['sensor_11']],
-                'Sensor_4': [row['sensor_4']], 'Sensor_9': [row['sensor_9']]
-            })
-            st.session_state.chart_data = pd.concat([st.session_state.chart_data, new_row], ignore_index=True)
-            
-            # 3. UPDATE STATE (History Logs)
-            status_txt = "CRITICAL" if pred == 1 else "NORMAL"
-            log_entry = {
-                "Time": datetime.now().strftime("%H:%M:%S"),
-                "Cycle": cycle,
-                "Prediction": status_txt,
-                "Probability": f"{prob:.2%}",
-                "S11 (Press)": f"{row['sensor_11']:.2f}",
-                "S4 (Temp)": f"{row['sensor_4']:.1f}",
-                "S9 (RPM)": f"{row['sensor_9']:.0f}"
-            }
-            st.session_state.logs_data.append(log_entry)
-
-            # 4. RENDER UI
-            # Update Metrics
-            if pred == 1:
-                metric_status.error(f"⚠️ FAILURE (Cycle {cycle})")
-            else:
-                metric_status.success(f"✅ NORMAL (Cycle {cycle})")
-            metric_prob.metric("Risk Prob", f"{prob:.2%}")
-            metric_s4.metric("EGT", f"{row['sensor_4']:.1f}")
-            metric_rpm.metric("RPM", f"{row['sensor_9']:.0f}")
-
-            # Update Chart di Tab 1
-            with tab_chart:
-                draw_chart()
-            
-            # Update Table di Tab 2 (Realtime, update setiap 5 cycle biar gak berat)
-            if cycle % 5 == 0:
-                with tab_history:
-                    df_hist = pd.DataFrame(st.session_state.logs_data)
-                    history_placeholder.dataframe(df_hist.sort_index(ascending=False), use_container_width=True)
-
-            # 5. SIMPAN DB
-            log_to_db(conn, selected_engine, cycle, pred, prob)
-            
-            time.sleep(speed)
+        scored = deque()
+
+        def handle_batch(batch):
+            # Consumer (thread lain): scoring batch lewat registry (primary + shadow, drift, log DB
+            # per versi + latency), tanpa menyentuh session_state
+            with metrics.timer("stream_handle_batch"):
+                rows = [i for _, i in batch]
+                cycles = engine_data.loc[rows, 'time_in_cycles'].to_numpy()
+                pred, prob, rul = registry.score(inputs.loc[rows], [selected_engine] * len(rows), cycles, monitor)
+            scored.extend(zip(rows, pred, prob, [None] * len(rows) if rul is None else rul))
+
+        sc = stream_config(config)
+        runner = StreamRunner(ReplaySource(data_to_stream, rate_hz=1.0 / speed), handle_batch,
+                              queue_size=sc['queue_size'], policy=sc['policy'],
+                              max_batch=sc['max_batch'], max_wait_ms=sc['max_wait_ms']).start()
+        ui_refresh = config.get('dashboard', {}).get('ui_refresh_s', 0.1)
+
+        try:
+            while True:
+                results = []
+                while scored:
+                    results.append(scored.popleft())
+                if not results:
+                    if runner.done:
+                        break
+                    with metrics.timer("ui_idle"):
+                        time.sleep(ui_refresh)
+                    continue
+
+                tick_start = time.perf_counter()
+                rows = [i for i, _, _, _ in results]
+                for i, pred, prob, rul in results:
+                    # 1. PREDIKSI (hasil scoring batch, tidak ada panggilan model per baris)
+                    pred, prob = int(pred), float(prob)
+                    # Prediksi sisa cycle sampai gagal (None jika head RUL belum dilatih)
+                    rul = None if rul is None else float(rul)
+                    row = engine_data.loc[i]
+                    cycle = int(row['time_in_cycles'])
+
+                    # 2. UPDATE STATE (Chart)
+                    st.session_state.chart_data.append(
+                        Cycle=cycle, Sensor_11=row['sensor_11'],
+                        Sensor_4=row['sensor_4'], Sensor_9=row['sensor_9']
+                    )
+
+                    # 3. UPDATE STATE (History Logs)
+                    status_txt = "CRITICAL" if pred == 1 else "NORMAL"
+                    st.session_state.logs_data.append({
+                        "Time": datetime.now().strftime("%H:%M:%S"),
+                        "Cycle": cycle,
+                        "Prediction": status_txt,
+                        "Probability": f"{prob:.2%}",
+                        "Pred RUL": "-" if rul is None else f"{rul:.0f}",
+                        "S11 (Press)": f"{row['sensor_11']:.2f}",
+                        "S4 (Temp)": f"{row['sensor_4']:.1f}",
+                        "S9 (RPM)": f"{row['sensor_9']:.0f}"
+                    })
+
+                # Update index agar nanti bisa resume dari sini
+                # (posisi baris terakhir, karena policy drop/coalesce bisa melewati baris)
+                st.session_state.current_index = engine_data.index.get_loc(rows[-1]) + 1
+                metrics.observe("ui_update_state", time.perf_counter() - tick_start)
+
+                # 4. RENDER UI (sekali per tick UI untuk cycle terbaru)
+                with metrics.timer("ui_render_metrics"):
+                    if pred == 1:
+                        metric_status.error(f"⚠️ FAILURE (Cycle {cycle})")
+                    else:
+                        metric_status.success(f"✅ NORMAL (Cycle {cycle})")
+                    metric_prob.metric("Risk Prob", f"{prob:.2%}")
+                    metric_rul.metric("Pred RUL", "-" if rul is None else f"{rul:.0f} cycle")
+                    metric_s4.metric("EGT", f"{row['sensor_4']:.1f}")
+                    metric_rpm.metric("RPM", f"{row['sensor_9']:.0f}")
+
+                # Update Chart di Tab 1
+                with tab_chart, metrics.timer("ui_render_chart"):
+                    draw_chart()
+
+                # Update Table di Tab 2 (Realtime, update tiap kelipatan 5 cycle biar gak berat)
+                cycles = engine_data.loc[rows, 'time_in_cycles'].to_numpy()
+                if (cycles % 5 == 0).any():
+                    with tab_history, metrics.timer("ui_render_history"):
+                        df_hist = pd.DataFrame(list(st.session_state.logs_data))
+                        history_placeholder.dataframe(df_hist.sort_index(ascending=False), use_container_width=True)
+
+                draw_perf(perf, config)
+                with metrics.timer("ui_sleep"):
+                    time.sleep(ui_refresh)
+        finally:
+            # Rerun (Pause / ganti unit) menghentikan script di sini -> replay ikut berhenti
+            runner.stop()
+        if runner.error is not None:
+            st.error(f"Streaming berhenti karena error: {runner.error}")
 
     # Indikator saat Pause
     if st.session_state.sim_state == "PAUSED":
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import yaml
+from datetime import datetime
+from pathlib import Path
+from data_store import load_table
+from db_logger import PredictionLogger
+from features import model_input
+from forest_export import load_serving_model
+from inference import predict_batch
+from metrics import time_calls
+from regimes import load_regimes
+from startup import measure_cold_start
+
+# --- BENCHMARK INFERENCE ---
+# Mengukur artifact asli di models/ dengan data streaming_source:
+# waktu load model, latency predict (1 baris & batch), throughput, peak RSS,
+# dan throughput tulis prediction_logs. Hasil ditulis ke JSON lalu dibandingkan
+# dengan baseline; exit code 1 jika ada metrik yang lebih buruk dari threshold,
+# exit code 2 jika baseline belum ada (gate tidak boleh lolos tanpa pembanding).
+
+CONFIG_PATH = Path("configs/data.yaml")
+
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def percentiles_ms(rounds: list, prefix: str) -> dict:
+    """
+    Persentil latency dari beberapa putaran pengukuran. Per persentil diambil putaran terbaik,
+    supaya gangguan sesaat (proses lain, GC) tidak langsung terbaca sebagai regresi.
+    """
+    p = np.array([np.percentile(np.asarray(times) * 1000, [50, 95, 99]) for times in rounds]).min(axis=0)
+    return {f"{prefix}_p50_ms": float(p[0]), f"{prefix}_p95_ms": float(p[1]), f"{prefix}_p99_ms": float(p[2])}
+
+def bench_load(model_dir: Path, repeats: int) -> dict:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load_serving_model(model_dir)
+        times.append(time.perf_counter() - start)
+    return {"model_load_ms": float(np.median(times) * 1000)}
+
+def bench_single_row(model, scaler, X: np.ndarray, repeats: int, rounds: int) -> dict:
+    rows = np.random.default_rng(0).integers(0, len(X), size=repeats)
+    predict_batch(model, scaler, X[:1])   # Warm-up
+    times = time_calls(lambda i: predict_batch(model, scaler, X[rows[i]:rows[i] + 1]), repeats, rounds)
+    return percentiles_ms(times, "single_row")
+
+def bench_batch(model, scaler, X: np.ndarray, batch_size: int, repeats: int, rounds: int) -> dict:
+    # Baris diulang jika data lebih sedikit dari batch_size
+    X_batch = X[np.arange(batch_size) % len(X)]
+    predict_batch(model, scaler, X_batch)   # Warm-up
+    times = time_calls(lambda i: predict_batch(model, scaler, X_batch), repeats, rounds)
+    result = percentiles_ms(times, f"batch_{batch_size}")
+    result[f"batch_{batch_size}_rows_per_s"] = float(batch_size / min(np.median(t) for t in times))
+    return result
+
+def bench_db_writes(n_rows: int) -> dict:
+    # DB sementara: prediction_logs asli tidak ikut terisi data benchmark
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = PredictionLogger(os.path.join(tmp, "bench.db"))
+        rng = np.random.default_rng(0)
+        probs = rng.random(n_rows)
+        start = time.perf_counter()
+        logger.log_many(rng.integers(1, 300, n_rows), np.arange(n_rows), (probs > 0.5).astype(int), probs)
+        logger.flush()
+        elapsed = time.perf_counter() - start
+        logger.close()
+    return {"db_write_rows_per_s": float(n_rows / elapsed)}
+
+def bench_cold_start(repeats: int) -> dict:
+    # Proses Python baru: import app.py + snapshot + load model + warm-up
+    timings = measure_cold_start(repeats)
+    return {"cold_start_ms": timings["process"], "cold_start_import_ms": timings["import_app"]}
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: KB di Linux, byte di macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+def run_benchmark(cfg: dict) -> dict:
+    bench_cfg = cfg.get("benchmark", {})
+    model_dir = Path(cfg["model_dir"])
+
+    metrics = bench_load(model_dir, bench_cfg.get("load_repeats", 5))
+    model, scaler = load_serving_model(model_dir)
+
+    # Input model dari streaming_source (normalisasi regime + fitur rolling jika aktif)
+    columns = ["unit_number", "time_in_cycles"] + cfg["selected_features"]
+    df = load_table(Path(cfg["output_dir"]), "streaming_source", columns=columns)
+    X = model_input(df, cfg, load_regimes(model_dir)).to_numpy(dtype=np.float64)
+
+    rounds = bench_cfg.get("rounds", 3)
+    metrics.update(bench_single_row(model, scaler, X, bench_cfg.get("single_row_repeats", 300), rounds))
+    for batch_size in bench_cfg.get("batch_sizes", [64, 1024]):
+        metrics.update(bench_batch(model, scaler, X, batch_size, bench_cfg.get("batch_repeats", 30), rounds))
+    metrics.update(bench_db_writes(bench_cfg.get("log_rows", 20000)))
+    cold_repeats = bench_cfg.get("cold_start_repeats", 3)
+    if cold_repeats:
+        metrics.update(bench_cold_start(cold_repeats))
+    metrics["peak_rss_mb"] = peak_rss_mb()
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "machine": platform.machine(), "cpu_count": os.cpu_count()},
+        "model": {"type": type(model).__name__, "fused": scaler is None,
+                  "n_trees": len(getattr(model, "roots", getattr(model, "estimators_", [])))},
+        "n_rows": int(len(X)),
+        "metrics": metrics,
+    }
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+def compare(current: dict, baseline: dict, threshold: float, noise_floor_ms: float = 0.0) -> list:
+    """
+    Bandingkan metrik dengan baseline. Return daftar regresi (metrik yang lebih buruk
+    dari `threshold`, misal 0.25 = 25%). Metrik yang tidak ada di baseline dilewati.
+    Latency (*_ms) yang selisihnya di bawah `noise_floor_ms` dianggap noise.
+    """
+    regressions = []
+    for name, value in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if not base:
+            continue
+        change = (value - base) / base
+        worse = -change if higher_is_better(name) else change
+        if name.endswith("_ms") and value - base < noise_floor_ms:
+            continue
+        if worse > threshold:
+            regressions.append({"metric": name, "baseline": base, "current": value, "worse_by": worse})
+    return regressions
+
+def check_baseline(result: dict, baseline: dict, threshold: float, noise_floor_ms: float = 0.0,
+                   baseline_path: Path = None) -> int:
+    """Exit code gate: 0 = lolos, 1 = ada regresi, 2 = baseline belum ada."""
+    if baseline is None:
+        print(f"❌ Baseline {baseline_path} belum ada: tidak ada pembanding, gate GAGAL.\n"
+              f"   Jalankan di mesin referensi dengan --update-baseline lalu commit file-nya "
+              f"(atau --allow-missing-baseline untuk run pertama).")
+        return 2
+    regressions = compare(result, baseline, threshold, noise_floor_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} metrik lebih buruk > {threshold:.0%} dari baseline:")
+        for r in regressions:
+            print(f"   {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} (lebih buruk {r['worse_by']:.1%})")
+        return 1
+    print(f"🎉 Tidak ada regresi (threshold {threshold:.0%}).")
+    return 0
+
+def print_results(result: dict, baseline: dict = None):
+    print(f"\n📊 Hasil benchmark ({result['model']['type']}, {result['model']['n_trees']} pohon, "
+          f"{result['n_rows']} baris):")
+    for name, value in result["metrics"].items():
+        line = f"   {name:<28} {value:12.3f}"
+        if baseline and baseline["metrics"].get(name):
+            change = (value - baseline["metrics"][name]) / baseline["metrics"][name]
+            line += f"   ({change:+.1%} vs baseline)"
+        print(line)
+
+def main():
+    cfg = load_config(CONFIG_PATH)
+    bench_cfg = cfg.get("benchmark", {})
+    output_dir = Path(bench_cfg.get("output_dir", "reports/benchmarks"))
+
+    parser = argparse.ArgumentParser(description="Benchmark inference + bandingkan dengan baseline")
+    parser.add_argument("--baseline", type=Path, default=output_dir / "baseline.json")
+    parser.add_argument("--output", type=Path, default=output_dir / "latest.json")
+    parser.add_argument("--threshold", type=float, default=bench_cfg.get("regression_threshold", 0.25))
+    parser.add_argument("--update-baseline", action="store_true", help="Simpan hasil run ini sebagai baseline baru")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Jangan gagal jika baseline belum ada (hanya untuk run pertama)")
+    args = parser.parse_args()
+
+    print("🚀 Memulai Benchmark Inference...")
+    result = run_benchmark(cfg)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    baseline = None
+    if args.baseline.exists() and not args.update_baseline:
+        with args.baseline.open("r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(result, baseline)
+    print(f"\n✅ Hasil disimpan di: {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with args.baseline.open("w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"📌 Baseline diperbarui: {args.baseline}")
+        return
+    if baseline is None and args.allow_missing_baseline:
+        print(f"⚠️ Baseline {args.baseline} belum ada, perbandingan dilewati (--allow-missing-baseline).")
+        return
+    code = check_baseline(result, baseline, args.threshold, bench_cfg.get("noise_floor_ms", 0.5), args.baseline)
+    if code:
+        sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,116 @@
+import numpy as np
 import pandas as pd
 import yaml
 from pathlib import Path
-from sklearn.model_selection import train_test_split
+from data_store import open_table_writer
 
 # --- KONFIGURASI ---
 CONFIG_PATH = Path("configs/data.yaml")
 
+# Nama Kolom (Standar NASA CMAPSS)
+# FD001-FD004 memiliki struktur kolom yang sama persis
+RAW_COLUMNS = [
+    "unit_number", "time_in_cycles",
+    "op_setting_1", "op_setting_2", "op_setting_3",
+    "sensor_1", "sensor_2", "sensor_3", "sensor_4", "sensor_5",
+    "sensor_6", "sensor_7", "sensor_8", "sensor_9", "sensor_10",
+    "sensor_11", "sensor_12", "sensor_13", "sensor_14", "sensor_15",
+    "sensor_16", "sensor_17", "sensor_18", "sensor_19", "sensor_20", "sensor_21"
+]
+
 def load_config(path: Path) -> dict:
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+def raw_paths(cfg: dict) -> list:
+    """Daftar file raw: `raw_data_paths` (beberapa FD00x) atau `raw_data_path` (1 file)."""
+    paths = cfg.get("raw_data_paths") or [cfg["raw_data_path"]]
+    return [Path(p) for p in paths]
+
+def read_raw_chunks(path: Path, chunksize: int, columns=None):
+    """
+    Baca file raw per potongan baris (memori terbatas).
+    File C-MAPSS dipisah 1 spasi (+ spasi di akhir baris), jadi cukup tokenizer C
+    dengan sep=" " (jauh lebih cepat dari regex r"\\s+"); kolom kosong di akhir dibuang.
+    """
+    usecols = [RAW_COLUMNS.index(c) for c in (columns or RAW_COLUMNS)]
+    reader = pd.read_csv(path, sep=" ", header=None, usecols=usecols, chunksize=chunksize, engine="c")
+    for chunk in reader:
+        chunk.columns = [RAW_COLUMNS[i] for i in chunk.columns]
+        if chunk.isna().any().any():
+            raise ValueError(f"Format {path} tidak dikenali (kolom kosong). Pastikan dipisah 1 spasi.")
+        yield chunk
+
+def scan_max_cycles(path: Path, chunksize: int) -> pd.Series:
+    """Pass pertama (ringan): hanya unit_number & time_in_cycles -> cycle terakhir per unit."""
+    partial = [chunk.groupby("unit_number")["time_in_cycles"].max()
+               for chunk in read_raw_chunks(path, chunksize, ["unit_number", "time_in_cycles"])]
+    return pd.concat(partial).groupby(level=0).max()
+
+def ingest_raw_files(paths: list, output_dir: Path, rul_threshold: int, split_id: int,
+                     storage_format: str = "columnar", chunksize: int = 100_000) -> dict:
+    """
+    Ingestion streaming untuk 1 atau beberapa file raw.
+    Pass 1 menghitung max cycle per unit, pass 2 memberi label RUL per chunk dan
+    langsung menulis baris ke tabel train / stream. Unit dari file berikutnya digeser
+    (offset = unit terbesar file sebelumnya) supaya unit_number tetap unik.
+    Return jumlah baris per tabel.
+    """
+    # 1. Pass pertama: max cycle per unit (sudah termasuk offset antar file)
+    offsets, max_cycles, offset = [], [], 0
+    for path in paths:
+        per_unit = scan_max_cycles(path, chunksize)
+        offsets.append(offset)
+        max_cycles.append(pd.Series(per_unit.to_numpy(), index=per_unit.index + offset))
+        offset += int(per_unit.index.max())
+    max_cycles = pd.concat(max_cycles)
+    lookup = np.zeros(offset + 1, dtype=np.int64)
+    lookup[max_cycles.index.to_numpy()] = max_cycles.to_numpy()
+
+    # 2. Pass kedua: label per chunk, tulis langsung ke tabel output
+    with open_table_writer(output_dir, "ingested_train", storage_format) as train_writer, \
+         open_table_writer(output_dir, "streaming_source", storage_format) as stream_writer:
+        for path, offset in zip(paths, offsets):
+            print(f"   Membaca file: {path} (unit offset {offset}) ...")
+            for chunk in read_raw_chunks(path, chunksize):
+                chunk["unit_number"] += offset
+                # RUL mundur (Max Cycle - Current Cycle): data Train NASA adalah Run-to-Failure
+                chunk["RUL"] = lookup[chunk["unit_number"].to_numpy()] - chunk["time_in_cycles"]
+                # 1 = Bahaya (RUL <= threshold), 0 = Aman
+                chunk["label"] = (chunk["RUL"] <= rul_threshold).astype(int)
+
+                is_train = chunk["unit_number"] <= split_id
+                train_writer.append(chunk[is_train])
+                stream_writer.append(chunk[~is_train])
+    return {"ingested_train": train_writer.n_rows, "streaming_source": stream_writer.n_rows}
+
 def ingest_data():
     print("🚀 Memulai Data Ingestion untuk FD002...")
     cfg = load_config(CONFIG_PATH)
-    
+
     # 1. Setup Path
-    raw_path = Path(cfg["raw_data_path"])
+    paths = raw_paths(cfg)
     output_dir = Path(cfg["output_dir"])
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    if not raw_path.exists():
-        raise FileNotFoundError(f"File dataset tidak ditemukan di: {raw_path}")
-
-    # 2. Definisikan Nama Kolom (Standar NASA CMAPSS)
-    # FD002 memiliki struktur kolom yang sama persis dengan FD001
-    col_names = [
-        "unit_number", "time_in_cycles", 
-        "op_setting_1", "op_setting_2", "op_setting_3",
-        "sensor_1", "sensor_2", "sensor_3", "sensor_4", "sensor_5",
-        "sensor_6", "sensor_7", "sensor_8", "sensor_9", "sensor_10",
-        "sensor_11", "sensor_12", "sensor_13", "sensor_14", "sensor_15",
-        "sensor_16", "sensor_17", "sensor_18", "sensor_19", "sensor_20", "sensor_21"
-    ]
-    
-    # 3. Baca Data
-    print(f"   Membaca file: {raw_path} ...")
-    df = pd.read_csv(raw_path, sep=r"\s+", header=None, names=col_names)
-    print(f"   Total Data Mentah: {df.shape}")
-    
-    # 4. Generate Label (RUL)
-    # Kita hitung RUL mundur (Max Cycle - Current Cycle)
-    # Ini berlaku untuk data Train NASA karena semua mesin berjalan sampai rusak (Run-to-Failure)
-    print("   Generating RUL (Remaining Useful Life)...")
-    max_cycles = df.groupby('unit_number')['time_in_cycles'].transform('max')
-    df['RUL'] = max_cycles - df['time_in_cycles']
-    
-    # Buat Target Label (Binary Classification)
-    # 1 = Bahaya (RUL <= 30), 0 = Aman
-    threshold = cfg['rul_threshold']
-    df['label'] = (df['RUL'] <= threshold).astype(int)
-    
-    # 5. Split Data: Training vs Streaming Simulation
-    # Kita pisahkan mesin berdasarkan ID
+
+    for raw_path in paths:
+        if not raw_path.exists():
+            raise FileNotFoundError(f"File dataset tidak ditemukan di: {raw_path}")
+
+    # 2. Split Data: Training vs Streaming Simulation (berdasarkan ID mesin)
     split_id = cfg['test_split_engine_id']
-    
-    df_train = df[df['unit_number'] <= split_id].copy()
-    df_stream = df[df['unit_number'] > split_id].copy()
-    
     print(f"   Split Data: Unit 1-{split_id} untuk Training, Unit {split_id+1}+ untuk Streaming")
-    print(f"   Data Train: {df_train.shape}")
-    print(f"   Data Stream: {df_stream.shape}")
-    
-    # 6. Simpan Data
-    train_save_path = output_dir / "ingested_train.csv"
-    stream_save_path = output_dir / "streaming_source.csv"
-    
-    df_train.to_csv(train_save_path, index=False)
-    df_stream.to_csv(stream_save_path, index=False)
-    
-    print(f"✅ Data tersimpan di '{output_dir}'")
+
+    # 3. Baca, label & simpan per chunk (memori tidak bergantung ukuran file)
+    # Default: format kolumnar (per kolom .npy, dipartisi per unit, dtype float32/int16)
+    # agar stage berikutnya tidak perlu parsing CSV lagi.
+    chunksize = cfg.get("ingestion", {}).get("chunksize", 100_000)
+    counts = ingest_raw_files(paths, output_dir, cfg['rul_threshold'], split_id,
+                              cfg.get("storage_format", "columnar"), chunksize)
+
+    print(f"   Data Train: {counts['ingested_train']} baris")
+    print(f"   Data Stream: {counts['streaming_source']} baris")
+    print(f"✅ Data tersimpan di '{output_dir}' (ingested_train, streaming_source)")
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    ingest_data()
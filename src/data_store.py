@@ -0,0 +1,349 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import yaml
+from pathlib import Path
+
+# --- COLUMNAR DATA STORE ---
+# Pengganti CSV antar-stage. Satu tabel = satu folder:
+#   <nama>/meta.json      -> daftar kolom + dtype + jumlah baris
+#   <nama>/<kolom>.npy    -> 1 file per kolom (bisa di-mmap, tanpa parsing teks)
+#   <nama>/_units.npy     -> index partisi: [unit_number, start, stop] per unit
+# Baris diurutkan per unit_number sehingga data 1 unit = 1 slice yang berurutan.
+# Snapshot yang dibuat dari <nama>.csv menyimpan mtime & ukuran CSV-nya di meta.json ("source"):
+# jika CSV ditulis ulang (ingest ulang / restore cache pipeline), snapshot dianggap basi.
+
+CONFIG_PATH = Path("configs/data.yaml")
+PARTITION_COL = "unit_number"
+
+# Tipe data hemat memori untuk kolom C-MAPSS (sisanya float32)
+COLUMN_DTYPES = {
+    "unit_number": np.int16,
+    "time_in_cycles": np.int16,
+    "RUL": np.int16,
+    "label": np.int8,
+}
+
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def column_dtype(col: str):
+    return COLUMN_DTYPES.get(col, np.float32)
+
+def write_table(df: pd.DataFrame, path: Path, source: dict = None):
+    """
+    Simpan DataFrame sebagai tabel kolumnar yang dipartisi per unit_number.
+    `source` = signature CSV asal (snapshot dari CSV), disimpan di meta.json.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    if PARTITION_COL in df.columns:
+        df = df.sort_values(PARTITION_COL, kind="stable")
+        units, starts, counts = np.unique(df[PARTITION_COL].to_numpy(), return_index=True, return_counts=True)
+        index = np.stack([units, starts, starts + counts], axis=1).astype(np.int64)
+    else:
+        index = np.empty((0, 3), dtype=np.int64)
+
+    dtypes = {}
+    for col in df.columns:
+        arr = df[col].to_numpy().astype(column_dtype(col))
+        np.save(path / f"{col}.npy", arr)
+        dtypes[col] = arr.dtype.str
+
+    np.save(path / "_units.npy", index)
+    meta = {"columns": list(df.columns), "dtypes": dtypes, "n_rows": int(len(df)), "partition": PARTITION_COL}
+    if source is not None:
+        meta["source"] = source
+    with (path / "meta.json").open("w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+class ColumnTableWriter:
+    """
+    Tulis tabel kolumnar potongan demi potongan (chunk), tanpa menampung seluruh tabel di memori.
+
+    Setiap kolom di-append sebagai byte mentah ke file sementara, lalu saat close()
+    diberi header .npy. Baris 1 unit harus berurutan (seperti file raw C-MAPSS),
+    sehingga index partisi bisa dibangun tanpa sorting.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.columns = None
+        self.n_rows = 0
+        self._files = {}
+        self._index = []    # [unit, start, stop] per unit
+        self._seen = set()
+
+    def _part(self, col: str) -> Path:
+        return self.path / f"{col}.npy.part"
+
+    def append(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self._files = {c: self._part(c).open("wb") for c in self.columns}
+        if df.empty:
+            return
+        for c in self.columns:
+            self._files[c].write(np.ascontiguousarray(df[c].to_numpy().astype(column_dtype(c))).tobytes())
+
+        if PARTITION_COL in self.columns:
+            units = df[PARTITION_COL].to_numpy()
+            change = np.flatnonzero(units[1:] != units[:-1]) + 1
+            starts = np.concatenate([[0], change])
+            stops = np.concatenate([change, [len(units)]])
+            for u, a, b in zip(units[starts].tolist(), starts + self.n_rows, stops + self.n_rows):
+                if self._index and self._index[-1][0] == u and self._index[-1][2] == a:
+                    self._index[-1][2] = int(b)     # Unit yang sama berlanjut dari chunk sebelumnya
+                elif u in self._seen:
+                    raise ValueError(f"Baris unit {u} tidak berurutan, tidak bisa ditulis per chunk")
+                else:
+                    self._index.append([u, int(a), int(b)])
+                    self._seen.add(u)
+        self.n_rows += len(df)
+
+    def close(self):
+        dtypes = {}
+        for c in self.columns or []:
+            self._files[c].close()
+            dtype = np.dtype(column_dtype(c))
+            header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (self.n_rows,)}
+            with (self.path / f"{c}.npy").open("wb") as out, self._part(c).open("rb") as part:
+                np.lib.format.write_array_header_1_0(out, header)
+                shutil.copyfileobj(part, out, length=1 << 20)
+            self._part(c).unlink()
+            dtypes[c] = dtype.str
+
+        np.save(self.path / "_units.npy", np.asarray(self._index, dtype=np.int64).reshape(-1, 3))
+        meta = {"columns": self.columns or [], "dtypes": dtypes, "n_rows": self.n_rows, "partition": PARTITION_COL}
+        with (self.path / "meta.json").open("w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def abort(self):
+        for c, f in self._files.items():
+            f.close()
+            self._part(c).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Jika gagal di tengah jalan, meta.json tidak ditulis (tabel lama/parsial tidak dianggap valid)
+        self.close() if exc_type is None else self.abort()
+
+class CsvTableWriter:
+    """Padanan ColumnTableWriter untuk storage_format 'csv' (append per chunk)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.n_rows = 0
+        self._header = True
+        # Snapshot kolumnar lama dari CSV ini sudah pasti basi
+        remove_snapshot(self.path.parent, self.path.stem)
+
+    def append(self, df: pd.DataFrame):
+        df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+        self._header = False
+        self.n_rows += len(df)
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close() if exc_type is None else self.abort()
+
+def table_exists(path: Path) -> bool:
+    return (Path(path) / "meta.json").exists()
+
+def csv_signature(csv_path: Path) -> dict:
+    st = Path(csv_path).stat()
+    return {"file": Path(csv_path).name, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def snapshot_is_current(data_dir: Path, name: str) -> bool:
+    """
+    True jika tabel kolumnar `name` ada dan masih cocok dengan <name>.csv. Tabel yang ditulis
+    langsung dalam format kolumnar (tanpa "source") atau yang CSV-nya sudah tidak ada selalu valid.
+    """
+    path, csv_path = Path(data_dir) / name, Path(data_dir) / f"{name}.csv"
+    if not table_exists(path):
+        return False
+    with (path / "meta.json").open("r", encoding="utf-8") as f:
+        source = json.load(f).get("source")
+    if source is None or not csv_path.exists():
+        return True
+    return source == csv_signature(csv_path)
+
+def remove_snapshot(data_dir: Path, name: str):
+    """Hapus folder kolumnar `name` (dipanggil penulis CSV: isinya tidak lagi sesuai)."""
+    shutil.rmtree(Path(data_dir) / name, ignore_errors=True)
+
+class ColumnTable:
+    """
+    Akses read-only ke tabel kolumnar. Kolom di-load dengan mmap, jadi beberapa proses
+    (misal beberapa sesi Streamlit) berbagi page cache yang sama, bukan salinan masing-masing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with (self.path / "meta.json").open("r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        index = np.load(self.path / "_units.npy")
+        self._slices = {int(u): (int(a), int(b)) for u, a, b in index}
+        self._cache = {}
+
+    @property
+    def units(self) -> list:
+        return list(self._slices)
+
+    def __len__(self):
+        return self.meta["n_rows"]
+
+    def column(self, col: str) -> np.ndarray:
+        if col not in self._cache:
+            if col not in self.columns:
+                raise KeyError(f"Kolom '{col}' tidak ada di tabel {self.path}")
+            self._cache[col] = np.load(self.path / f"{col}.npy", mmap_mode="r")
+        return self._cache[col]
+
+    def unit_slice(self, unit_id) -> slice:
+        start, stop = self._slices[int(unit_id)]
+        return slice(start, stop)
+
+    def read(self, columns=None, units=None) -> pd.DataFrame:
+        """Baca hanya kolom dan unit yang dibutuhkan."""
+        columns = list(columns) if columns is not None else self.columns
+        if units is None:
+            return pd.DataFrame({c: np.asarray(self.column(c)) for c in columns})
+
+        slices = [self.unit_slice(u) for u in units if int(u) in self._slices]
+        return pd.DataFrame({
+            c: np.concatenate([self.column(c)[s] for s in slices]) if slices
+            else np.empty(0, dtype=self.column(c).dtype)
+            for c in columns
+        })
+
+def load_table(data_dir: Path, name: str, columns=None, units=None) -> pd.DataFrame:
+    """
+    Baca tabel `name` dari data_dir. Pakai format kolumnar jika ada (dan tidak basi),
+    fallback ke `<name>.csv` (format lama) jika belum dikonversi.
+    """
+    data_dir = Path(data_dir)
+    if snapshot_is_current(data_dir, name):
+        return ColumnTable(data_dir / name).read(columns, units)
+
+    csv_path = data_dir / f"{name}.csv"
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Tabel '{name}' tidak ditemukan di {data_dir} (kolumnar maupun CSV)")
+    usecols = None
+    if columns is not None:
+        usecols = list(columns) + ([PARTITION_COL] if units is not None and PARTITION_COL not in columns else [])
+    df = pd.read_csv(csv_path, usecols=usecols)
+    if units is not None:
+        df = df[df[PARTITION_COL].isin(list(units))].reset_index(drop=True)
+        if columns is not None:
+            df = df[list(columns)]
+    return df
+
+def iter_table(data_dir: Path, name: str, columns=None, chunk_rows: int = 50_000):
+    """
+    Baca tabel `name` per chunk (~chunk_rows baris) tanpa memuat seluruh tabel: kolumnar per
+    kelompok unit utuh (mmap), fallback CSV lewat read_csv(chunksize). Urutan kolom = `columns`.
+    """
+    data_dir = Path(data_dir)
+    if snapshot_is_current(data_dir, name):
+        table = ColumnTable(data_dir / name)
+        units, n_rows = [], 0
+        for unit in table.units:
+            rows = table.unit_slice(unit)
+            units.append(unit)
+            n_rows += rows.stop - rows.start
+            if n_rows >= chunk_rows:
+                yield table.read(columns, units)
+                units, n_rows = [], 0
+        if units:
+            yield table.read(columns, units)
+        return
+
+    csv_path = data_dir / f"{name}.csv"
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Tabel '{name}' tidak ditemukan di {data_dir} (kolumnar maupun CSV)")
+    with pd.read_csv(csv_path, usecols=columns, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield chunk if columns is None else chunk[list(columns)]
+
+def list_units(data_dir: Path, name: str) -> list:
+    """Daftar unit_number di tabel (dari index partisi, tanpa membaca datanya)."""
+    data_dir = Path(data_dir)
+    if snapshot_is_current(data_dir, name):
+        return ColumnTable(data_dir / name).units
+    return sorted(load_table(data_dir, name, columns=[PARTITION_COL])[PARTITION_COL].unique().tolist())
+
+def save_table(df: pd.DataFrame, data_dir: Path, name: str, storage_format: str = "columnar"):
+    """Simpan tabel sesuai `storage_format` di config ('columnar' atau 'csv')."""
+    data_dir = Path(data_dir)
+    if storage_format == "csv":
+        path = data_dir / f"{name}.csv"
+        df.to_csv(path, index=False)
+        remove_snapshot(data_dir, name)
+    else:
+        path = data_dir / name
+        write_table(df, path)
+    return path
+
+def ensure_columnar(data_dir: Path, name: str) -> bool:
+    """
+    Pastikan snapshot kolumnar `name` ada dan sesuai <name>.csv (dibuat dari CSV jika belum ada
+    atau CSV sudah berubah), supaya start berikutnya cukup mmap tanpa parsing CSV. Ditulis ke
+    folder sementara lalu di-rename, jadi proses lain tidak pernah melihat snapshot setengah jadi.
+    Return False jika hanya CSV yang bisa dipakai (misal filesystem read-only).
+    """
+    data_dir = Path(data_dir)
+    path = data_dir / name
+    if snapshot_is_current(data_dir, name):
+        return True
+    csv_path = data_dir / f"{name}.csv"
+    if not csv_path.exists():
+        return False
+    tmp = data_dir / f".{name}.{os.getpid()}.tmp"
+    try:
+        source = csv_signature(csv_path)
+        write_table(pd.read_csv(csv_path), tmp, source=source)
+        stale = data_dir / f".{name}.{os.getpid()}.stale"
+        if path.exists():
+            path.rename(stale)   # Snapshot basi disingkirkan dulu (rename folder butuh tujuan kosong)
+        tmp.rename(path)
+        shutil.rmtree(stale, ignore_errors=True)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return snapshot_is_current(data_dir, name)
+
+def open_table_writer(data_dir: Path, name: str, storage_format: str = "columnar"):
+    """Writer per chunk untuk tabel `name`, sesuai `storage_format` di config."""
+    data_dir = Path(data_dir)
+    if storage_format == "csv":
+        return CsvTableWriter(data_dir / f"{name}.csv")
+    return ColumnTableWriter(data_dir / name)
+
+def main():
+    # Konversi CSV lama (hasil pipeline sebelumnya) ke format kolumnar
+    cfg = load_config(CONFIG_PATH)
+    data_dir = Path(cfg["output_dir"])
+    for name in ["ingested_train", "streaming_source", "train_final"]:
+        csv_path = data_dir / f"{name}.csv"
+        if csv_path.exists():
+            write_table(pd.read_csv(csv_path), data_dir / name, source=csv_signature(csv_path))
+            print(f"✅ {csv_path} -> {data_dir / name}/")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from metrics import REGISTRY as metrics
+
+# --- LOGGING PREDIKSI KE SQLITE (BUFFERED) ---
+# Prediksi tidak langsung di-commit satu per satu. Record masuk antrian di memori,
+# lalu background thread menulisnya dengan executemany dalam 1 transaksi per batch.
+
+DB_PATH = "inference_logs.db"
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS prediction_logs
+       (id INTEGER PRIMARY KEY, timestamp TEXT, unit_id INTEGER, cycle INTEGER,
+       prediction INTEGER, probability REAL, status TEXT, model_version TEXT, role TEXT DEFAULT 'primary',
+       latency_ms REAL)''',
+    # Index agar query history tetap cepat walau tabel sudah jutaan baris
+    "CREATE INDEX IF NOT EXISTS idx_logs_unit_id ON prediction_logs (unit_id)",
+    "CREATE INDEX IF NOT EXISTS idx_logs_cycle ON prediction_logs (cycle)",
+    "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON prediction_logs (timestamp)",
+    # Ringkasan per unit per jam untuk tab History (query bulanan tanpa membaca log mentah)
+    '''CREATE TABLE IF NOT EXISTS prediction_rollup_hourly
+       (unit_id INTEGER, hour TEXT, n INTEGER, n_critical INTEGER, sum_prob REAL,
+       min_prob REAL, max_prob REAL, last_cycle INTEGER, PRIMARY KEY (unit_id, hour)) WITHOUT ROWID''',
+    "CREATE INDEX IF NOT EXISTS idx_rollup_hour ON prediction_rollup_hourly (hour)",
+    # Watermark: id log terakhir yang sudah masuk rollup
+    "CREATE TABLE IF NOT EXISTS rollup_state (name TEXT PRIMARY KEY, last_id INTEGER)",
+    # Alert drift input sensor (src/drift.py), maksimal 1 baris per fitur per window
+    '''CREATE TABLE IF NOT EXISTS drift_alerts
+       (id INTEGER PRIMARY KEY, timestamp TEXT, feature TEXT, psi REAL, ks REAL,
+       out_of_range REAL, window_mean REAL, ref_mean REAL, n_rows INTEGER, non_finite REAL)''',
+]
+
+# Kolom yang ditambahkan setelah prediction_logs pertama kali dibuat: DB lama di-ALTER saat dibuka
+# model_version/role/latency_ms = versi model (src/registry.py), primary/shadow, latency batch (ms)
+# non_finite = fraksi nilai NaN/inf per fitur di window drift
+MIGRATIONS = [
+    ("prediction_logs", "model_version", "TEXT"),
+    ("prediction_logs", "role", "TEXT DEFAULT 'primary'"),
+    ("prediction_logs", "latency_ms", "REAL"),
+    ("drift_alerts", "non_finite", "REAL"),
+]
+
+INSERT_SQL = ("INSERT INTO prediction_logs (timestamp, unit_id, cycle, prediction, probability, status, "
+              "model_version, role, latency_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+DRIFT_COLUMNS = ["timestamp", "feature", "psi", "ks", "out_of_range", "non_finite", "window_mean", "ref_mean",
+                 "n_rows"]
+DRIFT_SQL = f"INSERT INTO drift_alerts ({', '.join(DRIFT_COLUMNS)}) VALUES ({', '.join('?' * len(DRIFT_COLUMNS))})"
+
+# Agregasi log baru (id > watermark) lalu gabungkan ke rollup yang sudah ada.
+# "WHERE true" wajib di SQLite untuk upsert dari SELECT. Hanya prediksi primary (yang benar-benar
+# dipakai) dengan unit_id yang masuk rollup; prediksi shadow dibandingkan lewat model_version.
+ROLLUP_SQL = (
+    "INSERT INTO prediction_rollup_hourly "
+    "SELECT unit_id, substr(timestamp, 1, 13) || ':00:00', COUNT(*), SUM(prediction), SUM(probability), "
+    "MIN(probability), MAX(probability), MAX(cycle) FROM prediction_logs "
+    "WHERE id > ? AND id <= ? AND role = 'primary' AND unit_id IS NOT NULL AND true "
+    "GROUP BY 1, 2 "
+    "ON CONFLICT (unit_id, hour) DO UPDATE SET n = n + excluded.n, n_critical = n_critical + excluded.n_critical, "
+    "sum_prob = sum_prob + excluded.sum_prob, min_prob = MIN(min_prob, excluded.min_prob), "
+    "max_prob = MAX(max_prob, excluded.max_prob), last_cycle = MAX(last_cycle, excluded.last_cycle)"
+)
+
+class PredictionLogger:
+    """
+    Writer prediction_logs dengan 1 koneksi bersama dan 1 background thread.
+
+    - WAL mode: pembaca (dashboard/query history) tidak terblokir oleh penulis.
+    - Flush dilakukan tiap `flush_interval` detik atau saat antrian mencapai `max_batch`.
+    - Rollup per jam diperbarui inkremental tiap `rollup_interval` detik (1 query agregasi untuk
+      semua log baru), bukan per insert, jadi throughput tulis tidak ikut turun.
+    """
+
+    def __init__(self, db_path=DB_PATH, flush_interval=0.5, max_batch=1000, rollup_interval=5.0):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.rollup_interval = rollup_interval
+        self._last_rollup = 0.0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_schema()
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="db-logger", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def _init_schema(self):
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # NORMAL sudah aman untuk WAL dan jauh lebih sedikit fsync dibanding FULL
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            for stmt in SCHEMA:
+                self.conn.execute(stmt)
+            for table, column, decl in MIGRATIONS:
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+            self.conn.execute("INSERT OR IGNORE INTO rollup_state VALUES ('hourly', 0)")
+            self.conn.commit()
+        # DB lama: log yang sudah ada langsung masuk rollup
+        self.refresh_rollup()
+
+    # --- API PENULISAN ---
+    def log(self, unit_id, cycle, pred, prob, model_version=None, latency_ms=None, role="primary"):
+        """Antrikan 1 prediksi (non-blocking)."""
+        self.log_many([unit_id], [cycle], [pred], [prob], model_version, latency_ms, role)
+
+    def log_many(self, unit_ids, cycles, preds, probs, model_version=None, latency_ms=None, role="primary"):
+        """
+        Antrikan banyak prediksi sekaligus (hasil predict_batch). `latency_ms` = waktu scoring
+        batch-nya (sama untuk semua baris). unit_id/cycle boleh None (request /predict tanpa id).
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        latency_ms = None if latency_ms is None else float(latency_ms)
+        for unit_id, cycle, pred, prob in zip(unit_ids, cycles, preds, probs):
+            status = "CRITICAL" if pred == 1 else "NORMAL"
+            self._queue.put((timestamp, None if unit_id is None else int(unit_id),
+                             None if cycle is None else int(cycle), int(pred), float(prob), status,
+                             model_version, role, latency_ms))
+
+    def log_drift(self, alerts: list):
+        """Tulis alert DriftMonitor langsung (jarang: per window, bukan per prediksi)."""
+        rows = [tuple(a[c] for c in DRIFT_COLUMNS) for a in alerts]
+        try:
+            with self.lock, self.conn:
+                self.conn.executemany(DRIFT_SQL, rows)
+        except sqlite3.Error as e:
+            print(f"⚠️ Gagal menulis {len(rows)} alert drift: {e}")
+
+    def flush(self):
+        """Blok sampai semua record di antrian sudah tertulis ke database (termasuk rollup)."""
+        self._queue.join()
+        self.refresh_rollup()
+
+    def refresh_rollup(self) -> int:
+        """Masukkan log baru (id > watermark) ke prediction_rollup_hourly. Return jumlah log."""
+        with self.lock, self.conn:
+            # Baca watermark, upsert & geser watermark dalam 1 transaksi tulis: proses lain yang memakai
+            # DB yang sama (dashboard & serve.py) menunggu, tidak membaca watermark lama lalu menghitung dobel
+            self.conn.execute("BEGIN IMMEDIATE")
+            last_id = self.conn.execute("SELECT last_id FROM rollup_state WHERE name = 'hourly'").fetchone()[0]
+            max_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM prediction_logs").fetchone()[0]
+            if max_id > last_id:
+                self.conn.execute(ROLLUP_SQL, (last_id, max_id))
+            self.conn.execute("UPDATE rollup_state SET last_id = ? WHERE name = 'hourly'", (max_id,))
+        self._last_rollup = time.monotonic()
+        return max(max_id - last_id, 0)
+
+    def clear(self):
+        """Hapus seluruh isi prediction_logs + rollup-nya + alert drift (Purge Database, dengan konfirmasi)."""
+        self.flush()
+        with self.lock:
+            self.conn.execute("DELETE FROM prediction_logs")
+            self.conn.execute("DELETE FROM prediction_rollup_hourly")
+            self.conn.execute("DELETE FROM drift_alerts")
+            self.conn.execute("UPDATE rollup_state SET last_id = 0")
+            self.conn.commit()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self.flush()
+        self._stop.set()
+        self._worker.join(timeout=2.0)
+        with self.lock:
+            self.conn.close()
+        # Logger yang sudah ditutup tidak boleh dikembalikan lagi oleh get_logger
+        with _loggers_lock:
+            for key in [k for k, v in _loggers.items() if v is self]:
+                del _loggers[key]
+
+    # --- BACKGROUND WRITER ---
+    def _drain(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain()
+            if time.monotonic() - self._last_rollup >= self.rollup_interval:
+                try:
+                    with metrics.timer("db_rollup"):
+                        self.refresh_rollup()
+                except Exception as e:
+                    print(f"⚠️ Gagal memperbarui rollup history: {e}")
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Semua error ditangkap: thread writer tidak boleh mati, log berikutnya tetap ditulis
+                metrics.inc("db_write_errors")
+                print(f"⚠️ Gagal menulis {len(batch)} log prediksi: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        # 1 transaksi (1 fsync) untuk seluruh batch
+        with self.lock, metrics.timer("db_commit"):
+            with self.conn:
+                self.conn.executemany(INSERT_SQL, batch)
+        metrics.inc("db_rows_written", len(batch))
+
+# --- SATU LOGGER PER PROSES ---
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+def get_logger(db_path=DB_PATH) -> PredictionLogger:
+    """Ambil logger bersama untuk db_path ini (dibuat sekali per proses)."""
+    key = (os.getpid(), os.path.abspath(db_path))
+    with _loggers_lock:
+        if key not in _loggers:
+            _loggers[key] = PredictionLogger(db_path)
+        return _loggers[key]
@@ -0,0 +1,261 @@
+import json
+import threading
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from metrics import REGISTRY as metrics
+
+# --- DRIFT MONITOR ONLINE (MEMORI TETAP) ---
+# Referensi dibuat saat preprocessing dari data yang sama dengan yang dilihat MinMaxScaler:
+# histogram bin tetap per fitur (batas = min/max training) + mean/std. Disimpan sebagai
+# drift_reference.json di sebelah scaler.pkl.
+#
+# Saat serving, setiap batch input model (sebelum scaling) hanya meng-update sketch:
+#   - hitungan bin per fitur (+ 2 bin luar range: < min dan > max training)
+#   - momen berjalan (count, mean, M2) + min/max
+#   - hitungan nilai non-finite (NaN/inf) per fitur: tidak masuk bin maupun momen, dilaporkan
+#     terpisah (fraksi per window ikut di-alert dengan threshold out_of_range)
+# Tidak ada data mentah yang disimpan. Setiap `window_rows` baris, histogram window
+# dibandingkan dengan referensi (PSI + estimasi KS dari CDF bin), alert ditulis ke
+# inference_logs.db (tabel drift_alerts), lalu hitungan window di-reset.
+
+DRIFT_FILE = "drift_reference.json"
+PSI_EPS = 1e-4   # Proporsi minimum per bin (bin kosong -> log tidak tak hingga)
+
+def drift_config(cfg: dict) -> dict:
+    dc = cfg.get("drift", {}) or {}
+    return {
+        "enabled": dc.get("enabled", False),
+        "n_bins": dc.get("n_bins", 10),
+        "window_rows": dc.get("window_rows", 5000),
+        "psi_threshold": dc.get("psi_threshold", 0.25),
+        "ks_threshold": dc.get("ks_threshold", 0.2),
+        "out_of_range_threshold": dc.get("out_of_range_threshold", 0.01),
+    }
+
+class DriftReference:
+    """Sketch data training per fitur: batas bin, proporsi per bin, mean & std."""
+
+    def __init__(self, features, lo, hi, n_bins, proportions, mean, std, n_rows):
+        self.features = list(features)
+        self.lo = np.asarray(lo, dtype=np.float64)
+        self.hi = np.asarray(hi, dtype=np.float64)
+        self.n_bins = int(n_bins)
+        self.proportions = np.asarray(proportions, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.n_rows = int(n_rows)
+        # Fitur konstan saat training: lebar bin 1 supaya tidak membagi nol
+        width = (self.hi - self.lo) / self.n_bins
+        self.inv_width = 1.0 / np.where(width > 0, width, 1.0)
+
+    @property
+    def n_slots(self) -> int:
+        # Bin 0 = di bawah min training, bin n_bins + 1 = di atas max training
+        return self.n_bins + 2
+
+    def bin_index(self, X: np.ndarray, finite: np.ndarray = None) -> np.ndarray:
+        """Index bin (0 .. n_bins + 1) setiap nilai, O(1) per nilai (bin selebar sama). NaN/inf -> -1."""
+        finite = np.isfinite(X) if finite is None else finite
+        all_finite = finite.all()
+        if not all_finite:
+            # NaN tidak boleh sampai ke astype(int64) (jadi INT64_MIN), isi sementara dengan min training
+            X = np.where(finite, X, self.lo)
+        idx = np.clip(np.floor((X - self.lo) * self.inv_width), 0, self.n_bins - 1).astype(np.int64) + 1
+        idx[X < self.lo] = 0
+        idx[X > self.hi] = self.n_bins + 1
+        if not all_finite:
+            idx[~finite] = -1
+        return idx
+
+    def histogram(self, X: np.ndarray, finite: np.ndarray = None) -> np.ndarray:
+        """Hitungan per (fitur, bin) untuk matriks X (n x fitur), 1x bincount untuk seluruh batch.
+        Nilai non-finite tidak dihitung di bin mana pun."""
+        finite = np.isfinite(X) if finite is None else finite
+        codes = self.bin_index(X, finite) + np.arange(X.shape[1]) * self.n_slots
+        codes = codes.ravel() if finite.all() else codes[finite]
+        return np.bincount(codes, minlength=X.shape[1] * self.n_slots).reshape(X.shape[1], self.n_slots)
+
+    @classmethod
+    def fit(cls, X: np.ndarray, features: list, n_bins: int = 10):
+        X = np.asarray(X, dtype=np.float64)
+        ref = cls(features, X.min(axis=0), X.max(axis=0), n_bins,
+                  np.zeros((X.shape[1], n_bins + 2)), X.mean(axis=0), X.std(axis=0), len(X))
+        ref.proportions = ref.histogram(X) / len(X)
+        return ref
+
+    def save(self, path: Path) -> Path:
+        # Format JSON yang sama dengan regimes.json (float round-trip)
+        state = {
+            "features": self.features,
+            "lo": self.lo.tolist(),
+            "hi": self.hi.tolist(),
+            "n_bins": self.n_bins,
+            "proportions": self.proportions.tolist(),
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "n_rows": self.n_rows,
+        }
+        with Path(path).open("w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        return Path(path)
+
+    @classmethod
+    def load(cls, path: Path):
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+def batch_moments(X: np.ndarray, finite: np.ndarray) -> tuple:
+    """(count, mean, M2, min, max) per fitur dari nilai finite saja."""
+    if finite.all():
+        mean = X.mean(axis=0)
+        return np.full(X.shape[1], len(X)), mean, ((X - mean) ** 2).sum(axis=0), X.min(axis=0), X.max(axis=0)
+    n = finite.sum(axis=0)
+    mean = np.where(finite, X, 0.0).sum(axis=0) / np.maximum(n, 1)
+    m2 = (np.where(finite, X - mean, 0.0) ** 2).sum(axis=0)
+    return n, mean, m2, np.where(finite, X, np.inf).min(axis=0), np.where(finite, X, -np.inf).max(axis=0)
+
+def psi(current: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Population Stability Index per baris (fitur) dari 2 matriks proporsi bin."""
+    p = np.maximum(current, PSI_EPS)
+    q = np.maximum(reference, PSI_EPS)
+    return ((p - q) * np.log(p / q)).sum(axis=1)
+
+def ks_binned(current: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Estimasi statistik KS: selisih CDF terbesar, dievaluasi di batas bin."""
+    return np.abs(np.cumsum(current, axis=1) - np.cumsum(reference, axis=1)).max(axis=1)
+
+class DriftMonitor:
+    """
+    Sketch streaming per fitur terhadap DriftReference. Memori tetap: (fitur x bin) hitungan
+    window + momen berjalan, berapa pun jumlah baris yang lewat.
+
+    `on_alert(alerts)` dipanggil dengan list dict setiap ada fitur yang melewati threshold
+    di akhir window (misal PredictionLogger.log_drift).
+    """
+
+    def __init__(self, reference: DriftReference, window_rows: int = 5000, psi_threshold: float = 0.25,
+                 ks_threshold: float = 0.2, out_of_range_threshold: float = 0.01, on_alert=None):
+        self.reference = reference
+        self.window_rows = window_rows
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.out_of_range_threshold = out_of_range_threshold
+        self.on_alert = on_alert
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        n_features = len(self.reference.features)
+        self.window_counts = np.zeros((n_features, self.reference.n_slots), dtype=np.int64)
+        self.window_sum = np.zeros(n_features)
+        self.window_non_finite = np.zeros(n_features, dtype=np.int64)
+        self.window_n = 0
+        # Momen berjalan seluruh stream (Chan: gabung mean/M2 per batch), hanya dari nilai finite
+        self.n = 0
+        self.n_finite = np.zeros(n_features, dtype=np.int64)
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+        self.out_of_range = np.zeros(n_features, dtype=np.int64)
+        self.non_finite = np.zeros(n_features, dtype=np.int64)
+        self.windows = 0
+        self.n_alerts = 0
+        self.last = None   # Hasil evaluasi window terakhir (dict array per fitur)
+
+    def update(self, X) -> list:
+        """Masukkan 1 batch input model (n x fitur, sebelum scaling). Return alert jika window selesai."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or not len(X):
+            return []
+        with metrics.timer("drift_update"):
+            finite = np.isfinite(X)
+            counts = self.reference.histogram(X, finite)
+            n_b, mean_b, m2_b, min_b, max_b = batch_moments(X, finite)
+            with self.lock:
+                self.window_counts += counts
+                self.window_sum += mean_b * n_b
+                self.window_non_finite += len(X) - n_b
+                self.window_n += len(X)
+                n = self.n_finite + n_b
+                delta = mean_b - self.mean
+                self.mean += delta * n_b / np.maximum(n, 1)
+                self.m2 += m2_b + delta ** 2 * self.n_finite * n_b / np.maximum(n, 1)
+                self.n_finite = n
+                self.n += len(X)
+                np.minimum(self.min, min_b, out=self.min)
+                np.maximum(self.max, max_b, out=self.max)
+                self.out_of_range += counts[:, 0] + counts[:, -1]
+                self.non_finite += len(X) - n_b
+                alerts = self._close_window() if self.window_n >= self.window_rows else []
+        if alerts:
+            metrics.inc("drift_alerts", len(alerts))
+            if self.on_alert is not None:
+                self.on_alert(alerts)
+        return alerts
+
+    def _close_window(self) -> list:
+        ref = self.reference
+        # Proporsi bin dihitung dari nilai finite saja (NaN/inf punya fraksi sendiri)
+        n_finite = self.window_n - self.window_non_finite
+        current = self.window_counts / np.maximum(n_finite, 1)[:, None]
+        result = {
+            "psi": psi(current, ref.proportions),
+            "ks": ks_binned(current, ref.proportions),
+            "out_of_range": (self.window_counts[:, 0] + self.window_counts[:, -1]) / self.window_n,
+            "non_finite": self.window_non_finite / self.window_n,
+            "window_mean": np.where(n_finite > 0, self.window_sum / np.maximum(n_finite, 1), np.nan),
+        }
+        flagged = ((result["psi"] >= self.psi_threshold) | (result["ks"] >= self.ks_threshold)
+                   | (result["out_of_range"] >= self.out_of_range_threshold)
+                   | (result["non_finite"] >= self.out_of_range_threshold))
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        alerts = [{
+            "timestamp": timestamp, "feature": ref.features[j], "psi": float(result["psi"][j]),
+            "ks": float(result["ks"][j]), "out_of_range": float(result["out_of_range"][j]),
+            "non_finite": float(result["non_finite"][j]),
+            "window_mean": float(result["window_mean"][j]), "ref_mean": float(ref.mean[j]),
+            "n_rows": int(self.window_n),
+        } for j in np.flatnonzero(flagged)]
+
+        self.last = result
+        self.windows += 1
+        self.n_alerts += len(alerts)
+        self.window_counts[:] = 0
+        self.window_sum[:] = 0
+        self.window_non_finite[:] = 0
+        self.window_n = 0
+        return alerts
+
+    def summary(self):
+        """Tabel per fitur: PSI/KS window terakhir + momen & range seluruh stream."""
+        import pandas as pd
+        ref = self.reference
+        with self.lock:
+            n = max(self.n, 1)
+            seen = self.n_finite > 0
+            table = pd.DataFrame({
+                "Feature": ref.features,
+                "PSI": self.last["psi"] if self.last else np.nan,
+                "KS": self.last["ks"] if self.last else np.nan,
+                "Out of Range": self.out_of_range / n,
+                "Non Finite": self.non_finite / n,
+                "Mean": np.where(seen, self.mean, np.nan),
+                "Ref Mean": ref.mean,
+                "Std": np.where(seen, np.sqrt(self.m2 / np.maximum(self.n_finite, 1)), np.nan),
+                "Ref Std": ref.std,
+                "Min": np.where(seen, self.min, np.nan),
+                "Max": np.where(seen, self.max, np.nan),
+            })
+        return table.sort_values("PSI", ascending=False, na_position="last").reset_index(drop=True)
+
+def load_monitor(cfg: dict, on_alert=None):
+    """DriftMonitor sesuai config, None jika dimatikan atau referensi belum dibuat preprocessing."""
+    dc = drift_config(cfg)
+    path = Path(cfg["model_dir"]) / DRIFT_FILE
+    if not dc["enabled"] or not path.exists():
+        return None
+    return DriftMonitor(DriftReference.load(path), window_rows=dc["window_rows"],
+                        psi_threshold=dc["psi_threshold"], ks_threshold=dc["ks_threshold"],
+                        out_of_range_threshold=dc["out_of_range_threshold"], on_alert=on_alert)
@@ -1,33 +1,101 @@
+import os
+import time
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Render tanpa display (juga di worker process)
 import matplotlib.pyplot as plt
 import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import yaml
+from data_store import iter_table, load_table
 
 # --- KONFIGURASI ---
-INPUT_FILE = Path("data/processed/initial_training_data.csv")
+CONFIG_PATH = Path("configs/data.yaml")
 OUTPUT_DIR = Path("reports/figures")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-def load_data(path: Path) -> pd.DataFrame:
-    if not path.exists():
-        raise FileNotFoundError(f"Data tidak ditemukan di {path}. Jalankan data_ingestion.py dulu.")
-    return pd.read_csv(path)
+# --- EDA ENGINE ---
+# Data dibaca per kebutuhan (kolom yang dibutuhkan saja): korelasi streaming membaca tabel per
+# kelompok unit, plot hanya memuat unit sampel (dikelompokkan per unit sekali).
+# Yang berat (statistik) dihitung di proses utama, lalu setiap gambar di-render paralel
+# di process pool: worker hanya menerima data kecil yang sudah siap diplot.
 
-def plot_sensor_behavior(df: pd.DataFrame, sensor_col: str, unit_ids: list):
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def load_data(data_dir: Path, columns=None, units=None) -> pd.DataFrame:
+    try:
+        return load_table(data_dir, "ingested_train", columns=columns, units=units)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Data ingested_train tidak ditemukan di {data_dir}. Jalankan data_ingest.py dulu.")
+
+def group_by_unit(df: pd.DataFrame) -> dict:
+    """Index baris per unit SEKALI (data diurutkan per unit), bukan filter df[df.unit == uid] berulang."""
+    df = df.sort_values(['unit_number', 'time_in_cycles'], kind='stable').reset_index(drop=True)
+    units, starts, counts = np.unique(df['unit_number'].to_numpy(), return_index=True, return_counts=True)
+    return {int(u): df.iloc[a:a + n] for u, a, n in zip(units, starts, counts)}
+
+def streaming_corr(chunks) -> pd.DataFrame:
+    """
+    Korelasi Pearson (hasil sama dengan df.corr()) dalam satu pass per chunk.
+    Memori hanya O(k^2): jumlah, dan X^T X dari data yang sudah digeser dengan mean chunk pertama
+    (supaya stabil secara numerik).
+    """
+    n, shift, total, cross, columns = 0, None, None, None, None
+    for chunk in chunks:
+        A = chunk.to_numpy(dtype=np.float64)
+        if shift is None:
+            columns = list(chunk.columns)
+            shift = A.mean(axis=0)
+            total = np.zeros(A.shape[1])
+            cross = np.zeros((A.shape[1], A.shape[1]))
+        A = A - shift
+        n += len(A)
+        total += A.sum(axis=0)
+        cross += A.T @ A
+
+    mean = total / n
+    cov = cross / n - np.outer(mean, mean)
+    std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    # Sensor konstan (std = 0) -> NaN, sama seperti pandas
+    corr[:, std == 0] = np.nan
+    corr[std == 0, :] = np.nan
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=columns, columns=columns)
+
+def stratified_sample(df: pd.DataFrame, frac: float, seed: int = 42) -> pd.DataFrame:
+    """Sampel per (unit, label): setiap mesin & fase Aman/Bahaya tetap terwakili."""
+    return df.groupby(['unit_number', 'label'], group_keys=False).sample(frac=frac, random_state=seed)
+
+def compute_correlation(data_dir: Path, columns: list, corr_cfg: dict) -> pd.DataFrame:
+    """Korelasi `columns` tabel ingested_train: exact per chunk dari disk (streaming) atau dari sampel."""
+    method = corr_cfg.get("method", "streaming")
+    if method == "sample":
+        df = load_data(data_dir, columns=list(dict.fromkeys(['unit_number', 'label'] + columns)))
+        return stratified_sample(df, corr_cfg.get("sample_frac", 0.2))[columns].corr()
+    if method == "streaming":
+        return streaming_corr(iter_table(data_dir, "ingested_train", columns, corr_cfg.get("chunk_rows", 50_000)))
+    raise ValueError(f"Metode korelasi tidak dikenal: {method} (pilih 'streaming' atau 'sample')")
+
+# --- RENDER (dijalankan di worker process) ---
+
+def plot_sensor_behavior(series: dict, sensor_col: str, output_dir: Path = OUTPUT_DIR) -> Path:
     """
     Visualisasi 1: Membuktikan degradasi mesin.
     Kita plot nilai sensor dari awal sampai mesin mati (Cycle terakhir).
+    `series` = {unit: (cycles, nilai sensor, cycle awal fase bahaya / NaN)}.
     """
     plt.figure(figsize=(12, 6))
-    
-    for uid in unit_ids:
-        subset = df[df['unit_number'] == uid]
+
+    for uid, (cycles, values, failure_start) in series.items():
         # Plot sensor value
-        plt.plot(subset['time_in_cycles'], subset[sensor_col], label=f'Engine {uid}')
-        
+        plt.plot(cycles, values, label=f'Engine {uid}')
+
         # Tandai titik failure (ketika label berubah jadi 1/Bahaya)
-        failure_start = subset[subset['label'] == 1]['time_in_cycles'].min()
         if not pd.isna(failure_start):
             plt.axvline(failure_start, color='red', linestyle='--', alpha=0.3)
 
@@ -36,69 +104,107 @@ def plot_sensor_behavior(df: pd.DataFrame, sensor_col: str, unit_ids: list):
     plt.ylabel(f"Nilai {sensor_col}")
     plt.legend()
     plt.grid(True, alpha=0.3)
-    
-    save_path = OUTPUT_DIR / f"eda_behavior_{sensor_col}.png"
+
+    save_path = output_dir / f"eda_behavior_{sensor_col}.png"
     plt.savefig(save_path)
-    print(f"✅ Saved behavior plot: {save_path}")
     plt.close()
+    return save_path
 
-def plot_correlation_heatmap(df: pd.DataFrame):
+def plot_correlation_heatmap(corr_matrix: pd.DataFrame, output_dir: Path = OUTPUT_DIR) -> Path:
     """
     Visualisasi 2: Feature Selection.
     Mencari sensor mana yang paling berkorelasi dengan 'RUL' (Sisa Umur).
     """
-    # Ambil kolom sensor dan RUL saja
-    sensor_cols = [c for c in df.columns if 'sensor' in c]
-    cols_to_check = sensor_cols + ['RUL']
-    
-    corr_matrix = df[cols_to_check].corr()
-    
     plt.figure(figsize=(15, 12))
     sns.heatmap(corr_matrix, annot=False, cmap='coolwarm', center=0)
     plt.title("Korelasi Antar Sensor dan RUL (Sisa Umur)")
-    
-    save_path = OUTPUT_DIR / "eda_correlation_heatmap.png"
+
+    save_path = output_dir / "eda_correlation_heatmap.png"
     plt.savefig(save_path)
-    print(f"✅ Saved correlation heatmap: {save_path}")
     plt.close()
-    
-    # Print korelasi tertinggi dengan RUL untuk rekomendasi fitur
-    print("\n🔍 Top 5 Sensor Paling Berkorelasi dengan RUL (Indikator Kerusakan Terbaik):")
-    rul_corr = corr_matrix['RUL'].abs().sort_values(ascending=False)
-    print(rul_corr.head(6)) # Top 5 + RUL itself
+    return save_path
 
-def plot_label_distribution(df: pd.DataFrame):
+def plot_label_distribution(label_counts: pd.Series, output_dir: Path = OUTPUT_DIR) -> Path:
     """
     Visualisasi 3: Cek Imbalance Data.
     Apakah data 'Aman' jauh lebih banyak dari 'Rusak'?
     """
     plt.figure(figsize=(8, 5))
-    sns.countplot(data=df, x='label', palette='viridis')
+    sns.barplot(x=label_counts.index.astype(str), y=label_counts.to_numpy(),
+                hue=label_counts.index.astype(str), palette='viridis', legend=False)
     plt.title("Distribusi Label Target (0=Aman, 1=Bahaya)")
     plt.xlabel("Label Status")
     plt.ylabel("Jumlah Data Sample")
-    
-    save_path = OUTPUT_DIR / "eda_label_dist.png"
+
+    save_path = output_dir / "eda_label_dist.png"
     plt.savefig(save_path)
-    print(f"✅ Saved label distribution: {save_path}")
     plt.close()
+    return save_path
+
+def timed_render(func, *args):
+    start = time.perf_counter()
+    path = func(*args)
+    return path, time.perf_counter() - start
+
+def print_timing(timings: list, wall: float):
+    print("\n⏱️  Ringkasan waktu EDA:")
+    for step, seconds in timings:
+        print(f"   {step:<40} {seconds:7.2f} s")
+    print(f"   {'TOTAL (wall clock)':<40} {wall:7.2f} s")
 
 def main():
     print("🚀 Memulai EDA Pipeline...")
-    df = load_data(INPUT_FILE)
-    
-    # 1. Cek Pola Kerusakan (Sensor 11 dan 12 biasanya paling sensitif di dataset NASA)
-    # Kita ambil sampel 3 mesin pertama
-    plot_sensor_behavior(df, 'sensor_11', unit_ids=[1, 2, 3])
-    plot_sensor_behavior(df, 'sensor_12', unit_ids=[1, 2, 3])
-    
-    # 2. Cek Korelasi untuk memilih fitur
-    plot_correlation_heatmap(df)
-    
-    # 3. Cek Balance Data
-    plot_label_distribution(df)
-    
-    print(f"\n🎉 EDA Selesai. Cek folder {OUTPUT_DIR} untuk hasil gambar.")
+    wall_start = time.perf_counter()
+    timings = []
+    cfg = load_config(CONFIG_PATH)
+    eda_cfg = cfg.get("eda", {})
+    output_dir = Path(eda_cfg.get("output_dir", OUTPUT_DIR))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 1. Load unit sampel saja (kolom plot) & kelompokkan per unit SEKALI
+    start = time.perf_counter()
+    data_dir = Path(cfg["output_dir"])
+    sensors = eda_cfg.get("behavior_sensors") or [c for c in cfg["selected_features"] if c.startswith("sensor_")]
+    corr_cols = [f"sensor_{i}" for i in range(1, 22)] + ['RUL']
+    df = load_data(data_dir, columns=['unit_number', 'time_in_cycles', 'label'] + sensors,
+                   units=eda_cfg.get("sample_units", [1, 2, 3]))
+    groups = group_by_unit(df)
+    label_counts = load_data(data_dir, columns=['label'])['label'].value_counts().sort_index()
+    timings.append(("load unit sampel + label", time.perf_counter() - start))
+
+    # 2. Korelasi (di proses utama), dibaca dari tabel per chunk atau dari sampel
+    start = time.perf_counter()
+    corr_cfg = eda_cfg.get("correlation", {})
+    corr_matrix = compute_correlation(data_dir, corr_cols, corr_cfg)
+    timings.append((f"korelasi ({corr_cfg.get('method', 'streaming')})", time.perf_counter() - start))
+
+    # 3. Siapkan data plot per sensor (hanya unit sampel) -> dikirim ke worker
+    unit_ids = list(groups)
+    failure = {u: groups[u].loc[groups[u]['label'] == 1, 'time_in_cycles'].min() for u in unit_ids}
+    jobs = [(plot_sensor_behavior,
+             {u: (groups[u]['time_in_cycles'].to_numpy(), groups[u][s].to_numpy(), failure[u]) for u in unit_ids},
+             s, output_dir)
+            for s in sensors]
+    jobs += [(plot_correlation_heatmap, corr_matrix, output_dir),
+             (plot_label_distribution, label_counts, output_dir)]
+
+    # 4. Render paralel
+    n_jobs = eda_cfg.get("n_jobs", -1)
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    with ProcessPoolExecutor(max_workers=max(1, min(n_jobs, len(jobs)))) as pool:
+        futures = [pool.submit(timed_render, *job) for job in jobs]
+        for future in futures:
+            path, seconds = future.result()
+            print(f"✅ Saved: {path}")
+            timings.append((f"render {path.name}", seconds))
+
+    # Print korelasi tertinggi dengan RUL untuk rekomendasi fitur
+    print("\n🔍 Top 5 Sensor Paling Berkorelasi dengan RUL (Indikator Kerusakan Terbaik):")
+    rul_corr = corr_matrix['RUL'].abs().sort_values(ascending=False)
+    print(rul_corr.head(6)) # Top 5 + RUL itself
+
+    print_timing(timings, time.perf_counter() - wall_start)
+    print(f"\n🎉 EDA Selesai. Cek folder {output_dir} untuk hasil gambar.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
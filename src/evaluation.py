@@ -0,0 +1,88 @@
+import hashlib
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, recall_score, root_mean_squared_error
+from sklearn.model_selection import GroupKFold
+
+# --- EVALUASI GROUP K-FOLD (TANPA LEAKAGE ANTAR MESIN) ---
+# Split per unit_number: semua cycle 1 mesin ada di train ATAU test, tidak pernah keduanya.
+# Index fold dihitung sekali lalu disimpan ke disk (key = hash unit_number + n_splits),
+# sehingga semua trial dan retrain final memakai fold yang sama. Fold hanya menyimpan index +
+# referensi ke 1 matriks X bersama (read-only); X_train/X_test di-slice di dalam worker fold
+# saat fit lalu dibuang, jadi memori tambahan ~n_jobs fold yang sedang dilatih, bukan (k-1)x X
+# yang menetap. Fold dilatih paralel di thread (fit sklearn melepas GIL), tanpa salinan per proses.
+
+def cv_config(cfg: dict) -> dict:
+    cv = cfg.get("tuning", {}).get("cv", {}) or {}
+    return {
+        "n_splits": cv.get("n_splits", 5),
+        "cache_dir": Path(cv.get("cache_dir", ".cache/folds")),
+    }
+
+def fold_indices(groups: np.ndarray, n_splits: int, cache_dir: Path = None) -> list:
+    """List (train_idx, test_idx) GroupKFold. Dibaca dari cache jika unit_number & n_splits sama."""
+    groups = np.asarray(groups, dtype=np.int64)
+    key = hashlib.sha256(groups.tobytes() + str(n_splits).encode()).hexdigest()[:16]
+    path = Path(cache_dir) / f"groupkfold_{n_splits}_{key}.npz" if cache_dir else None
+    if path is not None and path.exists():
+        with np.load(path) as f:
+            return [(f[f"train_{k}"], f[f"test_{k}"]) for k in range(n_splits)]
+
+    folds = list(GroupKFold(n_splits=n_splits).split(np.zeros(len(groups)), groups=groups))
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.{os.getpid()}.npz")
+        arrays = {f"{part}_{k}": idx for k, fold in enumerate(folds) for part, idx in zip(["train", "test"], fold)}
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+    return folds
+
+def build_folds(X: np.ndarray, y: np.ndarray, groups: np.ndarray, n_splits: int, cache_dir: Path = None) -> list:
+    """Index train/test per fold + target-nya, dibuat sekali untuk seluruh tuning. X tidak disalin."""
+    folds = []
+    for train_idx, test_idx in fold_indices(groups, n_splits, cache_dir):
+        folds.append({
+            "X": X, "train_idx": train_idx, "test_idx": test_idx,
+            "y_train": y[train_idx], "y_test": y[test_idx],
+        })
+    return folds
+
+def fold_X(fold: dict, part: str = "train", n_rows: int = None) -> np.ndarray:
+    """Baris X bagian `part` (train/test) sebuah fold (opsional hanya `n_rows` pertama), di-slice saat dipakai."""
+    idx = fold[f"{part}_idx"]
+    return fold["X"][idx if n_rows is None else idx[:n_rows]]
+
+def retarget_folds(folds: list, y: np.ndarray) -> list:
+    """Fold yang sama dengan target lain (misal RUL). Matriks X dipakai bersama, tidak disalin."""
+    return [{**f, "y_train": y[f["train_idx"]], "y_test": y[f["test_idx"]]} for f in folds]
+
+def fit_predict_folds(models: list, folds: list, n_jobs: int = 1) -> list:
+    """Fit models[k] di fold k (paralel di thread), return prediksi test tiap fold."""
+    def run(k):
+        # Salinan train fold hanya hidup selama fit ini (fancy indexing -> array contiguous baru)
+        models[k].fit(fold_X(folds[k], "train"), folds[k]["y_train"])
+        return models[k].predict(fold_X(folds[k], "test"))
+
+    if n_jobs <= 1:
+        return [run(k) for k in range(len(folds))]
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        return list(pool.map(run, range(len(folds))))
+
+def fold_metrics(folds: list, preds: list) -> dict:
+    """Rata-rata (dan std F1) metrik per fold."""
+    scores = {
+        "f1": [f1_score(f["y_test"], p) for f, p in zip(folds, preds)],
+        "recall": [recall_score(f["y_test"], p) for f, p in zip(folds, preds)],
+        "accuracy": [accuracy_score(f["y_test"], p) for f, p in zip(folds, preds)],
+    }
+    result = {name: float(np.mean(values)) for name, values in scores.items()}
+    result["f1_std"] = float(np.std(scores["f1"]))
+    return result
+
+def fold_regression_metrics(folds: list, preds: list) -> dict:
+    """Rata-rata (dan std RMSE) metrik regresi per fold."""
+    rmse = [root_mean_squared_error(f["y_test"], p) for f, p in zip(folds, preds)]
+    mae = [mean_absolute_error(f["y_test"], p) for f, p in zip(folds, preds)]
+    return {"rmse": float(np.mean(rmse)), "mae": float(np.mean(mae)), "rmse_std": float(np.std(rmse))}
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+# --- ROLLING FEATURE ENGINEERING ---
+# Statistik per unit (rolling mean/std/slope + EWMA) dihitung dengan SATU implementasi:
+# RollingFeatureState. Saat training, state dijalankan untuk semua unit sekaligus
+# (vektorisasi antar unit, maju per posisi cycle). Saat serving, state yang sama
+# di-update 1 baris per unit (O(1)). Karena operasinya identik, hasilnya bit-identical.
+
+def feature_config(cfg: dict) -> dict:
+    fe = cfg.get("feature_engineering", {}) or {}
+    base = fe.get("columns") or [c for c in cfg["selected_features"] if c.startswith("sensor_")]
+    return {
+        "enabled": fe.get("enabled", False),
+        "columns": base,
+        "windows": fe.get("windows", [5, 10]),
+        "ewma_alpha": fe.get("ewma_alpha", 0.3),
+    }
+
+def engineered_columns(cfg: dict) -> list:
+    fc = feature_config(cfg)
+    if not fc["enabled"]:
+        return []
+    names = []
+    for w in fc["windows"]:
+        for stat in ["mean", "std", "slope"]:
+            names += [f"{c}_{stat}_{w}" for c in fc["columns"]]
+    names += [f"{c}_ewma" for c in fc["columns"]]
+    return names
+
+def model_features(cfg: dict) -> list:
+    """Urutan kolom input model: selected_features + fitur rolling (jika aktif)."""
+    return cfg["selected_features"] + engineered_columns(cfg)
+
+class RollingFeatureState:
+    """
+    Akumulator rolling untuk `n_streams` unit sekaligus, O(1) per update.
+
+    Setiap window menyimpan running sum, sum of squares, dan sum(k * x) (k = index cycle
+    ke-berapa di unit tersebut), cukup untuk mean, std (populasi) dan slope regresi linear.
+    Nilai yang keluar dari window diambil dari ring buffer sepanjang window terbesar.
+    """
+
+    def __init__(self, n_streams: int, n_features: int, windows: list, ewma_alpha: float):
+        self.windows = list(windows)
+        self.alpha = ewma_alpha
+        self.max_w = max(self.windows)
+        self.history = np.zeros((n_streams, self.max_w, n_features))
+        self.count = np.zeros(n_streams, dtype=np.int64)
+        shape = (len(self.windows), n_streams, n_features)
+        self.s = np.zeros(shape)
+        self.s2 = np.zeros(shape)
+        self.skx = np.zeros(shape)
+        self.ewma = np.zeros((n_streams, n_features))
+
+    def update(self, x: np.ndarray, streams=None) -> np.ndarray:
+        """
+        Masukkan 1 baris baru untuk setiap stream di `streams` (default: semua).
+        Return fitur rolling (len(streams) x n_out) sesuai urutan engineered_columns.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if streams is None:
+            streams = np.arange(len(self.count))
+        k = self.count[streams]
+        k_f = k.astype(np.float64)[:, None]
+
+        out = []
+        for i, w in enumerate(self.windows):
+            # Nilai yang keluar dari window (0 jika window belum penuh)
+            k_old = k - w
+            full = (k_old >= 0)[:, None]
+            x_old = np.where(full, self.history[streams, k_old % self.max_w], 0.0)
+            k_old_f = np.where(full, k_old.astype(np.float64)[:, None], 0.0)
+
+            s = self.s[i, streams] + x - x_old
+            s2 = self.s2[i, streams] + x * x - x_old * x_old
+            skx = self.skx[i, streams] + k_f * x - k_old_f * x_old
+            self.s[i, streams] = s
+            self.s2[i, streams] = s2
+            self.skx[i, streams] = skx
+
+            # Statistik window (n = jumlah titik di window saat ini)
+            n = np.minimum(k + 1, w).astype(np.float64)[:, None]
+            k_first = k_f - n + 1.0
+            mean = s / n
+            std = np.sqrt(np.maximum(s2 / n - mean * mean, 0.0))
+
+            sum_k = n * (k_first + k_f) / 2.0
+            sum_k2 = (k_f * (k_f + 1.0) * (2.0 * k_f + 1.0) - (k_first - 1.0) * k_first * (2.0 * k_first - 1.0)) / 6.0
+            denom = n * sum_k2 - sum_k * sum_k
+            safe = np.where(denom > 0, denom, 1.0)
+            slope = np.where(denom > 0, (n * skx - sum_k * s) / safe, 0.0)
+            out += [mean, std, slope]
+
+        first = (k == 0)[:, None]
+        ewma = np.where(first, x, self.alpha * x + (1.0 - self.alpha) * self.ewma[streams])
+        self.ewma[streams] = ewma
+        out.append(ewma)
+
+        self.history[streams, k % self.max_w] = x
+        self.count[streams] = k + 1
+        return np.concatenate(out, axis=1)
+
+def add_rolling_features(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+    """
+    Versi batch (training / scoring 1 unit penuh).
+    Data dikelompokkan per unit_number, lalu state dimajukan per posisi cycle
+    untuk semua unit sekaligus. Index & urutan baris input dipertahankan.
+    """
+    fc = feature_config(cfg)
+    if not fc["enabled"]:
+        return df
+
+    order = np.lexsort((df["time_in_cycles"].to_numpy(), df["unit_number"].to_numpy()))
+    units = df["unit_number"].to_numpy()[order]
+    X = df[fc["columns"]].to_numpy(dtype=np.float64)[order]
+
+    # Setelah diurutkan, baris ke-t unit u ada di starts[u] + t
+    _, starts, counts = np.unique(units, return_index=True, return_counts=True)
+
+    state = RollingFeatureState(len(counts), len(fc["columns"]), fc["windows"], fc["ewma_alpha"])
+    feats = np.empty((len(units), len(engineered_columns(cfg))))
+    for t in range(int(counts.max()) if len(counts) else 0):
+        active = np.flatnonzero(counts > t)
+        rows = starts[active] + t
+        feats[rows] = state.update(X[rows], active)
+
+    out = np.empty_like(feats)
+    out[order] = feats
+    result = df.copy()
+    result[engineered_columns(cfg)] = out
+    return result
+
+def model_input(df: pd.DataFrame, cfg: dict, regimes=None) -> pd.DataFrame:
+    """
+    Data mentah (1 atau banyak unit, urutan cycle lengkap) -> kolom input model:
+    normalisasi regime (jika ada artefaknya), fitur rolling, lalu urutan model_features.
+    """
+    if regimes is not None:
+        df = regimes.transform_frame(df)
+    return add_rolling_features(df, cfg)[model_features(cfg)]
+
+class OnlineFeatures:
+    """
+    Fitur rolling untuk serving: 1 slot state per unit_number, dibuat saat unit pertama kali muncul.
+    Input: baris fitur dasar (urutan selected_features). Output: matriks sesuai model_features.
+    """
+
+    def __init__(self, cfg: dict, capacity: int = 64):
+        self.fc = feature_config(cfg)
+        self.selected = cfg["selected_features"]
+        self.base_idx = [self.selected.index(c) for c in self.fc["columns"]]
+        self.n_out = len(engineered_columns(cfg))
+        self.slots = {}
+        self.state = self._new_state(capacity)
+
+    def _new_state(self, n):
+        return RollingFeatureState(n, len(self.fc["columns"]), self.fc["windows"], self.fc["ewma_alpha"])
+
+    def _slot(self, unit_id) -> int:
+        if unit_id not in self.slots:
+            if len(self.slots) == len(self.state.count):
+                self._grow()
+            self.slots[unit_id] = len(self.slots)
+        return self.slots[unit_id]
+
+    def _grow(self):
+        old = self.state
+        new = self._new_state(2 * len(old.count))
+        n = len(old.count)
+        for name in ["history", "count", "ewma"]:
+            getattr(new, name)[:n] = getattr(old, name)
+        for name in ["s", "s2", "skx"]:
+            getattr(new, name)[:, :n] = getattr(old, name)
+        self.state = new
+
+    def transform(self, unit_ids, X_base: np.ndarray) -> np.ndarray:
+        """Update state per baris (urut kedatangan) dan kembalikan fitur lengkap untuk model."""
+        X_base = np.asarray(X_base, dtype=np.float64)
+        if not self.fc["enabled"]:
+            return X_base
+        feats = np.empty((len(X_base), self.n_out))
+        for i, unit_id in enumerate(unit_ids):
+            slot = np.array([self._slot(int(unit_id))])
+            feats[i] = self.state.update(X_base[i:i + 1, self.base_idx], slot)[0]
+        return np.hstack([X_base, feats])
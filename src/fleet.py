@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from inference import predict_heads
+from features import RollingFeatureState, feature_config
+
+# --- FLEET SIMULATOR ---
+# Semua unit streaming maju bersama (1 tick = 1 cycle untuk setiap unit),
+# dan cycle saat ini dari SEMUA unit di-scoring dalam SATU panggilan model.
+
+class FleetSimulator:
+    """
+    State simulasi multi-engine.
+
+    Data di-index sekali per unit (offset baris), lalu setiap tick hanya mengambil
+    1 baris per unit yang masih aktif. Riwayat risiko disimpan di matriks
+    (n_unit x window) untuk heatmap, jadi memori tetap walaupun simulasi panjang.
+    """
+
+    def __init__(self, df: pd.DataFrame, features: list, window: int = 60, cfg: dict = None, regimes=None):
+        df = df.sort_values(['unit_number', 'time_in_cycles'], kind='stable')
+        self.features = features
+        self.X = df[features].to_numpy(dtype=np.float64)
+        if regimes is not None:
+            # Normalisasi regime sekali untuk seluruh data, tick tidak menambah biaya
+            self.X = regimes.transform(self.X, features)
+        self.cycles = df['time_in_cycles'].to_numpy()
+
+        units, starts, counts = np.unique(df['unit_number'].to_numpy(), return_index=True, return_counts=True)
+        self.units = units
+        self.starts = starts
+        self.lengths = counts
+        self.window = window
+
+        # Fitur rolling online: 1 stream state per unit, di-update sekali per tick
+        self.fc = feature_config(cfg) if cfg is not None else {"enabled": False}
+        if self.fc["enabled"]:
+            self.base_idx = [features.index(c) for c in self.fc["columns"]]
+        self.reset()
+
+    def reset(self):
+        n = len(self.units)
+        self.tick = 0
+        self.last_cycle = np.zeros(n, dtype=int)
+        self.last_pred = np.zeros(n, dtype=int)
+        self.last_prob = np.full(n, np.nan)
+        self.last_rul = np.full(n, np.nan)
+        # Riwayat probabilitas per unit (kolom terakhir = tick terbaru)
+        self.risk_history = np.full((n, self.window), np.nan)
+        if self.fc["enabled"]:
+            self.feature_state = RollingFeatureState(n, len(self.fc["columns"]),
+                                                     self.fc["windows"], self.fc["ewma_alpha"])
+
+    @property
+    def active(self) -> np.ndarray:
+        """Mask unit yang masih punya data di tick saat ini."""
+        return self.tick < self.lengths
+
+    @property
+    def finished(self) -> bool:
+        return not self.active.any()
+
+    def step(self, model=None, scaler=None, monitor=None, rul_model=None, registry=None):
+        """
+        Majukan semua unit 1 cycle dan scoring dalam 1 batch (`monitor` = DriftMonitor opsional).
+        `rul_model` (opsional) memprediksi sisa cycle dari matriks input yang sama.
+        `registry` (ModelRegistry) menggantikan model/scaler/rul_model: primary + shadow, dan
+        keduanya langsung dicatat ke prediction_logs.
+        Return (unit_ids, cycles, preds, probs) untuk unit yang aktif di tick ini.
+        """
+        active = self.active
+        rows = self.starts[active] + self.tick
+        X = self.X[rows]
+        if self.fc["enabled"]:
+            feats = self.feature_state.update(X[:, self.base_idx], np.flatnonzero(active))
+            X = np.hstack([X, feats])
+        if registry is not None:
+            pred, prob, rul = registry.score(X, self.units[active], self.cycles[rows], monitor)
+        else:
+            pred, prob, rul = predict_heads(model, scaler, X, rul_model, monitor)
+
+        self.last_cycle[active] = self.cycles[rows]
+        self.last_pred[active] = pred
+        self.last_prob[active] = prob
+        if rul is not None:
+            self.last_rul[active] = rul
+
+        # Geser window heatmap 1 kolom; unit yang sudah selesai diisi NaN
+        self.risk_history[:, :-1] = self.risk_history[:, 1:]
+        self.risk_history[:, -1] = np.nan
+        self.risk_history[active, -1] = prob
+
+        self.tick += 1
+        return self.units[active], self.cycles[rows], pred, prob
+
+    def risk_table(self) -> pd.DataFrame:
+        """Tabel status terakhir setiap unit, diurutkan dari risiko tertinggi."""
+        table = pd.DataFrame({
+            "Unit": self.units,
+            "Cycle": self.last_cycle,
+            "Status": np.where(self.last_pred == 1, "CRITICAL", "NORMAL"),
+            "Risk Prob": self.last_prob,
+            "Aktif": self.active,
+        })
+        if not np.isnan(self.last_rul).all():
+            table.insert(4, "Pred RUL", self.last_rul)
+        return table.sort_values("Risk Prob", ascending=False, na_position="last").reset_index(drop=True)
@@ -0,0 +1,273 @@
+import json
+import numpy as np
+from pathlib import Path
+
+# --- EXPORT RANDOM FOREST KE ARRAY NUMPY ---
+# Semua pohon di-flatten ke array contiguous (feature, threshold, children, leaf value)
+# lalu disimpan sebagai file .npy yang bisa di-mmap. Beberapa worker/proses cukup
+# berbagi 1 salinan model di page cache, dan load tidak perlu unpickle ratusan objek Tree.
+
+FOREST_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots"]
+
+def is_regressor(model) -> bool:
+    # RandomForestRegressor tidak punya classes_
+    return not hasattr(model, "classes_")
+
+def forest_meta(model) -> dict:
+    regression = is_regressor(model)
+    return {
+        "task": "regression" if regression else "classification",
+        "classes": None if regression else np.asarray(model.classes_).tolist(),
+        "n_features": int(model.n_features_in_),
+        "max_depth": int(max(est.tree_.max_depth for est in model.estimators_)),
+    }
+
+def flatten_forest(model) -> dict:
+    """
+    Gabungkan seluruh tree_ di forest menjadi array global.
+    Node daun ditandai dengan left = right = node itu sendiri.
+    Classifier: value = probabilitas kelas per node. Regressor: value = rata-rata target (1 kolom).
+    """
+    regression = is_regressor(model)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        node_ids = np.arange(n, dtype=np.int32)
+        is_leaf = tree.children_left == -1
+
+        left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+        right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        if not regression:
+            # Probabilitas kelas per node (dinormalisasi seperti DecisionTree.predict_proba)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0] = 1.0
+            value = value / normalizer
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(left)
+        rights.append(right)
+        values.append(value)
+        roots.append(offset)
+        offset += n
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+
+# --- FUSI MINMAXSCALER KE THRESHOLD ---
+# Di jalur lama, split dievaluasi sebagai: float32(x * scale_ + min_) <= threshold.
+# Fungsi itu monoton naik terhadap x, jadi selalu ada satu batas t_raw (float64) dengan
+#   float32(x * scale_ + min_) <= threshold  <=>  x <= t_raw
+# t_raw dicari dengan binary search pada urutan bit float64 sehingga hasilnya identik,
+# bukan sekadar perkiraan (threshold - min_) / scale_.
+
+def _float_to_key(x: np.ndarray) -> np.ndarray:
+    # Urutan integer yang sama dengan urutan nilai float64
+    bits = x.view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)))
+
+def _key_to_float(k: np.ndarray) -> np.ndarray:
+    bits = np.where(k >= 0, k, (-k) | np.int64(-0x8000000000000000))
+    return bits.view(np.float64)
+
+def fuse_thresholds(feature, threshold, is_leaf, scaler) -> np.ndarray:
+    """Ubah threshold (ruang hasil scaling) menjadi threshold dalam satuan sensor asli."""
+    fused = np.array(threshold, dtype=np.float64)
+    idx = np.flatnonzero(~is_leaf)
+    thr = fused[idx]
+    scale = scaler.scale_[feature[idx]]
+    offset = scaler.min_[feature[idx]]
+
+    def passes(k):
+        # Replika MinMaxScaler.transform + cast float32 di tree sklearn
+        x = _key_to_float(k)
+        return ((x * scale) + offset).astype(np.float32) <= thr
+
+    # 1. Tebakan awal, lalu cari bracket [lo lolos, hi tidak lolos]
+    k0 = _float_to_key((thr - offset) / scale)
+    ok0 = passes(k0)
+    lo = np.where(ok0, k0, k0 - 1)
+    hi = np.where(ok0, k0 + 1, k0)
+    for i in range(62):
+        lo_ok, hi_ok = passes(lo), passes(hi)
+        if lo_ok.all() and not hi_ok.any():
+            break
+        step = np.int64(1) << np.int64(i + 1)
+        lo = np.where(lo_ok, lo, lo - step)
+        hi = np.where(hi_ok, hi + step, hi)
+
+    # 2. Binary search sampai lo dan hi bersebelahan
+    while True:
+        gap = hi - lo
+        if (gap <= 1).all():
+            break
+        mid = lo + gap // 2
+        mid_ok = passes(mid)
+        lo = np.where(mid_ok & (gap > 1), mid, lo)
+        hi = np.where(~mid_ok & (gap > 1), mid, hi)
+
+    fused[idx] = _key_to_float(lo)
+    return fused
+
+def export_forest(model, path: Path, scaler=None) -> Path:
+    """
+    Simpan forest hasil training sebagai folder array .npy + meta.json.
+    Jika `scaler` diberikan, threshold ditulis ulang ke satuan sensor asli (model fused),
+    sehingga serving tidak perlu scaler.transform lagi.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    arrays = flatten_forest(model)
+    if scaler is not None:
+        is_leaf = arrays["left"] == np.arange(len(arrays["left"]))
+        arrays["threshold"] = fuse_thresholds(arrays["feature"], arrays["threshold"], is_leaf, scaler)
+    for name, arr in arrays.items():
+        np.save(path / f"{name}.npy", arr)
+
+    meta = {
+        **forest_meta(model),
+        "n_trees": len(model.estimators_),
+        "n_nodes": int(len(arrays["feature"])),
+        # Data mentah dibandingkan dalam float64, data hasil scaling dalam float32 (seperti sklearn)
+        "input_space": "raw" if scaler is not None else "scaled",
+        "input_dtype": "float64" if scaler is not None else "float32",
+    }
+    if scaler is not None and hasattr(scaler, "feature_names_in_"):
+        meta["features"] = scaler.feature_names_in_.tolist()
+    with (path / "meta.json").open("w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+class FlatForest:
+    """
+    Prediktor vektorisasi untuk forest yang sudah di-flatten.
+    Semua pohon ditelusuri bersamaan untuk seluruh batch: setiap iterasi
+    memajukan semua pasangan (tree, baris) yang belum sampai daun satu level ke bawah.
+
+    Interface sama dengan RandomForestClassifier (classes_, predict, predict_proba),
+    jadi bisa langsung dipakai inference.predict_batch. Forest regresi (task = "regression")
+    hanya punya predict (rata-rata nilai daun semua pohon, sama dengan RandomForestRegressor).
+    """
+
+    def __init__(self, arrays: dict, meta: dict, batch_rows: int = 4096):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = np.asarray(arrays["roots"])
+        self.meta = meta
+        self.task = meta.get("task", "classification")
+        self.classes_ = None if self.task == "regression" else np.asarray(meta["classes"])
+        self.n_features_in_ = meta["n_features"]
+        self.max_depth = meta["max_depth"]
+        self.input_dtype = np.dtype(meta.get("input_dtype", "float32"))
+        self.batch_rows = batch_rows
+        self.is_leaf = self.left == np.arange(len(self.left), dtype=self.left.dtype)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True):
+        path = Path(path)
+        with (path / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in FOREST_ARRAYS}
+        return cls(arrays, meta)
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(flatten_forest(model), forest_meta(model))
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        # sklearn membandingkan fitur dalam float32, threshold dalam float64
+        # (model fused: data mentah dibandingkan langsung dalam float64)
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        n_rows, n_features = X.shape
+        if n_features != self.n_features_in_:
+            raise ValueError(f"Model butuh {self.n_features_in_} fitur, input punya {n_features}")
+        X_flat = X.ravel()
+
+        # Posisi node untuk setiap pasangan (tree, baris), disimpan rata 1D
+        node = np.repeat(self.roots, n_rows)
+        row_offset = np.tile(np.arange(n_rows) * n_features, len(self.roots))
+
+        # Hanya pasangan yang belum sampai daun yang diproses di iterasi berikutnya
+        active = np.flatnonzero(~self.is_leaf[node])
+        while len(active):
+            nd = node[active]
+            go_left = X_flat[row_offset[active] + self.feature[nd]] <= self.threshold[nd]
+            nd = np.where(go_left, self.left[nd], self.right[nd])
+            node[active] = nd
+            active = active[~self.is_leaf[nd]]
+        return node.reshape(len(self.roots), n_rows)
+
+    def _mean_value(self, X) -> np.ndarray:
+        X = np.asarray(X)
+        out = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        # Diproses per potongan agar memori (n_trees x n_rows) tetap terbatas
+        for start in range(0, len(X), self.batch_rows):
+            leaves = self._leaves(X[start:start + self.batch_rows])
+            out[start:start + len(leaves[0])] = self.value[leaves].mean(axis=0)
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.task == "regression":
+            raise AttributeError("Forest regresi tidak punya predict_proba")
+        return self._mean_value(X)
+
+    def predict(self, X) -> np.ndarray:
+        if self.task == "regression":
+            return self._mean_value(X)[:, 0]
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+def verify_fused(fused: FlatForest, unfused: FlatForest, scaler, X_raw) -> int:
+    """
+    Bandingkan prediksi model fused (input mentah) dengan jalur lama (scaler + forest).
+    Return jumlah baris yang daunnya berbeda (harus 0).
+    """
+    X_raw = np.asarray(X_raw, dtype=np.float64)
+    leaves_fused = fused._leaves(X_raw)
+    leaves_unfused = unfused._leaves(scaler.transform(X_raw))
+    return int((leaves_fused != leaves_unfused).any(axis=0).sum())
+
+def load_serving_model(model_dir: Path):
+    """
+    Load pasangan (model, scaler) untuk serving.
+    Model fused tidak butuh scaler (return scaler = None), jadi tidak mungkin
+    tertukar dengan scaler.pkl dari versi lain.
+    """
+    model_dir = Path(model_dir)
+    if (model_dir / "forest_fused" / "meta.json").exists():
+        return FlatForest.load(model_dir / "forest_fused"), None
+    import joblib  # Hanya jalur fallback: unpickle scaler ikut memuat sklearn (lambat saat start)
+    return load_model(model_dir), joblib.load(model_dir / "scaler.pkl")
+
+def load_rul_model(model_dir: Path, scaler=None):
+    """
+    Load forest regresi RUL pasangan model klasifikasi yang sedang di-serve, None jika belum dilatih.
+    scaler = None (klasifikasi fused) -> rul_forest_fused, input data mentah yang sama;
+    selain itu rul_forest, input hasil scaler yang sama. Jadi 1 matriks input dipakai 2 head.
+    """
+    path = Path(model_dir) / ("rul_forest_fused" if scaler is None else "rul_forest")
+    return FlatForest.load(path) if (path / "meta.json").exists() else None
+
+def load_model(model_dir: Path):
+    """
+    Load model untuk serving: pakai forest hasil export (mmap) jika ada,
+    fallback ke best_model.pkl.
+    """
+    model_dir = Path(model_dir)
+    if (model_dir / "forest" / "meta.json").exists():
+        return FlatForest.load(model_dir / "forest")
+    import joblib
+    return joblib.load(model_dir / "best_model.pkl")
@@ -0,0 +1,210 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from db_logger import DRIFT_COLUMNS
+
+# --- QUERY HISTORY PREDIKSI (inference_logs.db) ---
+# Lapisan baca untuk prediction_logs tanpa memuat seluruh tabel:
+#   - page()   : keyset pagination per unit & rentang waktu, biaya per halaman tetap walau
+#                tabel berisi jutaan baris (tanpa OFFSET)
+#   - hourly() : ringkasan per unit per jam dari prediction_rollup_hourly (dijaga db_logger)
+#   - series() : deret probabilitas 1 unit, di-downsample MinMaxLTTB sebelum dikirim ke Plotly
+#   - drift_alerts() : alert drift input terbaru (ditulis DriftMonitor lewat db_logger)
+#   - versions() : jumlah prediksi & latency rata-rata per versi model dan role (primary/shadow)
+#
+# Urutan id hanya HAMPIR sama dengan urutan timestamp: timestamp diambil di thread pemanggil
+# (primary vs callback shadow, dashboard vs serve.py) sebelum masuk antrian writer, jadi di sekitar
+# pergantian detik baris bisa tertulis tidak berurutan. Rentang waktu diterjemahkan sekali ke
+# rentang id yang dilebarkan EDGE_SLACK_S (index timestamp), lalu filter timestamp yang persis
+# memotong baris di tepi. Query per unit tetap memakai index unit_id yang sudah ada (isinya
+# (unit_id, id)), tanpa index tambahan di jalur tulis.
+
+EDGE_SLACK_S = 60   # Selisih maksimum timestamp vs urutan tulis yang masih ditoleransi (detik)
+
+LOG_COLUMNS = ["id", "timestamp", "unit_id", "cycle", "prediction", "probability", "status",
+               "model_version", "role", "latency_ms"]
+
+# --- DOWNSAMPLING ---
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: index `n_out` titik yang paling menjaga bentuk kurva.
+    Titik pertama & terakhir selalu ikut.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Batas bucket untuk titik di antara titik pertama & terakhir
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Titik pembanding = rata-rata bucket berikutnya (atau titik terakhir)
+        nxt_start, nxt_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        nxt_x = x[nxt_start:nxt_stop].mean() if nxt_stop > nxt_start else x[-1]
+        nxt_y = y[nxt_start:nxt_stop].mean() if nxt_stop > nxt_start else y[-1]
+        area = np.abs((x[prev] - nxt_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (nxt_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        out[i + 1] = prev
+    return out
+
+def minmax_lttb(x: np.ndarray, y: np.ndarray, n_out: int, ratio: int = 4) -> np.ndarray:
+    """
+    MinMaxLTTB: pilih kandidat min & max per bucket (n_out * ratio titik), lalu LTTB di kandidat.
+    Jauh lebih cepat dari LTTB penuh untuk deret panjang dan lonjakan (spike) tidak hilang.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    n_buckets = min(n // 2, n_out * ratio // 2)
+    if n_buckets <= n_out:
+        return lttb(x, y, n_out)
+    # Kandidat: titik pertama/terakhir + argmin/argmax tiap bucket
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    y = np.asarray(y, dtype=np.float64)
+    starts = edges[:-1]
+    mins = np.minimum.reduceat(y[1:n - 1], starts - 1)
+    maxs = np.maximum.reduceat(y[1:n - 1], starts - 1)
+    bucket = np.searchsorted(edges, np.arange(1, n - 1), side="right") - 1
+    is_min = y[1:n - 1] == mins[bucket]
+    is_max = y[1:n - 1] == maxs[bucket]
+    # Ambil kemunculan pertama min & max per bucket
+    candidates = set()
+    for mask in (is_min, is_max):
+        idx = np.flatnonzero(mask)
+        _, first = np.unique(bucket[idx], return_index=True)
+        candidates.update((idx[first] + 1).tolist())
+    idx = np.array(sorted(candidates | {0, n - 1}), dtype=np.int64)
+    return idx[lttb(np.asarray(x)[idx], y[idx], n_out)]
+
+# --- QUERY ---
+
+class HistoryStore:
+    """Koneksi baca ke inference_logs.db (WAL: tidak terblokir writer PredictionLogger)."""
+
+    def __init__(self, db_path="inference_logs.db"):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _filters(unit_id=None, start=None, end=None, time_col="timestamp") -> tuple:
+        clauses, params = [], []
+        if unit_id is not None:
+            clauses.append("unit_id = ?")
+            params.append(int(unit_id))
+        if start is not None:
+            clauses.append(f"{time_col} >= ?")
+            params.append(str(start))
+        if end is not None:
+            clauses.append(f"{time_col} < ?")
+            params.append(str(end))
+        return clauses, params
+
+    def _first_id_at(self, timestamp):
+        """id log pertama dengan timestamp >= `timestamp` (lewat index timestamp), None jika tidak ada."""
+        row = self.conn.execute("SELECT id FROM prediction_logs WHERE timestamp >= ? ORDER BY timestamp, id LIMIT 1",
+                                (str(timestamp),)).fetchone()
+        return None if row is None else row[0]
+
+    def _id_filters(self, unit_id=None, start=None, end=None) -> tuple:
+        """Filter unit + rentang waktu: rentang id (dilebarkan) + filter timestamp persis (lihat catatan di atas)."""
+        clauses, params = self._filters(unit_id)
+        slack = pd.Timedelta(seconds=EDGE_SLACK_S)
+        # "+timestamp": filter tepi dievaluasi per baris di rentang id, bukan lewat index timestamp
+        if start is not None:
+            lo = self._first_id_at((pd.Timestamp(start) - slack).strftime("%Y-%m-%d %H:%M:%S"))
+            # Tidak ada log sejak `start` - slack -> hasil kosong
+            clauses += ["id >= ?", "+timestamp >= ?"] if lo is not None else ["id < 0"]
+            params += [lo, str(start)] if lo is not None else []
+        if end is not None:
+            hi = self._first_id_at((pd.Timestamp(end) + slack).strftime("%Y-%m-%d %H:%M:%S"))
+            clauses.append("+timestamp < ?")
+            params.append(str(end))
+            if hi is not None:
+                clauses.append("id < ?")
+                params.append(hi)
+        return clauses, params
+
+    def units(self) -> list:
+        return [r[0] for r in self.conn.execute("SELECT DISTINCT unit_id FROM prediction_rollup_hourly ORDER BY 1")]
+
+    def time_range(self) -> tuple:
+        """(jam pertama, jam terakhir) yang ada di rollup, atau (None, None) jika kosong."""
+        # 2 query terpisah: SQLite hanya memakai index untuk MIN/MAX tunggal
+        first = self.conn.execute("SELECT MIN(hour) FROM prediction_rollup_hourly").fetchone()[0]
+        last = self.conn.execute("SELECT MAX(hour) FROM prediction_rollup_hourly").fetchone()[0]
+        return first, last
+
+    def page(self, unit_id=None, start=None, end=None, after=None, limit: int = 200,
+             descending: bool = True) -> tuple:
+        """
+        1 halaman log (urut id = urut waktu). `after` = cursor (id terakhir) dari halaman sebelumnya.
+        Return (DataFrame, cursor berikutnya atau None jika sudah habis).
+        """
+        clauses, params = self._id_filters(unit_id, start, end)
+        if after is not None:
+            clauses.append("id < ?" if descending else "id > ?")
+            params.append(int(after))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if descending else "ASC"
+        sql = f"SELECT {', '.join(LOG_COLUMNS)} FROM prediction_logs {where} ORDER BY id {order} LIMIT ?"
+        rows = self.conn.execute(sql, params + [limit + 1]).fetchall()
+        more = len(rows) > limit
+        df = pd.DataFrame(rows[:limit], columns=LOG_COLUMNS)
+        cursor = int(df["id"].iloc[-1]) if more else None
+        return df, cursor
+
+    def hourly(self, unit_id=None, start=None, end=None) -> pd.DataFrame:
+        """
+        Ringkasan per jam dari tabel rollup (tidak menyentuh prediction_logs).
+        unit_id = None -> digabung untuk semua unit.
+        """
+        clauses, params = self._filters(unit_id, start, end, time_col="hour")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (f"SELECT hour, SUM(n), SUM(n_critical), SUM(sum_prob) / SUM(n), MIN(min_prob), MAX(max_prob), "
+               f"COUNT(DISTINCT unit_id) FROM prediction_rollup_hourly {where} GROUP BY hour ORDER BY hour")
+        df = pd.DataFrame(self.conn.execute(sql, params).fetchall(),
+                          columns=["hour", "n", "n_critical", "mean_prob", "min_prob", "max_prob", "n_units"])
+        df["hour"] = pd.to_datetime(df["hour"])
+        return df
+
+    def series(self, unit_id, start=None, end=None, max_points: int = 1000, ratio: int = 4) -> pd.DataFrame:
+        """
+        Deret probabilitas primary 1 unit (timestamp, cycle, probability), di-downsample ke
+        maksimal `max_points` titik. Hanya 3 kolom yang dibaca, urut index (unit_id, id).
+        """
+        clauses, params = self._id_filters(unit_id, start, end)
+        clauses.append("role = 'primary'")
+        sql = (f"SELECT timestamp, cycle, probability FROM prediction_logs WHERE {' AND '.join(clauses)} "
+               f"ORDER BY id")
+        df = pd.DataFrame(self.conn.execute(sql, params).fetchall(), columns=["timestamp", "cycle", "probability"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        if len(df) <= max_points:
+            return df
+        # Sumbu x = urutan record (banyak record bisa punya timestamp yang sama per detik)
+        idx = minmax_lttb(np.arange(len(df)), df["probability"].to_numpy(), max_points, ratio)
+        return df.iloc[idx].reset_index(drop=True)
+
+    def drift_alerts(self, limit: int = 100) -> pd.DataFrame:
+        """Alert drift terbaru dulu (tabel kecil: maksimal 1 baris per fitur per window)."""
+        sql = f"SELECT {', '.join(DRIFT_COLUMNS)} FROM drift_alerts ORDER BY id DESC LIMIT ?"
+        return pd.DataFrame(self.conn.execute(sql, (limit,)).fetchall(), columns=DRIFT_COLUMNS)
+
+    def versions(self, start=None, end=None) -> pd.DataFrame:
+        """Per (versi, role): jumlah prediksi, rasio CRITICAL, rata-rata probabilitas & latency batch (ms)."""
+        clauses, params = self._id_filters(None, start, end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (f"SELECT model_version, role, COUNT(*), AVG(prediction), AVG(probability), AVG(latency_ms), "
+               f"MAX(latency_ms) FROM prediction_logs {where} GROUP BY 1, 2 ORDER BY 1, 2")
+        return pd.DataFrame(self.conn.execute(sql, params).fetchall(),
+                            columns=["model_version", "role", "n", "critical_rate", "mean_prob",
+                                     "mean_latency_ms", "max_latency_ms"])
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from metrics import REGISTRY as metrics
+
+# --- INFERENCE ENGINE (BATCH) ---
+# Semua scoring (dashboard, service, benchmark) lewat modul ini supaya
+# scaler + model dipanggil SEKALI untuk banyak baris, bukan per baris.
+
+def predict_batch(model, scaler, X, monitor=None):
+    """
+    Scoring banyak baris sekaligus.
+    Scaling dilakukan sekali, lalu predict_proba dipanggil sekali saja.
+    Kelas diambil dari argmax probabilitas (sama persis dengan model.predict),
+    jadi forest tidak perlu ditelusuri dua kali.
+    `monitor` (DriftMonitor, opsional) di-update dengan input batch yang sama, sebelum scaling.
+
+    Return: (pred, prob) -> array label dan array probabilitas kelas 1 (CRITICAL).
+    """
+    pred, prob, _ = predict_heads(model, scaler, X, monitor=monitor)
+    return pred, prob
+
+def predict_heads(model, scaler, X, rul_model=None, monitor=None):
+    """
+    Seperti predict_batch, plus head regresi RUL (`rul_model`, opsional) yang membaca
+    matriks input yang SAMA dengan classifier (hasil 1x scaler.transform, atau data mentah
+    untuk pasangan model fused), jadi tidak ada transform tambahan.
+
+    Return: (pred, prob, rul) -> rul = prediksi sisa cycle, None jika rul_model tidak ada.
+    """
+    update_monitor(monitor, X)
+    X_in = transform_input(scaler, X)
+    pred, prob = classify(model, X_in)
+    return pred, prob, predict_rul(rul_model, X_in)
+
+def update_monitor(monitor, X):
+    """Update DriftMonitor (jika ada) dengan input batch sebelum scaling."""
+    if monitor is None:
+        return
+    # Drift hanya observasi: error di monitor tidak boleh menggagalkan scoring
+    try:
+        monitor.update(X)
+    except Exception as e:
+        metrics.inc("drift_errors")
+        print(f"⚠️ Drift monitor gagal di-update: {e}")
+
+def transform_input(scaler, X):
+    """Matriks input model: 1x scaler.transform, atau data mentah untuk model fused (scaler None)."""
+    if scaler is not None:
+        # Scaling selalu dalam float64 (data kolumnar disimpan float32), sama seperti saat training
+        with metrics.timer("scaler_transform"):
+            X = X.astype(np.float64) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float64)
+            return scaler.transform(X)
+    # Model fused: threshold sudah dalam satuan sensor asli, tidak perlu transform
+    return X.to_numpy() if isinstance(X, pd.DataFrame) else X
+
+def classify(model, X_in) -> tuple:
+    """(pred, prob) dari 1x predict_proba pada input yang sudah di-transform."""
+    with metrics.timer("predict_proba"):
+        proba = model.predict_proba(X_in)
+    metrics.inc("predicted_rows", len(proba))
+    classes = np.asarray(model.classes_)
+    pred = classes[proba.argmax(axis=1)]
+
+    # Ambil kolom probabilitas kelas 1 (Bahaya)
+    pos_idx = np.flatnonzero(classes == 1)
+    prob = proba[:, pos_idx[0]] if len(pos_idx) else np.zeros(len(proba))
+    return pred, prob
+
+def predict_rul(rul_model, X_in):
+    """Prediksi sisa cycle dari input yang sama dengan classifier, None jika head RUL tidak ada."""
+    if rul_model is None:
+        return None
+    with metrics.timer("predict_rul"):
+        return rul_model.predict(X_in)
+
+def score_frame(df: pd.DataFrame, features: list, model, scaler, rul_model=None) -> pd.DataFrame:
+    """
+    Scoring seluruh baris DataFrame (misal 1 unit mesin penuh / cycle yang masih pending).
+    Hasil berupa DataFrame dengan index yang sama: kolom 'prediction' dan 'probability'
+    (+ 'rul' jika rul_model diberikan).
+    """
+    if df.empty:
+        empty = {"prediction": [], "probability": []}
+        return pd.DataFrame({**empty, "rul": []} if rul_model is not None else empty, index=df.index)
+    # Array NumPy seperti predict_batch: scaler di-fit tanpa nama fitur (tidak ada UserWarning sklearn)
+    pred, prob, rul = predict_heads(model, scaler, df[features].to_numpy(dtype=np.float64), rul_model)
+    scores = pd.DataFrame({"prediction": pred.astype(int), "probability": prob}, index=df.index)
+    if rul is not None:
+        scores["rul"] = rul
+    return scores
@@ -0,0 +1,78 @@
+import argparse
+import json
+import time
+import urllib.request
+import numpy as np
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from data_store import load_table
+
+# --- KONFIGURASI ---
+CONFIG_PATH = Path("configs/data.yaml")
+DEFAULT_REQUESTS = Path("data/processed/requests.jsonl")
+
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def generate_requests(cfg: dict, output: Path, rows_per_request: int = 1):
+    """
+    Buat file requests.jsonl dari data streaming_source.
+    Setiap baris file = 1 body request POST /predict.
+    """
+    # unit_number ikut dikirim (dibutuhkan server jika fitur rolling aktif)
+    columns = ["unit_number"] + cfg["selected_features"]
+    df = load_table(Path(cfg["output_dir"]), "streaming_source", columns=columns)
+    records = df[columns].to_dict(orient="records")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as f:
+        for i in range(0, len(records), rows_per_request):
+            f.write(json.dumps({"rows": records[i:i + rows_per_request]}) + "\n")
+    print(f"✅ {output} dibuat dari {len(records)} baris sensor")
+
+def send(url: str, body: bytes) -> float:
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+def run_load_test(url: str, requests_path: Path, concurrency: int, limit: int = None):
+    with requests_path.open("r", encoding="utf-8") as f:
+        bodies = [line.strip().encode("utf-8") for line in f if line.strip()]
+    if limit:
+        bodies = bodies[:limit]
+
+    print(f"🚀 Replay {len(bodies)} request ke {url} (concurrency={concurrency})...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(lambda b: send(url, b), bodies)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    print(f"   Total waktu : {elapsed:.2f} s")
+    print(f"   Throughput  : {len(bodies) / elapsed:.1f} req/s")
+    print(f"   Latency     : p50 {p50:.2f} ms | p95 {p95:.2f} ms | p99 {p99:.2f} ms")
+
+def main():
+    cfg = load_config(CONFIG_PATH)
+    serve_cfg = cfg.get("serving", {})
+    default_url = f"http://127.0.0.1:{serve_cfg.get('port', 8000)}/predict"
+
+    parser = argparse.ArgumentParser(description="Load test untuk serve.py (replay requests.jsonl)")
+    parser.add_argument("--url", default=default_url)
+    parser.add_argument("--requests", type=Path, default=DEFAULT_REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--generate", action="store_true", help="Buat ulang requests.jsonl dari streaming_source.csv")
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.generate or not args.requests.exists():
+        generate_requests(cfg, args.requests, args.rows_per_request)
+    run_load_test(args.url, args.requests, args.concurrency, args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import bisect
+import gc
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- METRIK HOT PATH (TIMER + COUNTER) ---
+# Timer per stage (scaler, predict_proba, render chart, commit SQLite, sleep, ...) dicatat ke
+# histogram di memori. Biaya per observasi hanya perf_counter + update list (tanpa numpy),
+# jadi aman dipasang di jalur per tick. Data bisa diekspor dalam format teks Prometheus
+# (endpoint /metrics atau file untuk textfile collector) dan dilihat di panel dashboard.
+
+# Batas bucket histogram (detik), format Prometheus: bucket le=b berisi observasi <= b
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    """Bucket kumulatif ala Prometheus + ring buffer `window` observasi terakhir untuk persentil."""
+
+    def __init__(self, window: int = 1024):
+        self.buckets = [0] * (len(BUCKETS) + 1)   # Slot terakhir = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = [0.0] * window
+        self._next = 0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent[self._next] = seconds
+        self._next = (self._next + 1) % len(self.recent)
+
+    def window_values(self) -> np.ndarray:
+        return np.asarray(self.recent[:min(self.count, len(self.recent))])
+
+class _Timer:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+
+class MetricsRegistry:
+    """Kumpulan histogram (durasi per stage) dan counter, aman dipakai dari beberapa thread."""
+
+    def __init__(self, window: int = 1024, prefix: str = "pm"):
+        self.window = window
+        self.prefix = prefix
+        self.started = time.time()
+        self._hist = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+
+    def timer(self, name: str) -> _Timer:
+        """`with REGISTRY.timer("predict_proba"): ...` -> durasi blok dicatat ke histogram `name`."""
+        return _Timer(self, name)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            hist = self._hist.get(name)
+            if hist is None:
+                hist = self._hist[name] = Histogram(self.window)
+            hist.observe(seconds)
+
+    def inc(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def snapshot(self) -> pd.DataFrame:
+        """Ringkasan per stage: jumlah, total waktu, share, dan p50/p95/p99 (window terakhir, ms)."""
+        with self._lock:
+            items = [(name, h.count, h.sum, h.window_values()) for name, h in self._hist.items()]
+        rows = []
+        for name, count, total, recent in items:
+            p50, p95, p99 = np.percentile(recent * 1000, [50, 95, 99]) if len(recent) else (np.nan,) * 3
+            rows.append({"Stage": name, "Count": count, "Total (s)": total,
+                         "p50 (ms)": p50, "p95 (ms)": p95, "p99 (ms)": p99})
+        table = pd.DataFrame(rows, columns=["Stage", "Count", "Total (s)", "p50 (ms)", "p95 (ms)", "p99 (ms)"])
+        total = table["Total (s)"].sum()
+        table.insert(3, "Share", table["Total (s)"] / total if total else 0.0)
+        return table.sort_values("Total (s)", ascending=False).reset_index(drop=True)
+
+    def to_prometheus(self) -> str:
+        """Export dalam format teks Prometheus (exposition format 0.0.4)."""
+        with self._lock:
+            hists = {name: (list(h.buckets), h.count, h.sum) for name, h in self._hist.items()}
+            counters = dict(self._counters)
+
+        p = self.prefix
+        lines = [f"# HELP {p}_stage_seconds Durasi per stage hot path.",
+                 f"# TYPE {p}_stage_seconds histogram"]
+        for name, (buckets, count, total) in sorted(hists.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {total!r}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {count}')
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+        lines += [f"# TYPE {p}_start_time_seconds gauge", f"{p}_start_time_seconds {self.started!r}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        """Tulis file .prom secara atomik (aman dibaca textfile collector kapan saja)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        tmp.replace(path)
+
+    def maybe_write(self, path: Path, interval: float) -> bool:
+        """Tulis file hanya jika sudah `interval` detik sejak penulisan terakhir (dipanggil per tick)."""
+        now = time.perf_counter()
+        if not path or now - self._last_write < interval:
+            return False
+        self._last_write = now
+        self.write(path)
+        return True
+
+# Registry bersama per proses (inference, db_logger, serve, dashboard)
+REGISTRY = MetricsRegistry()
+
+# --- PENGUKURAN BERULANG (benchmark.py & biaya serving saat tuning di train.py) ---
+def time_calls(func, repeats: int, rounds: int) -> list:
+    """Waktu (detik) setiap panggilan func(i), dikelompokkan per putaran. GC dimatikan selama pengukuran."""
+    result = []
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            times = []
+            for i in range(repeats):
+                start = time.perf_counter()
+                func(i)
+                times.append(time.perf_counter() - start)
+            result.append(times)
+    finally:
+        gc.enable()
+    return result
@@ -0,0 +1,265 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import time
+import yaml
+from pathlib import Path
+
+# --- PIPELINE RUNNER + STAGE CACHE ---
+# Menjalankan ingest -> preprocess -> train (+ eda) berurutan. Setiap stage punya
+# fingerprint = hash(kode stage, key config yang relevan, isi file input / artifact upstream).
+# Output stage disimpan di cache content-addressed (1 blob per isi file). Jika fingerprint
+# sudah ada di cache, stage dilewati dan output-nya cukup dipulihkan dari cache.
+#
+# Layout cache:
+#   <cache_dir>/objects/<2 char>/<sha256>   -> isi file
+#   <cache_dir>/manifests/<fingerprint>.json -> {path relatif: sha256} output 1 stage
+
+CONFIG_PATH = Path("configs/data.yaml")
+SRC_DIR = Path(__file__).resolve().parent
+
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def table_path(cfg: dict, name: str) -> Path:
+    # Lokasi tabel antar-stage sesuai storage_format (folder kolumnar atau file CSV)
+    data_dir = Path(cfg["output_dir"])
+    return data_dir / f"{name}.csv" if cfg.get("storage_format", "columnar") == "csv" else data_dir / name
+
+def raw_inputs(cfg: dict) -> list:
+    return [Path(p) for p in (cfg.get("raw_data_paths") or [cfg["raw_data_path"]])]
+
+# Definisi stage: modul & fungsi entry, file kode, key config, input file, dan output.
+# Input sebuah stage = file eksternal + output stage di `deps`.
+STAGES = {
+    "ingest": {
+        "entry": ("data_ingest", "ingest_data"),
+        "code": ["data_ingest.py", "data_store.py"],
+        "config": ["raw_data_path", "raw_data_paths", "output_dir", "storage_format",
+                   "rul_threshold", "test_split_engine_id"],
+        "inputs": raw_inputs,
+        "deps": [],
+        "outputs": lambda cfg: [table_path(cfg, "ingested_train"), table_path(cfg, "streaming_source")],
+    },
+    "eda": {
+        "entry": ("eda", "main"),
+        "code": ["eda.py", "data_store.py"],
+        # Sensor yang diplot = eda.behavior_sensors atau (jika null) sensor di selected_features
+        "config": ["output_dir", "eda", "selected_features"],
+        "inputs": lambda cfg: [],
+        "deps": ["ingest"],
+        "outputs": lambda cfg: [Path(cfg.get("eda", {}).get("output_dir", "reports/figures"))],
+    },
+    "preprocess": {
+        "entry": ("preprocessing", "run_preprocessing"),
+        "code": ["preprocessing.py", "features.py", "regimes.py", "drift.py", "metrics.py", "data_store.py"],
+        "config": ["output_dir", "model_dir", "storage_format", "selected_features",
+                   "feature_engineering", "regimes", "drift"],
+        "inputs": lambda cfg: [],
+        "deps": ["ingest"],
+        "outputs": lambda cfg: [table_path(cfg, "train_final")] + [Path(cfg["model_dir"]) / name
+                                for name in ["scaler.pkl", "regimes.json", "drift_reference.json"]],
+    },
+    "train": {
+        "entry": ("train", "main"),
+        "code": ["train.py", "evaluation.py", "forest_export.py", "metrics.py", "features.py", "regimes.py",
+                 "data_store.py"],
+        "config": ["output_dir", "model_dir", "selected_features", "feature_engineering", "tuning", "rul_model"],
+        "inputs": lambda cfg: [],
+        "deps": ["ingest", "preprocess"],
+        "outputs": lambda cfg: [Path(cfg["model_dir"]) / name
+                                for name in ["best_model.pkl", "forest", "forest_fused", "rul_forest", "rul_forest_fused"]],
+    },
+}
+STAGE_ORDER = ["ingest", "eda", "preprocess", "train"]
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def list_files(paths: list) -> list:
+    """Semua file di bawah `paths` (file atau folder), urut & relatif ke cwd. Path yang tidak ada dilewati."""
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files += sorted(f for f in p.rglob("*") if f.is_file())
+        elif p.is_file():
+            files.append(p)
+    return files
+
+def hash_paths(paths: list) -> dict:
+    return {f.as_posix(): hash_file(f) for f in list_files(paths)}
+
+class StageCache:
+    """
+    Cache content-addressed untuk output stage, dengan eviction LRU berdasarkan ukuran disk.
+    Waktu pakai terakhir = mtime file manifest (di-touch setiap cache hit).
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.objects = self.cache_dir / "objects"
+        self.manifests = self.cache_dir / "manifests"
+        self.max_bytes = max_bytes
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.manifests.mkdir(parents=True, exist_ok=True)
+
+    def _object(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def _manifest(self, fingerprint: str) -> Path:
+        return self.manifests / f"{fingerprint}.json"
+
+    def get(self, fingerprint: str):
+        """Return manifest {path: sha256} jika fingerprint ada di cache (dan tandai baru dipakai)."""
+        path = self._manifest(fingerprint)
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not all(self._object(d).exists() for d in manifest["files"].values()):
+            return None
+        os.utime(path)
+        return manifest
+
+    def put(self, fingerprint: str, stage: str, outputs: dict):
+        """Simpan output stage. File dengan isi sama hanya disimpan sekali."""
+        for rel, digest in outputs.items():
+            obj = self._object(digest)
+            if not obj.exists():
+                obj.parent.mkdir(exist_ok=True)
+                tmp = obj.with_suffix(".tmp")
+                # Disalin (bukan hardlink): stage berikutnya bisa menulis ulang file di tempat
+                shutil.copyfile(rel, tmp)
+                tmp.replace(obj)
+        manifest = {"stage": stage, "created": time.time(), "files": outputs}
+        with self._manifest(fingerprint).open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        self.evict(keep=fingerprint)
+
+    def restore(self, manifest: dict, outputs: list) -> int:
+        """
+        Pulihkan output stage ke workspace. File di lokasi output yang bukan bagian
+        dari manifest (misal regimes.json dari config lain) dihapus.
+        Return jumlah file yang perlu disalin.
+        """
+        for stale in list_files(outputs):
+            if stale.as_posix() not in manifest["files"]:
+                stale.unlink()
+        restored = 0
+        for rel, digest in manifest["files"].items():
+            target = Path(rel)
+            if target.exists() and hash_file(target) == digest:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(self._object(digest), target)
+            restored += 1
+        return restored
+
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.objects.rglob("*") if f.is_file())
+
+    def evict(self, keep: str = None):
+        """Hapus manifest yang paling lama tidak dipakai sampai total ukuran blob <= max_bytes."""
+        manifests = sorted(self.manifests.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        while self.size() > self.max_bytes and manifests:
+            oldest = manifests.pop(0)
+            if oldest.stem == keep:
+                continue
+            oldest.unlink()
+            self._collect_garbage()
+
+    def _collect_garbage(self):
+        # Blob yang tidak direferensikan manifest mana pun ikut dihapus
+        referenced = set()
+        for path in self.manifests.glob("*.json"):
+            with path.open("r", encoding="utf-8") as f:
+                referenced.update(json.load(f)["files"].values())
+        for obj in self.objects.rglob("*"):
+            if obj.is_file() and obj.name not in referenced:
+                obj.unlink()
+
+def stage_fingerprint(name: str, cfg: dict, upstream: dict) -> str:
+    """
+    Hash dari: kode stage, key config stage, isi file input, dan hash output stage upstream.
+    `upstream` = {nama stage: {path: sha256}} untuk stage yang sudah dijalankan / dipulihkan.
+    """
+    stage = STAGES[name]
+    payload = {
+        "stage": name,
+        "code": {f: hash_file(SRC_DIR / f) for f in stage["code"]},
+        "config": {k: cfg.get(k) for k in stage["config"]},
+        "inputs": hash_paths(stage["inputs"](cfg)),
+        "upstream": {dep: upstream[dep] for dep in stage["deps"]},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+def run_stage(name: str):
+    module, func = STAGES[name]["entry"]
+    # Import saat dibutuhkan: stage yang di-skip tidak perlu load mlflow/optuna/matplotlib
+    getattr(importlib.import_module(module), func)()
+
+def run_pipeline(cfg: dict, stages: list = None, force: bool = False, dry_run: bool = False) -> dict:
+    """
+    Jalankan stage berurutan. Stage yang fingerprint-nya ada di cache dilewati.
+    Return {nama stage: "run" | "cached"}.
+    """
+    pipe_cfg = cfg.get("pipeline", {})
+    cache = StageCache(pipe_cfg.get("cache_dir", ".cache/pipeline"),
+                       int(pipe_cfg.get("max_cache_mb", 2048)) * 1024 * 1024)
+    selected = stages or STAGE_ORDER
+    upstream, status = {}, {}
+
+    for name in STAGE_ORDER:
+        if name not in selected:
+            # Stage tidak dipilih: output yang ada di workspace tetap jadi input stage berikutnya
+            upstream[name] = hash_paths(STAGES[name]["outputs"](cfg))
+            continue
+
+        fingerprint = stage_fingerprint(name, cfg, upstream)
+        manifest = None if force else cache.get(fingerprint)
+        if manifest is not None:
+            n = 0 if dry_run else cache.restore(manifest, STAGES[name]["outputs"](cfg))
+            print(f"⏭️  {name}: tidak ada perubahan (cache {fingerprint[:12]}, {n} file dipulihkan)")
+            upstream[name] = manifest["files"]
+            status[name] = "cached"
+            continue
+
+        if dry_run:
+            print(f"▶️  {name}: akan dijalankan (fingerprint {fingerprint[:12]})")
+            status[name] = "run"
+            # Output stage ini belum diketahui -> stage turunannya pasti ikut berubah
+            upstream[name] = {"pending": fingerprint}
+            continue
+
+        print(f"\n▶️  {name}: menjalankan stage...")
+        start = time.perf_counter()
+        run_stage(name)
+        upstream[name] = hash_paths(STAGES[name]["outputs"](cfg))
+        cache.put(fingerprint, name, upstream[name])
+        status[name] = "run"
+        print(f"✅ {name}: selesai dalam {time.perf_counter() - start:.1f} detik (cache {fingerprint[:12]})")
+
+    print(f"\n📦 Ukuran cache: {cache.size() / 1024 / 1024:.1f} MB / {cache.max_bytes / 1024 / 1024:.0f} MB")
+    return status
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan pipeline dengan cache per stage")
+    parser.add_argument("--stages", nargs="+", choices=STAGE_ORDER, help="Hanya stage tertentu (default: semua)")
+    parser.add_argument("--force", action="store_true", help="Abaikan cache, jalankan ulang semua stage terpilih")
+    parser.add_argument("--dry-run", action="store_true", help="Tampilkan stage yang akan dijalankan saja")
+    args = parser.parse_args()
+
+    print("🚀 Memulai Pipeline...")
+    run_pipeline(load_config(CONFIG_PATH), args.stages, force=args.force, dry_run=args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ import yaml
 import joblib
 from pathlib import Path
 from sklearn.preprocessing import MinMaxScaler
+from data_store import load_table, save_table
+from features import add_rolling_features, engineered_columns, model_features
+from regimes import REGIMES_FILE, RegimeNormalizer, regime_config
+from drift import DRIFT_FILE, DriftReference, drift_config
 
 # --- KONFIGURASI ---
 CONFIG_PATH = Path("configs/data.yaml")
@@ -16,16 +20,10 @@ def run_preprocessing():
     
     # 1. Load Config & Data
     cfg = load_config(CONFIG_PATH)
-    input_path = Path(cfg["output_dir"]) / "ingested_train.csv"
     output_dir = Path(cfg["output_dir"])
     model_dir = Path(cfg["model_dir"])
     model_dir.mkdir(parents=True, exist_ok=True)
     
-    if not input_path.exists():
-        raise FileNotFoundError("File ingested_train.csv tidak ditemukan. Jalankan data_ingestion.py dulu.")
-        
-    df = pd.read_csv(input_path)
-    
     # 2. Filter Fitur
     # Kita mengambil kolom sensor DAN op_setting sesuai data.yaml
     features = cfg["selected_features"]
@@ -33,12 +31,42 @@ def run_preprocessing():
     
     print(f"   Fitur yang digunakan ({len(features)}): {features}")
     
-    # Pastikan kolom ada
-    missing_cols = [col for col in features if col not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Kolom berikut hilang di CSV: {missing_cols}")
+    # Hanya baca kolom yang dibutuhkan (bukan seluruh 28 kolom)
+    # unit_number & time_in_cycles dibutuhkan untuk fitur rolling per unit
+    # unit_number juga dipakai train.py untuk split per mesin (GroupKFold)
+    # RUL (sisa cycle) ikut disimpan sebagai target head regresi di train.py
+    columns = ["unit_number"] + features + [target, "RUL"]
+    if engineered_columns(cfg):
+        columns = ["time_in_cycles"] + columns
+    rc = regime_config(cfg)
+    if rc["enabled"]:
+        columns += [c for c in rc["op_columns"] if c not in columns]
+    try:
+        df = load_table(output_dir, "ingested_train", columns=columns)
+    except FileNotFoundError:
+        raise FileNotFoundError("Data ingested_train tidak ditemukan. Jalankan data_ingest.py dulu.")
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Kolom fitur tidak lengkap di ingested_train: {e}")
         
-    X = df[features]
+    # Normalisasi sensor per kondisi operasi (regime), sebelum fitur rolling
+    regimes_path = model_dir / REGIMES_FILE
+    if rc["enabled"]:
+        normalizer = RegimeNormalizer.fit(df, cfg)
+        df = normalizer.transform_frame(df)
+        normalizer.save(regimes_path)
+        print(f"   Normalisasi {len(rc['columns'])} sensor per regime ({normalizer.n_regimes} regime) -> {regimes_path}")
+    elif regimes_path.exists():
+        # Artefak lama tidak boleh ikut dipakai serving untuk model tanpa normalisasi regime
+        regimes_path.unlink()
+
+    # Fitur rolling (mean/std/slope/EWMA per unit), jika diaktifkan di config
+    if engineered_columns(cfg):
+        print(f"   Menambah {len(engineered_columns(cfg))} fitur rolling per unit...")
+        df = add_rolling_features(df, cfg)
+        features = model_features(cfg)
+
+    # Scaling dihitung dalam float64 (data kolumnar disimpan float32), sama seperti saat serving
+    X = df[features].astype("float64")
     y = df[target]
     
     # 3. Scaling (Normalisasi MinMax)
@@ -51,16 +79,22 @@ def run_preprocessing():
     # Kembalikan ke DataFrame agar nama kolom tidak hilang
     df_processed = pd.DataFrame(X_scaled, columns=features)
     df_processed[target] = y
+    df_processed["RUL"] = df["RUL"]
+    # Kunci grup split train/test (bukan fitur model)
+    df_processed["unit_number"] = df["unit_number"]
     
     # 4. Simpan Data & Scaler
     # Simpan Scaler (PENTING untuk tahap Serving nanti!)
     scaler_path = model_dir / "scaler.pkl"
     joblib.dump(scaler, scaler_path)
     print(f"✅ Scaler disimpan di: {scaler_path}")
+
+    # Sketch referensi untuk drift monitor (ruang input yang sama dengan scaler)
+    reference = DriftReference.fit(X.to_numpy(), features, drift_config(cfg)["n_bins"])
+    print(f"✅ Referensi drift disimpan di: {reference.save(model_dir / DRIFT_FILE)}")
     
     # Simpan Data Training Final
-    output_path = output_dir / "train_final.csv"
-    df_processed.to_csv(output_path, index=False)
+    output_path = save_table(df_processed, output_dir, "train_final", cfg.get("storage_format", "columnar"))
     print(f"✅ Data bersih disimpan di: {output_path}")
     print(f"   Shape Akhir: {df_processed.shape}")
 
@@ -0,0 +1,134 @@
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- NORMALISASI PER KONDISI OPERASI (REGIME) ---
+# FD002 punya 6 kondisi operasi (kombinasi altitude, Mach, TRA). Nilai sensor sangat
+# bergantung pada kondisi ini, jadi sensor dinormalisasi (z-score) per regime.
+# Regime ditentukan dengan lookup tabel dari op_setting yang dibulatkan (tanpa KMeans
+# per baris): op_setting -> kunci int64 -> searchsorted ke daftar kunci yang sudah diurutkan.
+
+REGIMES_FILE = "regimes.json"
+KEY_BITS = 20   # Bit per op_setting di kunci gabungan (maks 3 op_setting -> 60 bit)
+
+def regime_config(cfg: dict) -> dict:
+    rc = cfg.get("regimes", {}) or {}
+    op_columns = rc.get("op_columns") or [c for c in cfg["selected_features"] if c.startswith("op_setting")]
+    return {
+        "enabled": rc.get("enabled", False),
+        "op_columns": op_columns,
+        "decimals": rc.get("decimals") or [0] * len(op_columns),
+        "columns": rc.get("columns") or [c for c in cfg["selected_features"] if c.startswith("sensor_")],
+    }
+
+def _codes(ops: np.ndarray, decimals) -> np.ndarray:
+    # op_setting dibulatkan sesuai jumlah desimal, lalu jadi integer
+    return np.rint(ops * 10.0 ** np.asarray(decimals, dtype=np.float64)).astype(np.int64)
+
+def _keys(codes: np.ndarray) -> np.ndarray:
+    key = np.zeros(len(codes), dtype=np.int64)
+    for j in range(codes.shape[1]):
+        key = (key << KEY_BITS) | (codes[:, j] + (1 << (KEY_BITS - 1)))
+    return key
+
+class RegimeNormalizer:
+    """
+    Lookup regime + statistik sensor (mean, std) per regime.
+
+    Tabel lookup berisi kunci regime yang sudah diurutkan, jadi assign() untuk
+    seluruh batch cukup 1x searchsorted. Kunci yang tidak dikenal (tidak muncul saat
+    training) dipetakan ke regime dengan pusat op_setting terdekat.
+    """
+
+    def __init__(self, op_columns, decimals, columns, keys, centers, mean, std):
+        self.op_columns = list(op_columns)
+        self.decimals = list(decimals)
+        self.columns = list(columns)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+
+    @property
+    def n_regimes(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, cfg: dict):
+        rc = regime_config(cfg)
+        if len(rc["op_columns"]) > 3:
+            raise ValueError("Maksimal 3 op_setting untuk kunci regime.")
+        ops = df[rc["op_columns"]].to_numpy(dtype=np.float64)
+        keys, regime = np.unique(_keys(_codes(ops, rc["decimals"])), return_inverse=True)
+
+        X = df[rc["columns"]].to_numpy(dtype=np.float64)
+        n = np.bincount(regime, minlength=len(keys)).astype(np.float64)[:, None]
+        centers = np.stack([np.bincount(regime, weights=ops[:, j], minlength=len(keys))
+                            for j in range(ops.shape[1])], axis=1) / n
+        mean = np.stack([np.bincount(regime, weights=X[:, j], minlength=len(keys))
+                         for j in range(X.shape[1])], axis=1) / n
+        diff = X - mean[regime]
+        var = np.stack([np.bincount(regime, weights=diff[:, j] ** 2, minlength=len(keys))
+                        for j in range(X.shape[1])], axis=1) / n
+        std = np.sqrt(var)
+        # Sensor yang konstan di suatu regime: cukup dikurangi mean-nya
+        std[std == 0] = 1.0
+        return cls(rc["op_columns"], rc["decimals"], rc["columns"], keys, centers, mean, std)
+
+    def assign(self, ops: np.ndarray) -> np.ndarray:
+        """Index regime untuk setiap baris op_setting (n x len(op_columns))."""
+        ops = np.asarray(ops, dtype=np.float64)
+        keys = _keys(_codes(ops, self.decimals))
+        idx = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        unknown = np.flatnonzero(self.keys[idx] != keys)
+        if len(unknown):
+            # Jarak dalam satuan pembulatan, supaya semua op_setting berbobot sama
+            scale = 10.0 ** np.asarray(self.decimals, dtype=np.float64)
+            dist = (((ops[unknown, None, :] - self.centers[None]) * scale) ** 2).sum(axis=2)
+            idx[unknown] = dist.argmin(axis=1)
+        return idx
+
+    def transform(self, X: np.ndarray, features: list) -> np.ndarray:
+        """
+        Normalisasi matriks fitur (kolom sesuai urutan `features`) secara vektorisasi.
+        Kolom sensor diganti z-score regime-nya, kolom lain (op_setting) tidak diubah.
+        """
+        X = np.array(X, dtype=np.float64)
+        ops = X[:, [features.index(c) for c in self.op_columns]]
+        regime = self.assign(ops)
+        cols = [features.index(c) for c in self.columns]
+        X[:, cols] = (X[:, cols] - self.mean[regime]) / self.std[regime]
+        return X
+
+    def transform_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Salinan DataFrame dengan kolom sensor yang sudah dinormalisasi per regime."""
+        features = self.op_columns + self.columns
+        result = df.copy()
+        result[self.columns] = self.transform(df[features].to_numpy(), features)[:, len(self.op_columns):]
+        return result
+
+    def save(self, path: Path) -> Path:
+        # JSON: float Python ditulis round-trip, jadi hasil load identik
+        state = {
+            "op_columns": self.op_columns,
+            "decimals": self.decimals,
+            "columns": self.columns,
+            "keys": self.keys.tolist(),
+            "centers": self.centers.tolist(),
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+        }
+        with Path(path).open("w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        return Path(path)
+
+    @classmethod
+    def load(cls, path: Path):
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+def load_regimes(model_dir: Path):
+    """Load normalizer regime dari folder model, None jika model dilatih tanpa normalisasi regime."""
+    path = Path(model_dir) / REGIMES_FILE
+    return RegimeNormalizer.load(path) if path.exists() else None
@@ -0,0 +1,280 @@
+import os
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from inference import classify, predict_heads, predict_rul, transform_input, update_monitor
+from forest_export import FlatForest, load_rul_model, load_serving_model
+from metrics import REGISTRY as metrics
+
+# --- MODEL REGISTRY (PRIMARY + SHADOW, HOT-SWAP) ---
+# Beberapa versi model di-load & di-warm-up sekali lalu tetap di memori dalam 1 proses.
+# Setiap batch:
+#   - primary di-scoring di thread pemanggil, hasilnya langsung dikembalikan
+#   - shadow (opsional) di-scoring di thread pool begitu hasil primary siap dan TIDAK ditunggu;
+#     jika semua slot shadow masih sibuk, batch itu dilewati shadow (dihitung di
+#     shadow_skipped) supaya latency primary tidak ikut tertahan
+# Kedua hasil ditulis ke prediction_logs dengan model_version, role (primary/shadow) dan
+# latency scoring batch-nya. Latency per versi juga masuk metrics (stage model_<versi>).
+# Latency yang dibandingkan = jalur model yang sama untuk kedua peran (scaler + classifier);
+# drift monitor & head RUL primary dijalankan di luar bagian yang diukur.
+# promote()/set_shadow()/swap() mengganti versi aktif tanpa restart: hanya referensi yang ditukar
+# di bawah lock, batch yang sedang berjalan selesai dengan versi lamanya. Versi dengan jumlah
+# fitur berbeda dari versi pertama (local) ditolak saat di-load.
+
+LOCAL_VERSION = "local"   # Artifact di model_dir (hasil train.py terakhir)
+ADMIN_TOKEN_ENV = "REGISTRY_ADMIN_TOKEN"   # Alternatif registry.admin_token tanpa menulis token ke config
+
+def registry_config(cfg: dict) -> dict:
+    rc = cfg.get("registry", {}) or {}
+    return {
+        "versions": rc.get("versions") or {},
+        "primary": rc.get("primary", LOCAL_VERSION),
+        "shadow": rc.get("shadow"),
+        "max_workers": rc.get("max_workers", 1),
+        "latency_window": rc.get("latency_window", 1000),
+        "admin_token": rc.get("admin_token") or os.environ.get(ADMIN_TOKEN_ENV),
+    }
+
+def load_version(source: str, cfg: dict) -> tuple:
+    """
+    (model, scaler, rul_model) dari folder model (struktur sama dengan models/) atau URI MLflow
+    (runs:/<run_id>/model, models:/<model_id>). Model MLflow dikonversi ke FlatForest dan
+    memakai scaler.pkl di model_dir (preprocessing sama); head RUL hanya ikut dari folder.
+    """
+    if ":/" in str(source):
+        import joblib
+        import mlflow.sklearn  # Import mlflow ~detik, hanya jika ada versi dari MLflow
+        model = FlatForest.from_model(mlflow.sklearn.load_model(source))
+        return model, joblib.load(Path(cfg["model_dir"]) / "scaler.pkl"), None
+    model, scaler = load_serving_model(Path(source))
+    return model, scaler, load_rul_model(Path(source), scaler)
+
+class ModelVersion:
+    """1 versi model yang sudah di-load + statistik latency scoring-nya."""
+
+    def __init__(self, name, model, scaler, rul_model=None, source=None, latency_window=1000):
+        self.name = name
+        self.model = model
+        self.scaler = scaler
+        self.rul_model = rul_model
+        self.source = source
+        self.batches = 0
+        self.rows = 0
+        self.latencies = deque(maxlen=latency_window)   # detik per batch, window terakhir
+
+    def record(self, seconds: float, n_rows: int):
+        self.batches += 1
+        self.rows += n_rows
+        self.latencies.append(seconds)
+        metrics.observe(f"model_{self.name}", seconds)
+
+class ModelRegistry:
+    """
+    Versi model yang siap dipakai + pilihan primary/shadow. Aman dipanggil dari banyak thread.
+
+    `logger` (PredictionLogger, opsional) menerima hasil primary & shadow setiap batch.
+    `max_workers` = jumlah batch shadow yang boleh berjalan bersamaan.
+    """
+
+    def __init__(self, logger=None, max_workers: int = 1, latency_window: int = 1000, warm_up_rows: int = 256):
+        self.logger = logger
+        self.latency_window = latency_window
+        self.warm_up_rows = warm_up_rows
+        self.versions = {}
+        self.n_features = None   # Ruang fitur versi pertama (local), wajib sama untuk versi lain
+        self.primary = None
+        self.shadow = None
+        self.lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+        self._slots = threading.BoundedSemaphore(max_workers)
+        # Perbandingan shadow vs primary per versi shadow (baris yang sama)
+        self.comparisons = {}
+
+    # --- VERSI ---
+    def add(self, name: str, model, scaler, rul_model=None, source=None, warm_up: bool = True):
+        n_features = self._check_features(name, model, scaler, rul_model)
+        if warm_up and self.warm_up_rows:
+            # Batch dummy sebelum versi bisa dipilih: request pertama tidak menanggung page fault
+            predict_heads(model, scaler, np.zeros((self.warm_up_rows, n_features)), rul_model)
+        version = ModelVersion(name, model, scaler, rul_model, source, self.latency_window)
+        with self.lock:
+            self.versions[name] = version
+            self.n_features = self.n_features or n_features
+            if self.primary is None:
+                self.primary = name
+        return version
+
+    def _check_features(self, name, model, scaler, rul_model) -> int:
+        """
+        Jumlah fitur versi baru harus sama dengan scaler & head RUL-nya dan dengan versi yang sudah ada:
+        input registry selalu 1 ruang fitur (selected_features + fitur rolling dari config aktif).
+        """
+        n_features = model.n_features_in_
+        for label, n_other in (("scaler", getattr(scaler, "n_features_in_", None)),
+                               ("head RUL", getattr(rul_model, "n_features_in_", None)),
+                               ("versi lain di registry", self.n_features)):
+            if n_other is not None and n_other != n_features:
+                raise ValueError(f"Versi model '{name}' butuh {n_features} fitur, {label} memakai {n_other}.")
+        return n_features
+
+    def load(self, name: str, source: str, cfg: dict):
+        return self.add(name, *load_version(source, cfg), source=str(source))
+
+    def _check(self, name):
+        if name not in self.versions:
+            raise KeyError(f"Versi model '{name}' tidak ada. Tersedia: {list(self.versions)}")
+
+    def promote(self, name: str):
+        """Jadikan `name` primary. Jika `name` tadinya shadow, primary lama menjadi shadow (A/B dibalik)."""
+        self.swap(primary=name)
+
+    def set_shadow(self, name=None):
+        """Versi yang di-scoring diam-diam di samping primary (None = matikan shadow)."""
+        self.swap(shadow=name)
+
+    def swap(self, **roles):
+        """
+        Ganti primary dan/atau shadow sekaligus (keyword `primary`, `shadow`; shadow None = matikan).
+        Semua nama divalidasi dulu terhadap kombinasi akhirnya; jika ada yang salah tidak ada yang
+        berubah, jadi tidak ada batch yang sempat di-scoring dengan setengah perubahan.
+        """
+        unknown = set(roles) - {"primary", "shadow"}
+        if unknown:
+            raise TypeError(f"Peran tidak dikenal: {sorted(unknown)}")
+        for role, name in roles.items():
+            if name is not None or role == "primary":
+                self._check(name)
+        with self.lock:
+            old = self.primary
+            primary = roles.get("primary", self.primary)
+            if "shadow" in roles:
+                shadow = roles["shadow"]
+            else:
+                # Sama dengan promote(): shadow yang dijadikan primary bertukar tempat dengan primary lama
+                shadow = old if self.shadow == primary and old != primary else self.shadow
+            if shadow is not None and shadow == primary:
+                raise ValueError(f"Versi '{shadow}' sudah menjadi primary.")
+            self.primary, self.shadow = primary, shadow
+        if primary != old:
+            print(f"🔁 Primary model: {old} -> {primary}")
+
+    def active(self) -> tuple:
+        """(versi primary, versi shadow atau None) saat ini."""
+        with self.lock:
+            return self.versions[self.primary], self.versions.get(self.shadow) if self.shadow else None
+
+    # --- SCORING ---
+    def score(self, X, unit_ids=None, cycles=None, monitor=None) -> tuple:
+        """
+        Scoring 1 batch dengan primary (+ shadow di background). Return (pred, prob, rul) primary.
+        unit_ids/cycles hanya untuk log; `monitor` (DriftMonitor) di-update sekali oleh primary.
+        """
+        primary, shadow = self.active()
+        X = np.asarray(X, dtype=np.float64)
+        start = time.perf_counter()
+        X_in = transform_input(primary.scaler, X)
+        pred, prob = classify(primary.model, X_in)
+        seconds = time.perf_counter() - start
+        primary.record(seconds, len(X))
+
+        if shadow is not None:
+            # Shadow dikirim setelah hasil primary siap: berjalan bersamaan dengan pengiriman respons /
+            # render, tidak berebut CPU & GIL dengan scoring primary. Slot penuh = shadow masih
+            # mengerjakan batch lama -> lewati, jangan antrikan.
+            if self._slots.acquire(blocking=False):
+                self._pool.submit(self._run_shadow, shadow, X).add_done_callback(
+                    lambda fut: self._shadow_done(fut, shadow, primary.name, pred, prob, unit_ids, cycles))
+            else:
+                metrics.inc("shadow_skipped")
+        # Di luar latency versi: shadow tidak menjalankan keduanya, jadi tidak ikut dibandingkan
+        rul = predict_rul(primary.rul_model, X_in)
+        update_monitor(monitor, X)
+        self._log(unit_ids, cycles, pred, prob, primary.name, seconds, "primary")
+        return pred, prob, rul
+
+    def _run_shadow(self, version: ModelVersion, X: np.ndarray) -> tuple:
+        try:
+            start = time.perf_counter()
+            pred, prob = classify(version.model, transform_input(version.scaler, X))
+            return pred, prob, time.perf_counter() - start
+        finally:
+            self._slots.release()
+
+    def _shadow_done(self, fut, version, primary_name, primary_pred, primary_prob, unit_ids, cycles):
+        if fut.exception() is not None:
+            metrics.inc("shadow_errors")
+            print(f"⚠️ Shadow {version.name} gagal: {fut.exception()}")
+            return
+        pred, prob, seconds = fut.result()
+        version.record(seconds, len(pred))
+        self._log(unit_ids, cycles, pred, prob, version.name, seconds, "shadow")
+        with self.lock:
+            comp = self.comparisons.setdefault((version.name, primary_name), {"rows": 0, "agree": 0, "abs_diff": 0.0})
+            comp["rows"] += len(pred)
+            comp["agree"] += int((pred == primary_pred).sum())
+            comp["abs_diff"] += float(np.abs(prob - primary_prob).sum())
+
+    def _log(self, unit_ids, cycles, pred, prob, name, seconds, role):
+        if self.logger is None:
+            return
+        n = len(pred)
+        self.logger.log_many([None] * n if unit_ids is None else unit_ids, [None] * n if cycles is None else cycles,
+                             pred, prob, model_version=name, latency_ms=seconds * 1000, role=role)
+
+    # --- RINGKASAN ---
+    def summary(self):
+        """Tabel per versi: peran, jumlah batch/baris, latency p50/p95 (ms), kesepakatan dengan primary."""
+        import pandas as pd
+        with self.lock:
+            primary, shadow = self.primary, self.shadow
+            rows = []
+            for v in self.versions.values():
+                lat = np.asarray(v.latencies) * 1000
+                comp = self.comparisons.get((v.name, primary), {"rows": 0})
+                rows.append({
+                    "Version": v.name,
+                    "Role": "primary" if v.name == primary else "shadow" if v.name == shadow else "-",
+                    "Source": v.source,
+                    "Batches": v.batches,
+                    "Rows": v.rows,
+                    "p50 ms": float(np.percentile(lat, 50)) if len(lat) else np.nan,
+                    "p95 ms": float(np.percentile(lat, 95)) if len(lat) else np.nan,
+                    "Agreement": comp["agree"] / comp["rows"] if comp["rows"] else np.nan,
+                    "Mean |Δprob|": comp["abs_diff"] / comp["rows"] if comp["rows"] else np.nan,
+                })
+        return pd.DataFrame(rows)
+
+    def close(self):
+        """Tunggu batch shadow yang masih berjalan (hasilnya tetap dicatat)."""
+        self._pool.shutdown(wait=True)
+
+def build_registry(cfg: dict, model, scaler, rul_model=None, logger=None) -> ModelRegistry:
+    """
+    Registry dari config: versi `local` = model yang sudah di-load (warm_start / load_serving_model),
+    ditambah versi di registry.versions. Versi yang gagal di-load dilewati dengan peringatan.
+    """
+    rc = registry_config(cfg)
+    warm_up_rows = (cfg.get("startup", {}) or {}).get("warm_up_rows", 256)
+    registry = ModelRegistry(logger, max_workers=rc["max_workers"], latency_window=rc["latency_window"],
+                             warm_up_rows=warm_up_rows)
+    # Versi local sudah di-warm-up oleh pemanggil
+    registry.add(LOCAL_VERSION, model, scaler, rul_model, source=str(cfg["model_dir"]), warm_up=False)
+    for name, source in rc["versions"].items():
+        try:
+            with metrics.timer("registry_load"):
+                registry.load(name, source, cfg)
+            print(f"📦 Versi model '{name}' siap ({source})")
+        except Exception as e:
+            print(f"⚠️ Versi model '{name}' ({source}) gagal di-load: {e}")
+
+    for role, name in (("primary", rc["primary"]), ("shadow", rc["shadow"])):
+        if name is not None and name not in registry.versions:
+            print(f"⚠️ {role} '{name}' tidak tersedia, diabaikan.")
+    if rc["primary"] in registry.versions and rc["primary"] != registry.primary:
+        registry.promote(rc["primary"])
+    if rc["shadow"] in registry.versions and rc["shadow"] != registry.primary:
+        registry.set_shadow(rc["shadow"])
+    return registry
@@ -0,0 +1,310 @@
+import hmac
+import json
+import queue
+import threading
+import time
+import numpy as np
+import yaml
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from inference import predict_heads
+from forest_export import load_rul_model, load_serving_model
+from features import OnlineFeatures, engineered_columns
+from regimes import load_regimes
+from drift import load_monitor
+from registry import build_registry, registry_config
+from db_logger import get_logger
+from metrics import REGISTRY as metrics
+
+# --- KONFIGURASI ---
+CONFIG_PATH = Path("configs/data.yaml")
+
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+# --- MICRO-BATCHER ---
+class MicroBatcher:
+    """
+    Mengumpulkan request yang datang bersamaan menjadi satu batch,
+    lalu memanggil model SEKALI untuk semuanya.
+
+    Batch dikirim ke model jika jumlah baris sudah mencapai `max_batch_size`
+    atau request pertama di batch sudah menunggu `max_wait_ms`.
+
+    `registry` (ModelRegistry, opsional) menggantikan model/scaler/rul_model: batch di-scoring
+    primary (+ shadow paralel) dan dicatat ke prediction_logs per versi.
+    """
+
+    def __init__(self, model, scaler, max_batch_size=256, max_wait_ms=5.0, monitor=None, rul_model=None,
+                 registry=None):
+        self.model = model
+        self.scaler = scaler
+        self.monitor = monitor
+        self.rul_model = rul_model
+        self.registry = registry
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._submit_lock = threading.Lock()   # Cek _stop + put atomik terhadap close()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, X: np.ndarray, unit_ids=None) -> Future:
+        """
+        Masukkan 1..n baris ke antrian. Hasil (pred, prob, rul) dikembalikan lewat Future (rul bisa None).
+        `unit_ids` hanya dipakai untuk log prediksi registry.
+        """
+        fut = Future()
+        with self._submit_lock:
+            if self._stop.is_set():
+                fut.set_exception(RuntimeError("MicroBatcher sudah ditutup."))
+            else:
+                self._queue.put((X, fut, unit_ids))
+        return fut
+
+    def close(self):
+        with self._submit_lock:
+            self._stop.set()
+        self._worker.join(timeout=1.0)
+        # Request yang belum sempat di-batch: gagalkan Future-nya supaya handler yang menunggu
+        # .result() tidak menggantung saat shutdown
+        while True:
+            try:
+                _, fut, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            fut.set_exception(RuntimeError("MicroBatcher ditutup sebelum request di-scoring."))
+
+    def _collect(self):
+        # Tunggu request pertama, lalu kumpulkan sisanya sampai penuh / timeout
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        items = [first]
+        n_rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            n_rows += len(item[0])
+        return items
+
+    def _run(self):
+        while not self._stop.is_set():
+            items = self._collect()
+            if not items:
+                continue
+            try:
+                X = np.vstack([x for x, _, _ in items])
+                if self.registry is not None:
+                    unit_ids = [u for x, _, ids in items for u in (ids if ids is not None else [None] * len(x))]
+                    pred, prob, rul = self.registry.score(X, unit_ids, None, self.monitor)
+                else:
+                    pred, prob, rul = predict_heads(self.model, self.scaler, X, self.rul_model, self.monitor)
+            except Exception as e:
+                for _, fut, _ in items:
+                    fut.set_exception(e)
+                continue
+
+            # Pecah kembali hasil batch sesuai request asalnya
+            start = 0
+            for x, fut, _ in items:
+                end = start + len(x)
+                fut.set_result((pred[start:end], prob[start:end], None if rul is None else rul[start:end]))
+                start = end
+
+# --- PARSING REQUEST ---
+def parse_rows(payload, features: list) -> tuple:
+    """
+    Terima 1 baris atau banyak baris:
+      {"rows": [{"sensor_2": ..., ...}, ...]}  atau  {"sensor_2": ..., ...}
+    Baris boleh berupa dict (kunci = nama fitur) atau list sesuai urutan selected_features.
+    Return (X, unit_ids); unit_ids = None jika tidak semua baris punya "unit_number".
+    """
+    rows = payload.get("rows", [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or len(rows) == 0:
+        raise ValueError("Payload harus berisi minimal 1 baris sensor.")
+
+    X = np.empty((len(rows), len(features)), dtype=np.float64)
+    unit_ids = []
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            missing = [f for f in features if f not in row]
+            if missing:
+                raise ValueError(f"Baris {i}: kolom berikut hilang: {missing}")
+            X[i] = [row[f] for f in features]
+            unit_ids.append(row.get("unit_number"))
+        else:
+            if len(row) != len(features):
+                raise ValueError(f"Baris {i}: butuh {len(features)} nilai, dapat {len(row)}")
+            X[i] = row
+            unit_ids.append(None)
+    return X, (unit_ids if None not in unit_ids else None)
+
+# --- HTTP SERVER ---
+class PredictionServer(ThreadingHTTPServer):
+    # Backlog default (5) terlalu kecil saat banyak mesin kirim data bersamaan
+    request_queue_size = 1024
+    daemon_threads = True
+
+def make_handler(batcher: MicroBatcher, features: list, online_features: OnlineFeatures = None, regimes=None,
+                 admin_token: str = None):
+    # Fitur rolling butuh riwayat per unit -> state disimpan di server, urut kedatangan
+    # POST /models hanya dengan header X-Admin-Token == admin_token (None = hot-swap via HTTP mati)
+    features_lock = threading.Lock()
+    registry = batcher.registry
+
+    class PredictHandler(BaseHTTPRequestHandler):
+        def _send_json(self, code, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "features": features})
+            elif self.path == "/metrics":
+                # Format teks Prometheus (histogram durasi per stage + counter)
+                data = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            elif self.path == "/models" and registry is not None:
+                self._send_json(200, self._models())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def _models(self):
+            table = registry.summary().astype(object)
+            return {"primary": registry.primary, "shadow": registry.shadow,
+                    "versions": table.where(table.notna(), None).to_dict(orient="records")}
+
+        def _swap_models(self):
+            # Hot-swap: {"primary": "<versi>"} dan/atau {"shadow": "<versi>" | null}, tanpa restart
+            if admin_token is None:
+                self._send_json(403, {"error": "POST /models dimatikan: set registry.admin_token."})
+                return
+            if not hmac.compare_digest(self.headers.get("X-Admin-Token", "").encode(), admin_token.encode()):
+                self._send_json(401, {"error": "X-Admin-Token salah atau tidak ada."})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                # Primary & shadow divalidasi bersama lalu ditukar sekaligus (tidak ada perubahan setengah)
+                registry.swap(**{role: body[role] for role in ("primary", "shadow") if role in body})
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._send_json(400, {"error": str(e.args[0]) if e.args else str(e)})
+                return
+            self._send_json(200, self._models())
+
+        def do_POST(self):
+            if self.path == "/models" and registry is not None:
+                self._swap_models()
+                return
+            if self.path != "/predict":
+                self._send_json(404, {"error": "not found"})
+                return
+            metrics.inc("http_requests")
+            try:
+                with metrics.timer("http_parse"):
+                    length = int(self.headers.get("Content-Length", 0))
+                    X, unit_ids = parse_rows(json.loads(self.rfile.read(length)), features)
+                    if regimes is not None:
+                        X = regimes.transform(X, features)
+                if online_features is not None:
+                    if unit_ids is None:
+                        raise ValueError("Fitur rolling aktif: setiap baris wajib punya 'unit_number'.")
+                    with features_lock, metrics.timer("online_features"):
+                        X = online_features.transform(unit_ids, X)
+            except (ValueError, TypeError) as e:
+                metrics.inc("http_errors")
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                # Termasuk waktu tunggu micro-batch + scoring
+                with metrics.timer("batch_wait_and_predict"):
+                    pred, prob, rul = batcher.submit(X, unit_ids).result()
+            except Exception as e:
+                metrics.inc("http_errors")
+                self._send_json(500, {"error": f"Gagal scoring: {e}"})
+                return
+            predictions = [
+                {"prediction": int(p), "probability": float(q), "status": "CRITICAL" if p == 1 else "NORMAL"}
+                for p, q in zip(pred, prob)
+            ]
+            if rul is not None:
+                # Head regresi: prediksi sisa cycle sampai gagal
+                for item, r in zip(predictions, rul):
+                    item["rul"] = float(r)
+            self._send_json(200, {"predictions": predictions})
+
+        def log_message(self, format, *args):
+            # Matikan log per request (terlalu berisik saat load test)
+            pass
+
+    return PredictHandler
+
+def main():
+    cfg = load_config(CONFIG_PATH)
+    serve_cfg = cfg.get("serving", {})
+    model_dir = Path(cfg["model_dir"])
+
+    print("🚀 Memulai Prediction Server...")
+    # Model & scaler di-load SEKALI saat server start
+    model, scaler = load_serving_model(model_dir)
+    rul_model = load_rul_model(model_dir, scaler)
+    features = cfg["selected_features"]
+
+    # Drift input dicek per batch model; alert (jarang) ditulis ke inference_logs.db
+    monitor = load_monitor(cfg, on_alert=lambda alerts: get_logger().log_drift(alerts))
+    # Versi model lain (registry.versions) di-load & di-warm-up sekali; primary/shadow bisa diganti via /models
+    registry = build_registry(cfg, model, scaler, rul_model, logger=get_logger())
+    batcher = MicroBatcher(
+        model, scaler,
+        max_batch_size=serve_cfg.get("max_batch_size", 256),
+        max_wait_ms=serve_cfg.get("max_wait_ms", 5),
+        monitor=monitor,
+        registry=registry,
+    )
+    host = serve_cfg.get("host", "0.0.0.0")
+    port = serve_cfg.get("port", 8000)
+    online_features = OnlineFeatures(cfg) if engineered_columns(cfg) else None
+    regimes = load_regimes(model_dir)
+    admin_token = registry_config(cfg)["admin_token"]
+    server = PredictionServer((host, port), make_handler(batcher, features, online_features, regimes, admin_token))
+    print(f"✅ Server siap di http://{host}:{port} (POST /predict, GET /health, GET /metrics, GET/POST /models)")
+    print(f"   Micro-batch: max {batcher.max_batch_size} baris / {batcher.max_wait * 1000:.1f} ms")
+    print(f"   Model: primary {registry.primary} | shadow {registry.shadow or '-'} | "
+          f"{len(registry.versions)} versi di memori | POST /models {'butuh X-Admin-Token' if admin_token else 'mati'}")
+    if rul_model is not None:
+        print("   Head RUL aktif: respons berisi 'rul' (prediksi sisa cycle)")
+    if monitor is not None:
+        print(f"   Drift monitor: window {monitor.window_rows} baris -> alert ke inference_logs.db")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Server dihentikan.")
+    finally:
+        server.server_close()
+        batcher.close()
+        registry.close()
+
+if __name__ == "__main__":
+    main()
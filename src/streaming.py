@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import threading
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from collections import deque
+from pathlib import Path
+
+# --- STREAMING TELEMETRI (ASYNCIO) ---
+# Source -> BackpressureQueue (ukuran tetap) -> consumer yang mengambil batch dan scoring.
+# Source hanya perlu menyediakan `records()` (async iterator berisi (key, payload)),
+# jadi replay file, socket, atau tail file log bisa dipasang dengan interface yang sama.
+# Jika consumer tertinggal, kebijakan backpressure menentukan apa yang terjadi:
+#   block    -> producer menunggu sampai antrian ada tempat (tidak ada data hilang)
+#   drop     -> record TERLAMA dibuang (data terbaru selalu masuk)
+#   coalesce -> record baru menimpa record unit yang sama yang masih antri;
+#               jika unit itu belum ada di antrian, record terlama dibuang
+
+CONFIG_PATH = Path("configs/data.yaml")
+POLICIES = ("block", "drop", "coalesce")
+
+def load_config(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+class TelemetrySource:
+    """Interface source telemetri: async iterator (key, payload). key = unit_number (dipakai coalesce)."""
+
+    async def records(self):
+        raise NotImplementedError
+        yield
+
+class ReplaySource(TelemetrySource):
+    """
+    Replay baris DataFrame dengan laju tetap (`rate_hz` record per detik).
+    rate_hz = None -> secepat mungkin (soak test). Jadwal dihitung absolut dari waktu mulai,
+    jadi kalau sempat tertinggal, replay mengejar tanpa menumpuk drift.
+    Payload = label index baris di DataFrame.
+    """
+
+    def __init__(self, df: pd.DataFrame, rate_hz: float = None, key_col: str = "unit_number"):
+        self.keys = df[key_col].to_numpy()
+        self.index = df.index.to_numpy()
+        self.rate_hz = rate_hz
+
+    def __len__(self):
+        return len(self.index)
+
+    async def records(self):
+        start = time.perf_counter()
+        for n, (key, idx) in enumerate(zip(self.keys.tolist(), self.index.tolist())):
+            if self.rate_hz:
+                delay = start + n / self.rate_hz - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif n % 256 == 0:
+                await asyncio.sleep(0)  # Beri kesempatan consumer jalan
+            yield key, idx
+
+class BackpressureQueue:
+    """Antrian asyncio berukuran tetap dengan kebijakan backpressure (block / drop / coalesce)."""
+
+    def __init__(self, maxsize: int = 1000, policy: str = "block"):
+        if policy not in POLICIES:
+            raise ValueError(f"Policy tidak dikenal: {policy} (pilih {', '.join(POLICIES)})")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.closed = False
+        self.stats = {"put": 0, "dropped": 0, "coalesced": 0, "blocked": 0, "max_depth": 0}
+        self._items = deque()   # Cell: [key, payload, waktu masuk]
+        self._latest = {}       # (coalesce) key -> cell yang masih antri
+        self._cond = asyncio.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _forget(self, cell):
+        if self._latest.get(cell[0]) is cell:
+            del self._latest[cell[0]]
+
+    async def put(self, key, payload):
+        async with self._cond:
+            self.stats["put"] += 1
+            if len(self._items) >= self.maxsize:
+                if self.policy == "block":
+                    self.stats["blocked"] += 1
+                    await self._cond.wait_for(lambda: len(self._items) < self.maxsize or self.closed)
+                elif self.policy == "coalesce" and key in self._latest:
+                    cell = self._latest[key]
+                    cell[1] = payload
+                    self.stats["coalesced"] += 1
+                    return
+                else:
+                    self._forget(self._items.popleft())
+                    self.stats["dropped"] += 1
+            if self.closed:
+                return
+
+            cell = [key, payload, time.perf_counter()]
+            self._items.append(cell)
+            if self.policy == "coalesce":
+                self._latest[key] = cell
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(self._items))
+            self._cond.notify_all()
+
+    async def get_batch(self, max_batch: int, max_wait: float):
+        """
+        Ambil hingga `max_batch` record. Setelah record pertama ada, tunggu maksimal `max_wait`
+        detik agar batch lebih penuh. Return None jika antrian sudah ditutup dan kosong.
+        """
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._items or self.closed)
+            if not self._items:
+                return None
+            if max_wait > 0 and len(self._items) < max_batch and not self.closed:
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: len(self._items) >= max_batch or self.closed), max_wait)
+                except asyncio.TimeoutError:
+                    # Python < 3.11: asyncio.TimeoutError bukan TimeoutError bawaan -> batch sebagian tetap dikirim
+                    pass
+            batch = [self._items.popleft() for _ in range(min(max_batch, len(self._items)))]
+            for cell in batch:
+                self._forget(cell)
+            self._cond.notify_all()
+            return batch
+
+    async def close(self):
+        async with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+class StreamRunner:
+    """
+    Menjalankan source -> queue -> consumer di event loop sendiri (thread background),
+    sehingga thread pemanggil (misal script Streamlit) tidak ikut tertahan.
+
+    `handler(batch)` dipanggil di thread pool dengan list (key, payload); selama handler
+    berjalan, source tetap mengisi antrian sehingga backpressure benar-benar terjadi.
+    """
+
+    def __init__(self, source: TelemetrySource, handler, queue_size: int = 1000, policy: str = "block",
+                 max_batch: int = 256, max_wait_ms: float = 20):
+        self.source = source
+        self.handler = handler
+        self.queue_size = queue_size
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats = {"consumed": 0, "batches": 0}
+        self.latencies = deque(maxlen=100_000)   # Detik dari masuk antrian sampai selesai di-handle
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    async def _main(self):
+        queue = BackpressureQueue(self.queue_size, self.policy)
+
+        async def produce():
+            async for key, payload in self.source.records():
+                if self._stop.is_set() or queue.closed:
+                    break
+                await queue.put(key, payload)
+            await queue.close()
+
+        async def consume():
+            try:
+                while not self._stop.is_set():
+                    batch = await queue.get_batch(self.max_batch, self.max_wait)
+                    if batch is None:
+                        break
+                    await asyncio.to_thread(self.handler, [(cell[0], cell[1]) for cell in batch])
+                    now = time.perf_counter()
+                    self.latencies.extend(now - cell[2] for cell in batch)
+                    self.stats["consumed"] += len(batch)
+                    self.stats["batches"] += 1
+            finally:
+                # Consumer berhenti -> producer yang sedang menunggu (block) ikut dilepas
+                await queue.close()
+
+        try:
+            await asyncio.gather(produce(), consume())
+        finally:
+            self.stats.update(queue.stats)
+
+    def run(self):
+        """Jalankan sampai source habis (blocking). Dipakai soak test / CLI."""
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.error = e
+            raise
+
+    def start(self):
+        """Jalankan di thread background (non-blocking)."""
+        self._thread = threading.Thread(target=self._run_quietly, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run_quietly(self):
+        try:
+            self.run()
+        except Exception:
+            pass  # Disimpan di self.error, dicek oleh pemanggil
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._thread is not None and not self._thread.is_alive()
+
+    def summary(self) -> dict:
+        lat = np.asarray(self.latencies) * 1000
+        out = dict(self.stats)
+        if len(lat):
+            out.update({f"p{q}_ms": float(np.percentile(lat, q)) for q in (50, 95, 99)})
+        return out
+
+def stream_config(cfg: dict) -> dict:
+    sc = cfg.get("streaming", {}) or {}
+    return {
+        "queue_size": sc.get("queue_size", 1000),
+        "policy": sc.get("policy", "block"),
+        "max_batch": sc.get("max_batch", 256),
+        "max_wait_ms": sc.get("max_wait_ms", 20),
+    }
+
+def main():
+    # Soak test: replay seluruh streaming_source (urut cycle, semua unit bergantian) ke model
+    from data_store import load_table
+    from forest_export import load_serving_model
+    from features import OnlineFeatures, engineered_columns
+    from inference import predict_batch
+    from regimes import load_regimes
+    from drift import load_monitor
+    from db_logger import get_logger
+
+    cfg = load_config(CONFIG_PATH)
+    sc = stream_config(cfg)
+    parser = argparse.ArgumentParser(description="Soak test streaming source -> scoring consumer")
+    parser.add_argument("--rate", type=float, default=0, help="Record per detik (0 = secepatnya)")
+    parser.add_argument("--policy", choices=POLICIES, default=sc["policy"])
+    parser.add_argument("--queue-size", type=int, default=sc["queue_size"])
+    parser.add_argument("--max-batch", type=int, default=sc["max_batch"])
+    parser.add_argument("--repeat", type=int, default=1, help="Replay data N kali (unit diberi offset)")
+    parser.add_argument("--no-drift", action="store_true", help="Matikan drift monitor (pembanding throughput)")
+    args = parser.parse_args()
+
+    features = cfg["selected_features"]
+    df = load_table(Path(cfg["output_dir"]), "streaming_source", columns=["unit_number", "time_in_cycles"] + features)
+    offset = int(df["unit_number"].max())
+    df = pd.concat([df.assign(unit_number=df["unit_number"] + k * offset) for k in range(args.repeat)],
+                   ignore_index=True)
+    df = df.sort_values(["time_in_cycles", "unit_number"], kind="stable").reset_index(drop=True)
+    X_all = df[features].to_numpy(dtype=np.float64)
+
+    model, scaler = load_serving_model(Path(cfg["model_dir"]))
+    regimes = load_regimes(Path(cfg["model_dir"]))
+    online = OnlineFeatures(cfg) if engineered_columns(cfg) else None
+    monitor = None if args.no_drift else load_monitor(cfg, on_alert=lambda alerts: get_logger().log_drift(alerts))
+
+    def score(batch):
+        keys = [k for k, _ in batch]
+        X = X_all[[i for _, i in batch]]
+        if regimes is not None:
+            X = regimes.transform(X, features)
+        if online is not None:
+            X = online.transform(keys, X)
+        predict_batch(model, scaler, X, monitor)
+
+    print(f"🚀 Soak test: {len(df)} record | rate {'max' if not args.rate else args.rate} rec/s | "
+          f"policy {args.policy} | queue {args.queue_size}")
+    runner = StreamRunner(ReplaySource(df, rate_hz=args.rate or None), score, queue_size=args.queue_size,
+                          policy=args.policy, max_batch=args.max_batch, max_wait_ms=sc["max_wait_ms"])
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+
+    s = runner.summary()
+    print(f"✅ Selesai dalam {elapsed:.2f} s -> {s['consumed'] / elapsed:.0f} record/s di-scoring")
+    print(f"   Batch: {s['batches']} (rata-rata {s['consumed'] / max(s['batches'], 1):.1f} record) | "
+          f"Max depth antrian: {s['max_depth']}")
+    print(f"   Dropped: {s['dropped']} | Coalesced: {s['coalesced']} | Producer tertahan: {s['blocked']}")
+    if "p50_ms" in s:
+        print(f"   Latency antrian->scoring: p50 {s['p50_ms']:.1f} ms | p95 {s['p95_ms']:.1f} ms | p99 {s['p99_ms']:.1f} ms")
+    if monitor is not None:
+        print(f"   Drift: {monitor.windows} window | {monitor.n_alerts} alert -> inference_logs.db (drift_alerts)")
+        print(monitor.summary().head(5).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import numpy as np
+
+# --- RING BUFFER TELEMETRI ---
+# Pengganti pd.concat per cycle di dashboard. Kolom dialokasikan sekali (numpy),
+# append O(1), dan memori tetap walaupun simulasi berjalan ribuan cycle.
+
+class TelemetryBuffer:
+    """
+    Ring buffer per kolom dengan kapasitas tetap (window).
+
+    Setiap nilai ditulis dua kali (posisi i dan i + capacity), sehingga isi window
+    selalu bisa diambil sebagai satu slice contiguous tanpa copy / np.roll.
+    """
+
+    def __init__(self, columns: list, capacity: int = 200):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self._data = {c: np.full(2 * capacity, np.nan) for c in self.columns}
+        self._next = 0      # Posisi tulis berikutnya (0..capacity-1)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def append(self, **values):
+        """Tambah 1 titik data. Kolom yang tidak diisi bernilai NaN."""
+        i = self._next
+        for c in self.columns:
+            v = values.get(c, np.nan)
+            self._data[c][i] = v
+            self._data[c][i + self.capacity] = v
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def view(self, column: str) -> np.ndarray:
+        """Isi window (urut dari terlama ke terbaru) sebagai view read-only."""
+        end = self._next + self.capacity if self._size == self.capacity else self._next
+        out = self._data[column][end - self._size:end]
+        out.flags.writeable = False
+        return out
+
+    def last(self, column: str):
+        return self.view(column)[-1] if self._size else None
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
@@ -1,13 +1,22 @@
-import pandas as pd
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+import numpy as np
 import yaml
 import joblib
 import mlflow
 import mlflow.sklearn
 import optuna
 from pathlib import Path
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import recall_score, accuracy_score, f1_score
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from data_store import load_table
+from evaluation import (build_folds, cv_config, fit_predict_folds, fold_X, fold_metrics, fold_regression_metrics,
+                        retarget_folds)
+from forest_export import FlatForest, export_forest, verify_fused
+from features import model_input
+from regimes import load_regimes
+from metrics import time_calls
 
 # --- KONFIGURASI ---
 CONFIG_PATH = Path("configs/data.yaml")
@@ -18,102 +27,460 @@ def load_config(path: Path) -> dict:
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+# --- DATA (LOAD & SPLIT SEKALI) ---
+def load_training_data(cfg: dict) -> dict:
+    """
+    Load train_final dan buat fold GroupKFold per unit_number SEKALI saja.
+    Hasilnya dipakai bersama (read-only) oleh semua trial Optuna dan retrain final.
+    """
+    df = load_table(Path(cfg["output_dir"]), "train_final")
+    if "unit_number" not in df.columns:
+        raise ValueError("train_final tidak punya kolom unit_number (split per mesin). Jalankan preprocessing.py ulang.")
+    # Target (label klasifikasi, RUL regresi) & kunci grup bukan fitur model
+    X = df.drop(columns=['label', 'unit_number', 'RUL'], errors='ignore')
+    cv = cv_config(cfg)
+
+    # Array float32 contiguous: format internal sklearn tree, jadi tidak ada konversi ulang per trial
+    X_all = np.ascontiguousarray(X, dtype=np.float32)
+    y_all = df['label'].to_numpy()
+    groups = df['unit_number'].to_numpy()
+    return {
+        "X": X_all,
+        "y": y_all,
+        "rul": df['RUL'].to_numpy(dtype=np.float64) if 'RUL' in df.columns else None,
+        "n_units": int(len(np.unique(groups))),
+        "folds": build_folds(X_all, y_all, groups, cv["n_splits"], cv["cache_dir"]),
+    }
+
+def split_cores(n_trial_jobs: int) -> tuple:
+    """
+    Bagi core CPU antara trial paralel dan n_jobs milik RandomForest.
+    Contoh: 8 core, 4 trial paralel -> tiap forest pakai 2 core.
+    """
+    n_cpu = os.cpu_count() or 1
+    if n_trial_jobs is None or n_trial_jobs <= 0:
+        n_trial_jobs = n_cpu
+    n_trial_jobs = min(n_trial_jobs, n_cpu)
+    return n_trial_jobs, max(1, n_cpu // n_trial_jobs)
+
+# --- BIAYA SERVING (LATENCY & UKURAN MODEL) ---
+# Diukur pada FlatForest (format yang benar-benar di-serve), bukan RandomForestClassifier.
+# Trial paralel berjalan di thread: latency tidak boleh diukur saat trial lain sedang training
+# (core penuh -> latency hanya noise). Fit fold memegang gate bersama, pengukuran memegang gate
+# eksklusif: pengukuran menunggu semua fit yang berjalan selesai, fit baru menunggu pengukuran selesai.
+
+class TimingGate:
+    """Read-write lock sederhana: banyak `shared()` (fit) ATAU 1 `exclusive()` (ukur latency)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = 0       # Fit yang sedang berjalan
+        self._waiting = 0      # Pengukuran yang menunggu (didahulukan supaya tidak kelaparan)
+        self._measuring = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._measuring and not self._waiting)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            self._cond.wait_for(lambda: not self._measuring and self._active == 0)
+            self._waiting -= 1
+            self._measuring = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._measuring = False
+                self._cond.notify_all()
+
+_timing_gate = TimingGate()
+
+def serving_cost(model, X: np.ndarray, batch_size: int = 256, repeats: int = 5) -> dict:
+    """
+    Latency predict_proba (predict untuk forest regresi) 1 batch `batch_size` baris
+    (ms, median putaran terbaik) dan ukuran array forest hasil export (MB, sama dengan
+    isi models/forest/*.npy). Pengukuran eksklusif: tidak ada trial lain yang training/mengukur bersamaan.
+    """
+    flat = FlatForest.from_model(model)
+    predict = flat.predict if flat.task == "regression" else flat.predict_proba
+    X_batch = X[np.arange(batch_size) % len(X)]
+    size_mb = sum(getattr(flat, name).nbytes for name in ["feature", "threshold", "left", "right", "value"])
+    with _timing_gate.exclusive():
+        predict(X_batch)   # Warm-up
+        rounds = time_calls(lambda i: predict(X_batch), repeats, rounds=3)
+    return {"latency_ms": float(min(np.median(t) for t in rounds) * 1000),
+            "model_size_mb": size_mb / 1024 / 1024}
+
 # --- FUNGSI OBJECTIVE (UPDATED FOR LOGGING) ---
-def objective(trial):
-    # 1. Start MLflow Run (Nested = True agar rapi)
-    with mlflow.start_run(nested=True):
-        
-        # 2. Load Data & Split
-        cfg = load_config(CONFIG_PATH)
-        data_path = Path(cfg["output_dir"]) / "train_final.csv"
-        df = pd.read_csv(data_path)
-        X = df.drop(columns=['label'])
-        y = df['label']
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-        # 3. Suggest Hyperparameters
-        param = {
-            'n_estimators': trial.suggest_int('n_estimators', 100, 400),
-            'max_depth': trial.suggest_int('max_depth', 10, 50),
-            'min_samples_split': trial.suggest_int('min_samples_split', 2, 15),
-            'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10),
-            'max_features': trial.suggest_categorical('max_features', ['sqrt', 'log2'])
-        }
-        
-        # 4. Train Model
-        model = RandomForestClassifier(**param, random_state=42, n_jobs=-1)
-        model.fit(X_train, y_train)
-        
-        # 5. Evaluate
-        preds = model.predict(X_test)
-        acc = accuracy_score(y_test, preds)
-        rec = recall_score(y_test, preds)
-        f1 = f1_score(y_test, preds)
-        
-        # 6. LOGGING KE MLFLOW (Ini bagian barunya)
-        # Kita catat parameter yang dipilih Optuna saat ini
-        mlflow.log_params(param)
-        # Kita catat hasilnya
-        mlflow.log_metric("accuracy", acc)
-        mlflow.log_metric("recall", rec)
-        mlflow.log_metric("f1", f1)
-        
-        # Kita beri tag agar mudah dicari bahwa ini adalah "trial"
-        mlflow.set_tag("type", "optuna_trial")
-        mlflow.set_tag("trial_number", trial.number)
-        
-        return f1
+N_ESTIMATORS_RANGE = (100, 400)   # Juga batas resource pruner Hyperband (jumlah pohon)
+
+def suggest_params(trial) -> dict:
+    """Ruang hyperparameter Random Forest (dipakai head klasifikasi & regresi RUL)."""
+    return {
+        'n_estimators': trial.suggest_int('n_estimators', *N_ESTIMATORS_RANGE),
+        'max_depth': trial.suggest_int('max_depth', 10, 50),
+        'min_samples_split': trial.suggest_int('min_samples_split', 2, 15),
+        'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10),
+        'max_features': trial.suggest_categorical('max_features', ['sqrt', 'log2'])
+    }
+
+class Objective:
+    """
+    Objective Optuna. Data & fold sudah di-load di luar, trial hanya melatih & mengevaluasi.
+    Skor trial = rata-rata metrik GroupKFold (fold dilatih paralel di thread).
+
+    Jika `tree_chunk` diisi, forest ditumbuhkan bertahap (warm_start) per `tree_chunk` pohon.
+    F1 sementara (rata-rata fold) dilaporkan ke Optuna setiap tahap sehingga trial yang jelek bisa di-prune
+    sebelum semua pohon selesai dilatih. Hasil akhir tetap sama dengan training sekaligus.
+
+    Jika `cost_cfg` diisi (mode multi-objective), objective mengembalikan
+    (F1, latency batch ms, ukuran model MB). Optuna tidak mendukung pruning di mode ini.
+    """
+
+    def __init__(self, data: dict, forest_jobs: int = -1, tree_chunk: int = None, cost_cfg: dict = None,
+                 fold_jobs: int = 1):
+        self.data = data
+        self.forest_jobs = forest_jobs
+        self.tree_chunk = tree_chunk
+        self.cost_cfg = cost_cfg
+        self.fold_jobs = fold_jobs
+
+    def _stages(self, n_estimators: int) -> list:
+        if not self.tree_chunk:
+            return [n_estimators]
+        stages = list(range(self.tree_chunk, n_estimators, self.tree_chunk))
+        return stages + [n_estimators]
+
+    def __call__(self, trial):
+        # 1. Start MLflow Run (Nested = True agar rapi)
+        with mlflow.start_run(nested=True):
+            folds = self.data["folds"]
+
+            # 2. Suggest Hyperparameters
+            param = suggest_params(trial)
+            mlflow.log_params(param)
+
+            # Kita beri tag agar mudah dicari bahwa ini adalah "trial"
+            mlflow.set_tag("type", "optuna_trial")
+            mlflow.set_tag("trial_number", trial.number)
+
+            # 3. Train Model per fold (paralel), bertahap tambah pohon per chunk
+            models = [RandomForestClassifier(**param, random_state=42, n_jobs=self.forest_jobs, warm_start=True)
+                      for _ in folds]
+            for n_trees in self._stages(param['n_estimators']):
+                for model in models:
+                    model.set_params(n_estimators=n_trees)
+                with _timing_gate.shared():
+                    preds = fit_predict_folds(models, folds, self.fold_jobs)
+
+                # 4. Evaluate (rata-rata F1 semua fold)
+                scores = fold_metrics(folds, preds)
+                f1 = scores["f1"]
+                mlflow.log_metric("f1_partial", f1, step=n_trees)
+
+                # Laporkan F1 sementara, hentikan trial jika kalah jauh dari trial lain
+                if self.cost_cfg is not None:
+                    continue
+                trial.report(f1, step=n_trees)
+                if trial.should_prune():
+                    # Run MLflow ditutup oleh `with` saat exception keluar dari blok ini
+                    mlflow.set_tag("pruned_at_trees", n_trees)
+                    raise optuna.TrialPruned()
+
+            # 5. LOGGING KE MLFLOW (metrik cross-validation per mesin)
+            mlflow.log_metrics(scores)
+            for name, value in scores.items():
+                trial.set_user_attr(name, value)
+
+            if self.cost_cfg is None:
+                return f1
+            batch_size = self.cost_cfg.get("batch_size", 256)
+            cost = serving_cost(models[0], fold_X(folds[0], "test", batch_size), batch_size,
+                                self.cost_cfg.get("latency_repeats", 5))
+            mlflow.log_metrics(cost)
+            return f1, cost["latency_ms"], cost["model_size_mb"]
+
+class RulObjective:
+    """
+    Objective head regresi RUL: RMSE rata-rata GroupKFold (fold & array X yang sama dengan
+    classifier, target diganti RUL yang di-cap `max_rul`). Trial dicatat sebagai nested run MLflow.
+    Jika `cost_cfg` diisi, return (RMSE, latency batch ms, ukuran model MB) seperti Objective.
+    """
+
+    def __init__(self, folds: list, forest_jobs: int = -1, fold_jobs: int = 1, cost_cfg: dict = None):
+        self.folds = folds
+        self.forest_jobs = forest_jobs
+        self.fold_jobs = fold_jobs
+        self.cost_cfg = cost_cfg
+
+    def __call__(self, trial):
+        with mlflow.start_run(nested=True):
+            param = suggest_params(trial)
+            mlflow.log_params(param)
+            mlflow.set_tag("type", "optuna_trial_rul")
+            mlflow.set_tag("trial_number", trial.number)
+
+            models = [RandomForestRegressor(**param, random_state=42, n_jobs=self.forest_jobs) for _ in self.folds]
+            with _timing_gate.shared():
+                preds = fit_predict_folds(models, self.folds, self.fold_jobs)
+            scores = fold_regression_metrics(self.folds, preds)
+            mlflow.log_metrics(scores)
+            for name, value in scores.items():
+                trial.set_user_attr(name, value)
+
+            if self.cost_cfg is None:
+                return scores["rmse"]
+            batch_size = self.cost_cfg.get("batch_size", 256)
+            cost = serving_cost(models[0], fold_X(self.folds[0], "test", batch_size), batch_size,
+                                self.cost_cfg.get("latency_repeats", 5))
+            mlflow.log_metrics(cost)
+            return scores["rmse"], cost["latency_ms"], cost["model_size_mb"]
+
+def rul_config(cfg: dict) -> dict:
+    rc = cfg.get("rul_model", {}) or {}
+    return {
+        "enabled": rc.get("enabled", False),
+        "max_rul": rc.get("max_rul", 125),
+        "n_trials": rc.get("n_trials", 10),
+        "latency_budget_ms": rc.get("latency_budget_ms"),
+    }
+
+def make_pruner(prune_cfg: dict, max_trees: int = None):
+    """
+    Buat pruner Optuna dari config (median / hyperband / none). Resource = jumlah pohon:
+    Hyperband mulai dari 1 chunk sampai `max_trees` (default batas atas ruang n_estimators).
+    """
+    if not prune_cfg.get("enabled", False):
+        return optuna.pruners.NopPruner()
+    chunk = prune_cfg.get("tree_chunk", 50)
+    max_trees = max_trees or N_ESTIMATORS_RANGE[1]
+    kind = prune_cfg.get("pruner", "median")
+    if kind == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=chunk, max_resource=max_trees)
+    if kind == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=prune_cfg.get("n_startup_trials", 5),
+                                           n_warmup_steps=chunk)
+    raise ValueError(f"Pruner tidak dikenal: {kind} (pilih 'median' atau 'hyperband')")
+
+def select_trial(study, latency_budget_ms: float = None, maximize: bool = True):
+    """
+    Pilih trial dari Pareto front: F1 tertinggi (atau RMSE terendah, maximize=False)
+    dengan latency <= budget. Jika tidak ada yang masuk budget, ambil yang tercepat (dengan peringatan).
+    """
+    front = study.best_trials
+    sign = 1 if maximize else -1
+    if latency_budget_ms is None:
+        return max(front, key=lambda t: sign * t.values[0])
+    within = [t for t in front if t.values[1] <= latency_budget_ms]
+    if within:
+        return max(within, key=lambda t: (sign * t.values[0], -t.values[1]))
+    print(f"⚠️ Tidak ada trial dengan latency <= {latency_budget_ms} ms, dipilih trial tercepat.")
+    return min(front, key=lambda t: t.values[1])
+
+def print_pareto_front(study, chosen, budget_ms: float = None):
+    print(f"\n📐 Pareto front ({len(study.best_trials)} trial)"
+          + (f" | budget latency {budget_ms} ms" if budget_ms is not None else "") + ":")
+    print(f"   {'trial':>5} {'F1':>7} {'recall':>7} {'latency ms':>11} {'size MB':>8}  params")
+    for t in sorted(study.best_trials, key=lambda t: -t.values[0]):
+        mark = "⭐" if t.number == chosen.number else "  "
+        print(f"{mark} {t.number:>5} {t.values[0]:7.4f} {t.user_attrs.get('recall', float('nan')):7.4f} "
+              f"{t.values[1]:11.2f} {t.values[2]:8.2f}  {t.params}")
+
+def fuse_scaler_into_model(cfg: dict, model, flat_model: FlatForest, name: str = "forest_fused"):
+    """
+    Buat models/<name> (threshold dalam satuan sensor asli) lalu verifikasi
+    bahwa prediksinya identik dengan jalur scaler.pkl + model pada data mentah.
+    """
+    scaler = joblib.load(Path(cfg["model_dir"]) / "scaler.pkl")
+    fused_path = export_forest(model, MODEL_DIR / name, scaler=scaler)
+
+    columns = ["unit_number", "time_in_cycles"] + cfg["selected_features"]
+    # Input model fused = data setelah normalisasi regime & fitur rolling, sebelum MinMaxScaler
+    df_raw = load_table(Path(cfg["output_dir"]), "ingested_train", columns=columns)
+    X_raw = model_input(df_raw, cfg, load_regimes(cfg["model_dir"]))
+    n_diff = verify_fused(FlatForest.load(fused_path), flat_model, scaler, X_raw)
+    if n_diff:
+        shutil.rmtree(fused_path)
+        raise RuntimeError(f"Model fused berbeda di {n_diff} baris, artifact dibatalkan!")
+    print(f"🔗 Model fused (tanpa scaler) disimpan di: {fused_path} "
+          f"(verifikasi {len(X_raw)} baris: identik)")
+
+def train_rul_head(cfg: dict, data: dict, rc: dict, trial_jobs: int = 1, forest_jobs: int = -1, fold_jobs: int = 1):
+    """
+    Tuning + retrain head regresi RUL dengan fold GroupKFold yang sama dengan classifier.
+    Export models/rul_forest (+ rul_forest_fused) dengan ruang input yang sama dengan
+    forest (+ forest_fused), sehingga serving memakai 1 matriks input untuk kedua head.
+    """
+    if data["rul"] is None:
+        print("⚠️ train_final tidak punya kolom RUL, head regresi dilewati. Jalankan preprocessing.py ulang.")
+        return
+    # Piecewise-linear RUL: di awal umur mesin belum ada tanda degradasi, jadi target di-cap
+    y_rul = np.minimum(data["rul"], rc["max_rul"])
+    folds = retarget_folds(data["folds"], y_rul)
+    print(f"\n🔧 Tuning head regresi RUL ({rc['n_trials']} trials, target di-cap {rc['max_rul']} cycle)...")
+
+    # Head kedua ikut dibayar di setiap batch serving -> pakai mode multi-objective yang sama
+    # dengan classifier (Pareto RMSE vs latency & ukuran), dengan budget latency sendiri
+    mo_cfg = cfg.get("tuning", {}).get("multi_objective", {})
+    cost_cfg = mo_cfg if mo_cfg.get("enabled", False) else None
+
+    with mlflow.start_run(run_name="Optuna_Best_RUL_FD002"):
+        if cost_cfg is None:
+            study = optuna.create_study(direction='minimize', study_name="RF_RUL_FD002_Optimization")
+        else:
+            study = optuna.create_study(directions=['minimize', 'minimize', 'minimize'],
+                                        study_name="RF_RUL_FD002_Optimization")
+            study.set_metric_names(["rmse", "latency_ms", "model_size_mb"])
+        study.optimize(RulObjective(folds, forest_jobs, fold_jobs, cost_cfg), n_trials=rc["n_trials"],
+                       n_jobs=trial_jobs)
+        best = study.best_trial if cost_cfg is None else select_trial(study, rc["latency_budget_ms"], maximize=False)
+        scores = {name: best.user_attrs[name] for name in ["rmse", "mae", "rmse_std"]}
+        print(f"   📊 RUL (GroupKFold {len(folds)} fold) -> RMSE: {scores['rmse']:.2f} ± {scores['rmse_std']:.2f} | "
+              f"MAE: {scores['mae']:.2f} cycle")
+        if cost_cfg is not None:
+            print(f"   ⏱️ Trial {best.number}: latency {best.values[1]:.2f} ms / {cost_cfg.get('batch_size', 256)} baris"
+                  f" | {best.values[2]:.2f} MB (budget {rc['latency_budget_ms']} ms)")
+            mlflow.log_param("latency_budget_ms", rc["latency_budget_ms"])
+            mlflow.log_metrics({"latency_ms": best.values[1], "model_size_mb": best.values[2]})
+        print(f"✅ Best Params RUL: {best.params}")
+
+        rul_model = RandomForestRegressor(**best.params, random_state=42, n_jobs=-1)
+        rul_model.fit(data["X"], y_rul)
+        mlflow.log_params(best.params)
+        mlflow.log_param("max_rul", rc["max_rul"])
+        mlflow.log_metrics(scores)
+        mlflow.sklearn.log_model(rul_model, "rul_model", serialization_format="cloudpickle")
+
+        forest_path = export_forest(rul_model, MODEL_DIR / "rul_forest")
+        if not np.allclose(FlatForest.load(forest_path).predict(data["X"]), rul_model.predict(data["X"])):
+            raise RuntimeError("Prediksi forest RUL hasil export berbeda dengan model asli!")
+        print(f"📦 Forest RUL disimpan di: {forest_path} (prediksi identik dengan model asli)")
+        fuse_scaler_into_model(cfg, rul_model, FlatForest.load(forest_path), name="rul_forest_fused")
 
 def main():
     print("🚀 Memulai Hyperparameter Tuning (Optuna) untuk FD002...")
-    print("   Proses ini akan memakan waktu karena data lebih besar...")
-    
-    # 1. Setup MLflow
+    cfg = load_config(CONFIG_PATH)
+    tune_cfg = cfg.get("tuning", {})
+
+    # 1. Load & split data SEKALI untuk semua trial
+    data = load_training_data(cfg)
+    print(f"   Data: {data['X'].shape} | {data['n_units']} mesin | GroupKFold {len(data['folds'])} fold "
+          f"(split per unit_number)")
+
+    # 2. Setup MLflow
     mlflow.set_experiment("Predictive_Maintenance_FD002_Tuning")
-    
-    # 2. Jalan Optuna
-    # Kita coba 20 kali percobaan (trials)
-    study = optuna.create_study(direction='maximize', study_name="RF_FD002_Optimization")
-    study.optimize(objective, n_trials=20) 
-    
+
+    # 3. Jalan Optuna (trial paralel, core dibagi dengan n_jobs forest)
+    n_trials = tune_cfg.get("n_trials", 20)
+    timeout = tune_cfg.get("timeout")
+    trial_jobs, trial_cores = split_cores(tune_cfg.get("n_jobs", 1))
+    # Core per trial dibagi lagi: fold paralel (thread) x n_jobs forest per fold
+    fold_jobs = max(1, min(len(data["folds"]), trial_cores))
+    forest_jobs = max(1, trial_cores // fold_jobs)
+    print(f"   {n_trials} trials | {trial_jobs} trial paralel x {fold_jobs} fold paralel x "
+          f"{forest_jobs} core per forest" + (f" | batas waktu {timeout} s" if timeout else ""))
+
+    # Multi-objective: F1 (max), latency batch & ukuran model (min) -> Pareto front
+    mo_cfg = tune_cfg.get("multi_objective", {})
+    cost_cfg = mo_cfg if mo_cfg.get("enabled", False) else None
+
+    # Pruning: forest ditumbuhkan per chunk, trial yang jelek dihentikan lebih awal
+    prune_cfg = tune_cfg.get("pruning", {})
+    if cost_cfg is not None and prune_cfg.get("enabled", False):
+        print("   ℹ️ Pruning dimatikan: tidak didukung Optuna untuk study multi-objective")
+        prune_cfg = {**prune_cfg, "enabled": False}
+    tree_chunk = prune_cfg.get("tree_chunk", 50) if prune_cfg.get("enabled", False) else None
+    pruner = make_pruner(prune_cfg)
+
+    if cost_cfg is None:
+        study = optuna.create_study(direction='maximize', study_name="RF_FD002_Optimization", pruner=pruner)
+    else:
+        study = optuna.create_study(directions=['maximize', 'minimize', 'minimize'],
+                                    study_name="RF_FD002_Optimization")
+        study.set_metric_names(["f1", "latency_ms", "model_size_mb"])
+    study.optimize(Objective(data, forest_jobs, tree_chunk, cost_cfg, fold_jobs), n_trials=n_trials,
+                   timeout=timeout, n_jobs=trial_jobs)
+
+    n_pruned = len(study.get_trials(deepcopy=False, states=[optuna.trial.TrialState.PRUNED]))
+    if n_pruned:
+        print(f"   ✂️ {n_pruned} dari {len(study.trials)} trial dihentikan lebih awal (pruned)")
+
     print("\n🏁 Tuning Selesai!")
-    print(f"✅ Best F1-Score: {study.best_value:.4f}")
-    print(f"✅ Best Params: {study.best_params}")
-    
+    if cost_cfg is None:
+        chosen = study.best_trial
+        print(f"✅ Best F1-Score (CV): {study.best_value:.4f}")
+    else:
+        budget = cost_cfg.get("latency_budget_ms")
+        chosen = select_trial(study, budget)
+        print_pareto_front(study, chosen, budget)
+        print(f"✅ Dipilih trial {chosen.number}: F1 {chosen.values[0]:.4f} | "
+              f"latency {chosen.values[1]:.2f} ms / {cost_cfg.get('batch_size', 256)} baris | "
+              f"{chosen.values[2]:.2f} MB")
+    best_params = chosen.params
+    print(f"✅ Best Params: {best_params}")
+
     # --- RETRAIN MODEL TERBAIK ---
     print("\n💾 Menyimpan Model Pemenang...")
-    
+
     with mlflow.start_run(run_name="Optuna_Best_Model_FD002"):
-        # Load ulang data
-        cfg = load_config(CONFIG_PATH)
-        df = pd.read_csv(Path(cfg["output_dir"]) / "train_final.csv")
-        X = df.drop(columns=['label'])
-        y = df['label']
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Train pakai Best Params
-        best_params = study.best_params
+        # Metrik final = hasil CV trial terpilih (fold yang sama, random_state sama -> tidak perlu diulang)
+        scores = {name: chosen.user_attrs[name] for name in ["accuracy", "recall", "f1", "f1_std"]}
+        print(f"   📊 Final Metrics (GroupKFold {len(data['folds'])} fold) -> Accuracy: {scores['accuracy']:.4f} | "
+              f"Recall: {scores['recall']:.4f} | F1: {scores['f1']:.4f} ± {scores['f1_std']:.4f}")
+
+        # Model final dilatih dengan seluruh mesin
+        X_all = data["X"]
         best_model = RandomForestClassifier(**best_params, random_state=42, n_jobs=-1)
-        best_model.fit(X_train, y_train)
-        
-        # Final Metrics
-        y_pred = best_model.predict(X_test)
-        acc = accuracy_score(y_test, y_pred)
-        rec = recall_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        
-        print(f"   📊 Final Metrics -> Accuracy: {acc:.4f} | Recall: {rec:.4f} | F1: {f1:.4f}")
-        
+        best_model.fit(X_all, data["y"])
+
         # Logging
         mlflow.log_params(best_params)
-        mlflow.log_metric("accuracy", acc)
-        mlflow.log_metric("recall", rec)
-        mlflow.log_metric("f1", f1)
-        mlflow.sklearn.log_model(best_model, "model")
-        
+        mlflow.log_metrics(scores)
+        mlflow.log_param("cv_n_splits", len(data["folds"]))
+        if cost_cfg is not None:
+            mlflow.log_metrics(serving_cost(best_model, X_all, cost_cfg.get("batch_size", 256),
+                                            cost_cfg.get("latency_repeats", 5)))
+            mlflow.log_param("latency_budget_ms", cost_cfg.get("latency_budget_ms"))
+            mlflow.log_dict({"pareto_front": [{"trial": t.number, "params": t.params,
+                                               "f1": t.values[0], "recall": t.user_attrs.get("recall"),
+                                               "latency_ms": t.values[1], "model_size_mb": t.values[2]}
+                                              for t in study.best_trials]}, "pareto_front.json")
+        # cloudpickle = format artifact yang sudah ada di mlruns/ (MLflow baru default ke skops)
+        mlflow.sklearn.log_model(best_model, "model", serialization_format="cloudpickle")
+
         # Save Local
         joblib.dump(best_model, MODEL_DIR / "best_model.pkl")
         print(f"🏆 Model terbaik disimpan di: {MODEL_DIR / 'best_model.pkl'}")
 
+        # Export versi ringkas (array numpy, bisa di-mmap) untuk serving
+        forest_path = export_forest(best_model, MODEL_DIR / "forest")
+        flat_proba = FlatForest.load(forest_path).predict_proba(X_all)
+        if not np.allclose(flat_proba, best_model.predict_proba(X_all)):
+            raise RuntimeError("Prediksi forest hasil export berbeda dengan model asli!")
+        print(f"📦 Forest ringkas disimpan di: {forest_path} (prediksi identik dengan model asli)")
+
+        # Fusi MinMaxScaler ke threshold: 1 artifact, input langsung data sensor mentah
+        fuse_scaler_into_model(cfg, best_model, FlatForest.load(forest_path))
+
+    # --- HEAD REGRESI RUL (input sama dengan classifier) ---
+    rc = rul_config(cfg)
+    if rc["enabled"]:
+        train_rul_head(cfg, data, rc, trial_jobs, forest_jobs, fold_jobs)
+    else:
+        # Artifact RUL lama tidak boleh ikut di-serve bersama classifier yang baru
+        for name in ["rul_forest", "rul_forest_fused"]:
+            shutil.rmtree(MODEL_DIR / name, ignore_errors=True)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
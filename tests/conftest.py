@@ -0,0 +1,7 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# Modul pipeline ada di folder src/ (dijalankan sebagai script), jadi
+# tambahkan ke sys.path agar bisa di-import dari tes.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
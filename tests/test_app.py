@@ -14,4 +14,53 @@ def test_config_exists():
     config_path = Path("configs/data.yaml")
     
     # Assert True jika file ada
-    assert config_path.exists() == True
\ No newline at end of file
+    assert config_path.exists() == True
+
+
+def test_telemetry_buffer_window_tetap():
+    """Ring buffer grafik hanya menyimpan `capacity` titik terakhir, urut dari terlama."""
+    from telemetry import TelemetryBuffer
+
+    buf = TelemetryBuffer(['Cycle', 'Sensor_11'], capacity=5)
+    assert buf.empty
+    for cycle in range(1, 13):
+        buf.append(Cycle=cycle, Sensor_11=cycle * 10.0)
+
+    assert len(buf) == 5
+    assert buf.view('Cycle').tolist() == [8, 9, 10, 11, 12]
+    assert buf.view('Sensor_11').tolist() == [80.0, 90.0, 100.0, 110.0, 120.0]
+    assert buf.last('Cycle') == 12
+
+    buf.clear()
+    assert buf.empty
+
+
+def test_fleet_simulator_satu_batch_per_tick():
+    """Setiap tick semua unit aktif maju 1 cycle dan di-scoring bersama dalam 1 batch."""
+    import numpy as np
+    import pandas as pd
+    from fleet import FleetSimulator
+
+    class CountingModel:
+        classes_ = np.array([0, 1])
+        calls = 0
+
+        def predict_proba(self, X):
+            CountingModel.calls += 1
+            p = np.clip(X[:, 0] / 10.0, 0, 1)
+            return np.stack([1 - p, p], axis=1)
+
+    df = pd.DataFrame({
+        "unit_number": [201, 201, 201, 202, 202],
+        "time_in_cycles": [1, 2, 3, 1, 2],
+        "sensor_11": [1.0, 2.0, 9.0, 3.0, 4.0],
+    })
+    sim = FleetSimulator(df, ["sensor_11"], window=4)
+
+    units, cycles, preds, probs = sim.step(CountingModel(), None)
+    assert units.tolist() == [201, 202] and cycles.tolist() == [1, 1]
+    sim.step(CountingModel(), None)
+    units, cycles, preds, probs = sim.step(CountingModel(), None)
+    assert units.tolist() == [201] and preds.tolist() == [1]
+    assert CountingModel.calls == 3 and sim.finished
+    assert sim.risk_table()["Unit"].tolist() == [201, 202]
@@ -0,0 +1,30 @@
+# tests/test_benchmark.py
+from benchmark import check_baseline, compare
+
+BASELINE = {"metrics": {"single_row_p50_ms": 2.0, "batch_1024_p99_ms": 40.0,
+                        "batch_1024_rows_per_s": 20000.0, "db_write_rows_per_s": 100000.0}}
+
+
+def test_compare_mendeteksi_regresi_sesuai_arah_metrik():
+    current = {"metrics": {
+        "single_row_p50_ms": 2.3,          # +15%: masih di bawah threshold
+        "batch_1024_p99_ms": 60.0,         # +50% lebih lambat -> regresi
+        "batch_1024_rows_per_s": 30000.0,  # Lebih cepat -> bukan regresi
+        "db_write_rows_per_s": 50000.0,    # Throughput turun 50% -> regresi
+        "peak_rss_mb": 500.0,              # Tidak ada di baseline -> dilewati
+    }}
+    regressions = compare(current, BASELINE, threshold=0.25)
+    assert sorted(r["metric"] for r in regressions) == ["batch_1024_p99_ms", "db_write_rows_per_s"]
+
+
+def test_compare_abaikan_selisih_latency_di_bawah_noise_floor():
+    current = {"metrics": {"single_row_p50_ms": 2.4}}   # +20%... dan +0.4 ms
+    assert compare(current, BASELINE, threshold=0.1, noise_floor_ms=0.5) == []
+    assert len(compare(current, BASELINE, threshold=0.1)) == 1
+
+
+def test_gate_gagal_jika_baseline_belum_ada():
+    current = {"metrics": {"single_row_p50_ms": 2.1}}
+    assert check_baseline(current, None, threshold=0.25) == 2
+    assert check_baseline(current, BASELINE, threshold=0.25) == 0
+    assert check_baseline({"metrics": {"single_row_p50_ms": 9.0}}, BASELINE, threshold=0.25) == 1
@@ -0,0 +1,32 @@
+# tests/test_data_ingest.py
+import numpy as np
+
+from data_ingest import RAW_COLUMNS, ingest_raw_files
+from data_store import ColumnTable
+
+
+def _write_raw(path, units):
+    # Format raw C-MAPSS: dipisah 1 spasi, ada spasi di akhir baris
+    rng = np.random.default_rng(len(units))
+    with path.open("w") as f:
+        for unit, n_cycles in units:
+            for cycle in range(1, n_cycles + 1):
+                values = rng.normal(500, 10, size=len(RAW_COLUMNS) - 2).round(4)
+                f.write(" ".join([str(unit), str(cycle)] + [str(v) for v in values]) + "  \n")
+
+
+def test_ingest_beberapa_file_per_chunk(tmp_path):
+    """Unit file kedua digeser offset, RUL dihitung dari max cycle walaupun unit terpotong antar chunk."""
+    _write_raw(tmp_path / "a.txt", [(1, 7), (2, 5)])
+    _write_raw(tmp_path / "b.txt", [(1, 4), (2, 6)])
+
+    counts = ingest_raw_files([tmp_path / "a.txt", tmp_path / "b.txt"], tmp_path, rul_threshold=2,
+                              split_id=2, chunksize=3)
+    assert counts == {"ingested_train": 12, "streaming_source": 10}
+
+    stream = ColumnTable(tmp_path / "streaming_source")
+    assert stream.units == [3, 4]
+    df = stream.read(units=[4])
+    assert df["RUL"].tolist() == [5, 4, 3, 2, 1, 0]
+    assert df["label"].tolist() == [0, 0, 0, 1, 1, 1]
+    assert list(df.columns) == RAW_COLUMNS + ["RUL", "label"]
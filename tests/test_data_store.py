@@ -0,0 +1,85 @@
+# tests/test_data_store.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_store import (ColumnTable, ColumnTableWriter, ensure_columnar, load_table, list_units, open_table_writer,
+                        write_table)
+
+
+def _sample_df():
+    return pd.DataFrame({
+        "unit_number": [202, 201, 202, 201, 203],
+        "time_in_cycles": [1, 1, 2, 2, 1],
+        "sensor_2": [641.8, 642.1, 642.3, 642.0, 641.5],
+        "label": [0, 0, 1, 1, 0],
+    })
+
+
+def test_roundtrip_kolumnar_dengan_dtype_dan_partisi(tmp_path):
+    """Tabel kolumnar menyimpan dtype hemat memori dan bisa dibaca per unit."""
+    write_table(_sample_df(), tmp_path / "stream")
+    table = ColumnTable(tmp_path / "stream")
+
+    assert table.units == [201, 202, 203]
+    assert table.column("unit_number").dtype == np.int16
+    assert table.column("sensor_2").dtype == np.float32
+    assert table.column("label").dtype == np.int8
+
+    df = table.read(columns=["time_in_cycles", "sensor_2"], units=[202])
+    assert list(df.columns) == ["time_in_cycles", "sensor_2"]
+    assert df["time_in_cycles"].tolist() == [1, 2]
+    assert np.allclose(df["sensor_2"], [641.8, 642.3])
+
+
+def test_load_table_fallback_ke_csv(tmp_path):
+    """Jika tabel kolumnar belum ada, load_table membaca CSV lama dengan filter yang sama."""
+    _sample_df().to_csv(tmp_path / "stream.csv", index=False)
+
+    df = load_table(tmp_path, "stream", columns=["sensor_2"], units=[201])
+    assert list(df.columns) == ["sensor_2"]
+    assert np.allclose(df["sensor_2"], [642.1, 642.0])
+    assert list_units(tmp_path, "stream") == [201, 202, 203]
+
+
+def test_writer_per_chunk_identik_dengan_write_table(tmp_path):
+    """Tabel yang ditulis per chunk (unit terpotong antar chunk) sama persis dengan write_table."""
+    df = _sample_df().sort_values("unit_number", kind="stable").reset_index(drop=True)
+    write_table(df, tmp_path / "full")
+    with ColumnTableWriter(tmp_path / "chunked") as writer:
+        for start in range(0, len(df), 2):
+            writer.append(df.iloc[start:start + 2])
+
+    for name in ["meta.json", "_units.npy"] + [f"{c}.npy" for c in df.columns]:
+        assert (tmp_path / "full" / name).read_bytes() == (tmp_path / "chunked" / name).read_bytes()
+
+
+def test_ensure_columnar_buat_snapshot_sekali_dari_csv(tmp_path):
+    _sample_df().to_csv(tmp_path / "streaming_source.csv", index=False)
+
+    assert ensure_columnar(tmp_path, "streaming_source")
+    assert ColumnTable(tmp_path / "streaming_source").units == [201, 202, 203]
+    assert not any(p.name.endswith(".tmp") for p in tmp_path.iterdir())
+    # Tidak ada CSV maupun snapshot -> tetap False, tidak error
+    assert not ensure_columnar(tmp_path, "train_final")
+
+
+def test_snapshot_dibangun_ulang_jika_csv_berubah(tmp_path):
+    """CSV ditulis ulang (storage_format csv, ingest ulang) -> snapshot lama tidak dipakai lagi."""
+    df = _sample_df()
+    csv_path = tmp_path / "streaming_source.csv"
+    df.to_csv(csv_path, index=False)
+    assert ensure_columnar(tmp_path, "streaming_source")
+
+    df.assign(sensor_2=df["sensor_2"] + 100).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(1, 1))   # mtime pasti berbeda walau ditulis di tick jam yang sama
+    assert load_table(tmp_path, "streaming_source")["sensor_2"].min() > 700
+    assert ensure_columnar(tmp_path, "streaming_source")
+    assert ColumnTable(tmp_path / "streaming_source").column("sensor_2").min() > 700
+
+    # Penulis CSV (per chunk) langsung menghapus snapshot yang basi
+    with open_table_writer(tmp_path, "streaming_source", "csv") as writer:
+        writer.append(df)
+    assert not (tmp_path / "streaming_source").exists()
+    assert load_table(tmp_path, "streaming_source")["sensor_2"].max() < 700
@@ -0,0 +1,106 @@
+# tests/test_db_logger.py
+import sqlite3
+import threading
+
+import pytest
+
+from db_logger import PredictionLogger
+
+
+def test_logger_menulis_batch_dan_wal(tmp_path):
+    """Record yang diantrikan harus tertulis setelah flush, dengan WAL dan index aktif."""
+    db_path = tmp_path / "logs.db"
+    logger = PredictionLogger(str(db_path), flush_interval=0.05)
+    try:
+        logger.log(201, 1, 0, 0.12)
+        logger.log_many([201] * 99, range(2, 101), [1] * 99, [0.9] * 99)
+        logger.flush()
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM prediction_logs").fetchone()[0] == 100
+        assert conn.execute("SELECT COUNT(*) FROM prediction_logs WHERE status = 'CRITICAL'").fetchone()[0] == 99
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {r[1] for r in conn.execute("PRAGMA index_list(prediction_logs)")}
+        assert {"idx_logs_unit_id", "idx_logs_cycle", "idx_logs_timestamp"} <= indexes
+        conn.close()
+
+        logger.clear()
+        assert logger.conn.execute("SELECT COUNT(*) FROM prediction_logs").fetchone()[0] == 0
+    finally:
+        logger.close()
+
+
+def test_db_lama_dimigrasi_kolom_versi_model(tmp_path):
+    """DB dari versi sebelumnya (tanpa model_version/role/latency_ms) di-ALTER saat dibuka."""
+    db_path = tmp_path / "logs.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute('''CREATE TABLE prediction_logs
+       (id INTEGER PRIMARY KEY, timestamp TEXT, unit_id INTEGER, cycle INTEGER,
+       prediction INTEGER, probability REAL, status TEXT)''')
+    conn.execute("INSERT INTO prediction_logs VALUES (1, '2026-01-01 00:00:00', 5, 1, 0, 0.1, 'NORMAL')")
+    conn.commit()
+    conn.close()
+
+    logger = PredictionLogger(str(db_path), flush_interval=0.05)
+    try:
+        logger.log_many([None], [None], [1], [0.8], model_version="v2", latency_ms=3.5, role="shadow")
+        logger.flush()
+        rows = logger.conn.execute("SELECT unit_id, model_version, role, latency_ms FROM prediction_logs "
+                                   "ORDER BY id").fetchall()
+        assert rows == [(5, None, "primary", None), (None, "v2", "shadow", 3.5)]
+        # Log lama masuk rollup, log shadow tidak
+        assert logger.conn.execute("SELECT SUM(n) FROM prediction_rollup_hourly").fetchone()[0] == 1
+    finally:
+        logger.close()
+
+
+def test_writer_tetap_hidup_setelah_error_dan_close_menutup_koneksi(tmp_path):
+    """Error non-sqlite di 1 batch tidak mematikan thread writer; close() menutup koneksi."""
+    logger = PredictionLogger(str(tmp_path / "logs.db"), flush_interval=0.05)
+    write = logger._write
+    calls = []
+
+    def failing_once(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("baris rusak")
+        write(batch)
+
+    logger._write = failing_once
+    logger.log(1, 1, 0, 0.1)
+    logger.flush()
+    logger.log(1, 2, 1, 0.9)
+    logger.flush()
+
+    assert logger._worker.is_alive()
+    assert logger.conn.execute("SELECT cycle FROM prediction_logs").fetchall() == [(2,)]
+    logger.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        logger.conn.execute("SELECT 1")
+
+
+def test_rollup_bersamaan_dari_dua_koneksi_tidak_dihitung_dobel(tmp_path):
+    # Dashboard & serve.py = 2 logger (2 koneksi) ke file yang sama, keduanya memperbarui rollup
+    path = str(tmp_path / "logs.db")
+    loggers = [PredictionLogger(path, flush_interval=0.01, rollup_interval=0.0) for _ in range(2)]
+    try:
+        def work(logger, unit_id):
+            for i in range(50):
+                logger.log_many([unit_id] * 20, range(i * 20, i * 20 + 20), [0] * 20, [0.1] * 20)
+                logger.refresh_rollup()
+        threads = [threading.Thread(target=work, args=(logger, k)) for k, logger in enumerate(loggers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for logger in loggers:
+            logger.flush()
+
+        conn = sqlite3.connect(path)
+        total = conn.execute("SELECT COUNT(*) FROM prediction_logs").fetchone()[0]
+        rollup = conn.execute("SELECT SUM(n) FROM prediction_rollup_hourly").fetchone()[0]
+        conn.close()
+        assert total == rollup == 2 * 50 * 20
+    finally:
+        for logger in loggers:
+            logger.close()
@@ -0,0 +1,94 @@
+# tests/test_drift.py
+import sqlite3
+
+import numpy as np
+
+from db_logger import PredictionLogger
+from drift import DriftMonitor, DriftReference
+
+
+def _reference(tmp_path):
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(0, 1, 5000), rng.uniform(10, 20, 5000), np.full(5000, 3.0)])
+    path = DriftReference.fit(X, ["a", "b", "konstan"], n_bins=10).save(tmp_path / "drift_reference.json")
+    return DriftReference.load(path), rng
+
+
+def test_distribusi_sama_tidak_alert_dan_momen_berjalan(tmp_path):
+    ref, rng = _reference(tmp_path)
+    assert np.allclose(ref.proportions.sum(axis=1), 1.0)
+    assert (ref.proportions[:, [0, -1]] == 0).all()   # Data training tidak pernah di luar range-nya
+
+    monitor = DriftMonitor(ref, window_rows=2000)
+    batches = [np.column_stack([rng.normal(0, 1, 500), rng.uniform(10, 20, 500), np.full(500, 3.0)])
+               for _ in range(8)]
+    alerts = [a for X in batches for a in monitor.update(X)]
+
+    assert alerts == []
+    assert monitor.windows == 2 and monitor.window_n == 0
+    # Momen gabungan per batch = momen seluruh data sekaligus (tanpa menyimpan data mentah)
+    X_all = np.vstack(batches)
+    assert np.allclose(monitor.mean, X_all.mean(axis=0))
+    assert np.allclose(monitor.m2 / monitor.n, X_all.var(axis=0))
+    assert (monitor.max == X_all.max(axis=0)).all()
+
+
+def test_drift_dan_nilai_luar_range_ditulis_ke_db(tmp_path):
+    ref, rng = _reference(tmp_path)
+    logger = PredictionLogger(str(tmp_path / "logs.db"), flush_interval=0.05)
+    try:
+        monitor = DriftMonitor(ref, window_rows=1000, on_alert=logger.log_drift)
+        # Fitur a bergeser +2 std, fitur b & konstan tetap
+        X = np.column_stack([rng.normal(2, 1, 1000), rng.uniform(10, 20, 1000), np.full(1000, 3.0)])
+        alerts = monitor.update(X)
+
+        assert [a["feature"] for a in alerts] == ["a"]
+        assert alerts[0]["psi"] > 1.0 and alerts[0]["ks"] > 0.5
+        assert alerts[0]["out_of_range"] > 0.05
+        assert monitor.summary()["Feature"].iloc[0] == "a"
+
+        conn = sqlite3.connect(tmp_path / "logs.db")
+        rows = conn.execute("SELECT feature, n_rows FROM drift_alerts").fetchall()
+        conn.close()
+        assert rows == [("a", 1000)]
+    finally:
+        logger.close()
+
+
+def test_nilai_nan_dan_inf_dihitung_terpisah_tanpa_menggagalkan_scoring(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    from inference import predict_batch
+
+    ref, rng = _reference(tmp_path)
+    logger = PredictionLogger(str(tmp_path / "logs.db"), flush_interval=0.05)
+    try:
+        monitor = DriftMonitor(ref, window_rows=1000, on_alert=logger.log_drift)
+        X = np.column_stack([rng.normal(0, 1, 1000), rng.uniform(10, 20, 1000), np.full(1000, 3.0)])
+        X[:50, 0] = np.nan
+        X[50:60, 0] = np.inf
+        alerts = monitor.update(X)
+
+        # Nilai finite tetap masuk bin & momen seperti biasa, NaN/inf hanya di counter non_finite
+        assert monitor.non_finite.tolist() == [60, 0, 0]
+        assert monitor.window_counts.sum() == 0 and monitor.n == 1000
+        assert np.isclose(monitor.mean[0], X[60:, 0].mean()) and np.isfinite(monitor.m2).all()
+        assert [a["feature"] for a in alerts] == ["a"]
+        assert alerts[0]["non_finite"] == 0.06 and alerts[0]["psi"] < 0.25
+        assert monitor.summary().set_index("Feature").loc["a", "Non Finite"] == 0.06
+
+        conn = sqlite3.connect(tmp_path / "logs.db")
+        rows = conn.execute("SELECT feature, non_finite FROM drift_alerts").fetchall()
+        conn.close()
+        assert rows == [("a", 0.06)]
+
+        # Error di monitor (misal jumlah fitur salah) tidak boleh membuat scoring gagal
+        scaler = MinMaxScaler().fit(X[60:])
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+            scaler.transform(X[60:]), (X[60:, 0] > 0).astype(int))
+        pred, prob = predict_batch(model, scaler, X[60:70], monitor=DriftMonitor(
+            DriftReference.fit(X[60:, :2], ["a", "b"])))
+        assert len(pred) == len(prob) == 10
+    finally:
+        logger.close()
@@ -0,0 +1,48 @@
+# tests/test_eda.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_store import iter_table, save_table
+from eda import compute_correlation, group_by_unit, stratified_sample
+
+
+def _train_df(seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for unit, n in [(2, 40), (1, 30), (3, 50)]:
+        cycles = np.arange(1, n + 1)
+        frames.append(pd.DataFrame({
+            "unit_number": unit,
+            "time_in_cycles": cycles,
+            "sensor_2": 640 + 0.05 * cycles + rng.normal(0, 0.5, size=n),
+            "sensor_5": 14.62,  # Sensor konstan
+            "RUL": n - cycles,
+            "label": (n - cycles <= 10).astype(int),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("storage_format", ["columnar", "csv"])
+def test_korelasi_streaming_dari_disk_sama_dengan_pandas(tmp_path, storage_format):
+    df = _train_df()
+    save_table(df, tmp_path, "ingested_train", storage_format)
+    cols = ["sensor_2", "sensor_5", "RUL"]
+    # Chunk kecil: tabel dibaca beberapa kali per kelompok unit / per chunk CSV
+    chunks = list(iter_table(tmp_path, "ingested_train", cols, chunk_rows=35))
+    assert len(chunks) > 1 and all(list(c.columns) == cols for c in chunks)
+    streaming = compute_correlation(tmp_path, cols, {"method": "streaming", "chunk_rows": 35})
+    expected = df[cols].corr()
+    assert np.allclose(streaming.to_numpy(), expected.to_numpy(), equal_nan=True)
+
+
+def test_group_per_unit_dan_sampel_stratified():
+    df = _train_df()
+    groups = group_by_unit(df.sample(frac=1.0, random_state=1))
+    assert list(groups) == [1, 2, 3]
+    assert groups[3]["time_in_cycles"].tolist() == list(range(1, 51))
+
+    sample = stratified_sample(df, frac=0.5)
+    # Setiap kombinasi (unit, label) tetap terwakili
+    assert set(map(tuple, sample[["unit_number", "label"]].drop_duplicates().to_numpy())) == \
+        set(map(tuple, df[["unit_number", "label"]].drop_duplicates().to_numpy()))
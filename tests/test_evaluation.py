@@ -0,0 +1,57 @@
+# tests/test_evaluation.py
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from evaluation import (build_folds, fit_predict_folds, fold_indices, fold_X, fold_metrics, fold_regression_metrics,
+                        retarget_folds)
+
+
+def test_fold_per_unit_tanpa_leakage_dan_di_cache(tmp_path):
+    groups = np.repeat(np.arange(1, 11), 7)   # 10 mesin x 7 cycle
+    folds = fold_indices(groups, n_splits=5, cache_dir=tmp_path)
+
+    assert len(folds) == 5
+    for train_idx, test_idx in folds:
+        # Tidak ada mesin yang muncul di train dan test sekaligus
+        assert not set(groups[train_idx]) & set(groups[test_idx])
+    assert sorted(np.concatenate([test for _, test in folds]).tolist()) == list(range(len(groups)))
+
+    # Panggilan kedua dibaca dari file cache, hasil identik
+    assert len(list(tmp_path.glob("groupkfold_5_*.npz"))) == 1
+    cached = fold_indices(groups, n_splits=5, cache_dir=tmp_path)
+    assert all((a == c).all() and (b == d).all() for (a, b), (c, d) in zip(folds, cached))
+
+
+def test_fold_paralel_sama_dengan_serial():
+    rng = np.random.default_rng(0)
+    X = rng.random((120, 3)).astype(np.float32)
+    y = (X[:, 0] > 0.5).astype(int)
+    folds = build_folds(X, y, np.repeat(np.arange(12), 10), n_splits=3)
+
+    def models():
+        return [RandomForestClassifier(n_estimators=5, random_state=0) for _ in folds]
+
+    serial = fit_predict_folds(models(), folds, n_jobs=1)
+    parallel = fit_predict_folds(models(), folds, n_jobs=3)
+    assert all((a == b).all() for a, b in zip(serial, parallel))
+    scores = fold_metrics(folds, parallel)
+    assert set(scores) == {"f1", "recall", "accuracy", "f1_std"}
+    assert 0.5 < scores["accuracy"] <= 1.0
+
+
+def test_retarget_fold_untuk_head_regresi():
+    rng = np.random.default_rng(0)
+    X = rng.random((120, 3)).astype(np.float32)
+    folds = build_folds(X, (X[:, 0] > 0.5).astype(int), np.repeat(np.arange(12), 10), n_splits=3)
+    rul = 100 * X[:, 0].astype(np.float64)
+
+    rul_folds = retarget_folds(folds, rul)
+    # Matriks X dipakai bersama (tidak disalin per fold), fold hanya menyimpan index & target
+    assert all(r["X"] is X and f["X"] is X for r, f in zip(rul_folds, folds))
+    assert all((fold_X(f, "test") == X[f["test_idx"]]).all() and len(fold_X(f, "test", 5)) == 5 for f in folds)
+    assert all((r["y_test"] == rul[f["test_idx"]]).all() for r, f in zip(rul_folds, folds))
+
+    preds = fit_predict_folds([RandomForestRegressor(n_estimators=5, random_state=0) for _ in rul_folds], rul_folds)
+    scores = fold_regression_metrics(rul_folds, preds)
+    assert set(scores) == {"rmse", "mae", "rmse_std"}
+    assert 0 < scores["mae"] <= scores["rmse"] < 20
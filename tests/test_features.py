@@ -0,0 +1,54 @@
+# tests/test_features.py
+import numpy as np
+import pandas as pd
+
+from features import OnlineFeatures, add_rolling_features, engineered_columns, model_features
+
+CFG = {
+    "selected_features": ["op_setting_1", "sensor_4", "sensor_11"],
+    "feature_engineering": {"enabled": True, "windows": [3, 5], "ewma_alpha": 0.3},
+}
+
+
+def _fleet_df(seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for unit, n in [(201, 12), (202, 4), (203, 9)]:
+        frames.append(pd.DataFrame({
+            "unit_number": unit,
+            "time_in_cycles": np.arange(1, n + 1),
+            "op_setting_1": rng.choice([0.0, 42.0], size=n),
+            "sensor_4": 1400 + np.cumsum(rng.normal(0.5, 2.0, size=n)),
+            "sensor_11": 47 + rng.normal(0, 0.3, size=n),
+        }))
+    # Acak urutan baris: hasil harus tetap per unit & per cycle
+    return pd.concat(frames).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def test_fitur_training_dan_serving_bit_identical():
+    """Fitur batch (training) harus sama persis dengan update online per baris (serving)."""
+    df = _fleet_df()
+    offline = add_rolling_features(df, CFG)
+
+    online = OnlineFeatures(CFG, capacity=1)
+    stream = df.sort_values(["time_in_cycles", "unit_number"])  # Urutan kedatangan ala fleet
+    X_online = online.transform(stream["unit_number"], stream[CFG["selected_features"]].to_numpy())
+
+    expected = offline.loc[stream.index, model_features(CFG)].to_numpy()
+    assert np.array_equal(X_online, expected)
+
+
+def test_fitur_rolling_sesuai_pandas():
+    """Sanity check nilai: mean/std/slope/EWMA dibandingkan dengan perhitungan pandas."""
+    df = _fleet_df()
+    out = add_rolling_features(df, CFG).sort_values(["unit_number", "time_in_cycles"])
+    g = out.groupby("unit_number")["sensor_4"]
+
+    assert np.allclose(out["sensor_4_mean_3"], g.transform(lambda s: s.rolling(3, min_periods=1).mean()))
+    assert np.allclose(out["sensor_4_std_5"], g.transform(lambda s: s.rolling(5, min_periods=1).std(ddof=0)), atol=1e-6)
+    assert np.allclose(out["sensor_4_ewma"], g.transform(lambda s: s.ewm(alpha=0.3, adjust=False).mean()))
+
+    slope = g.transform(lambda s: s.rolling(3, min_periods=2).apply(
+        lambda w: np.polyfit(np.arange(len(w)), w, 1)[0], raw=True)).fillna(0.0)
+    assert np.allclose(out["sensor_4_slope_3"], slope, atol=1e-6)
+    assert len(engineered_columns(CFG)) == 2 * 3 * 2 + 2
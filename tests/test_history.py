@@ -0,0 +1,84 @@
+# tests/test_history.py
+import sqlite3
+
+import numpy as np
+
+from db_logger import PredictionLogger
+from history import HistoryStore, lttb, minmax_lttb
+
+
+def _insert(logger, rows):
+    # Tulis langsung lewat _write agar timestamp bisa diatur (log() memakai jam sekarang)
+    logger._write([(ts, unit, cycle, pred, prob, "CRITICAL" if pred else "NORMAL", None, "primary", None)
+                   for ts, unit, cycle, pred, prob in rows])
+    logger.refresh_rollup()
+
+
+def test_rollup_per_jam_dan_keyset_pagination(tmp_path):
+    db_path = tmp_path / "logs.db"
+    logger = PredictionLogger(str(db_path), flush_interval=0.05)
+    try:
+        rows = [(f"2026-01-01 0{h}:{m:02d}:00", unit, h * 60 + m, int(m % 3 == 0), m / 100)
+                for h in range(3) for m in range(0, 60, 5) for unit in (1, 2)]
+        _insert(logger, rows[:30])
+        _insert(logger, rows[30:])   # Rollup diperbarui inkremental (upsert) antar batch
+
+        store = HistoryStore(db_path)
+        hourly = store.hourly(unit_id=1)
+        assert hourly["n"].tolist() == [12, 12, 12]
+        assert hourly["n_critical"].tolist() == [4, 4, 4]
+        assert np.allclose(hourly["max_prob"], 0.55) and np.allclose(hourly["min_prob"], 0.0)
+        assert store.units() == [1, 2]
+
+        # Halaman demi halaman (terbaru dulu) mencakup semua baris unit 2 tanpa duplikat
+        seen, cursor = [], None
+        while True:
+            page, cursor = store.page(unit_id=2, start="2026-01-01 01:00:00", after=cursor, limit=7)
+            seen += page["id"].tolist()
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 24
+        assert page["timestamp"].iloc[-1] == "2026-01-01 01:00:00"
+        assert store.page(unit_id=2, start="2026-01-02")[0].empty
+        assert len(store.series(1, end="2026-01-01 01:00:00")) == 12
+
+        # DB lama tanpa tabel rollup -> dibangun dari log yang ada saat logger dibuka
+        store.close()
+        logger.close()
+        conn = sqlite3.connect(db_path)
+        conn.executescript("DROP TABLE prediction_rollup_hourly; DROP TABLE rollup_state;")
+        conn.close()
+        logger = PredictionLogger(str(db_path), flush_interval=0.05)
+        assert HistoryStore(db_path).hourly()["n"].sum() == len(rows)
+    finally:
+        logger.close()
+
+
+def test_rentang_waktu_benar_walau_baris_tertulis_tidak_berurutan(tmp_path):
+    db_path = tmp_path / "logs.db"
+    logger = PredictionLogger(str(db_path), flush_interval=0.05)
+    try:
+        # Baris 00:59:59 (misal callback shadow / proses lain) tertulis SETELAH baris 01:00:00
+        _insert(logger, [("2026-01-01 00:59:58", 1, 1, 0, 0.1), ("2026-01-01 01:00:00", 1, 2, 0, 0.2),
+                         ("2026-01-01 00:59:59", 1, 3, 0, 0.3), ("2026-01-01 01:00:01", 1, 4, 0, 0.4)])
+        store = HistoryStore(db_path)
+        after = store.page(unit_id=1, start="2026-01-01 01:00:00", descending=False)[0]
+        assert after["cycle"].tolist() == [2, 4]
+        assert store.series(1, end="2026-01-01 01:00:00")["cycle"].tolist() == [1, 3]
+        assert store.versions(start="2026-01-01 01:00:00")["n"].sum() == 2
+        store.close()
+    finally:
+        logger.close()
+
+
+def test_downsampling_menjaga_ujung_dan_spike():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[7_777] = 5.0   # Spike tunggal
+
+    for idx in (lttb(x, y, 200), minmax_lttb(x, y, 200)):
+        assert len(idx) == 200
+        assert idx[0] == 0 and idx[-1] == len(x) - 1
+        assert (np.diff(idx) > 0).all()
+        assert 7_777 in idx
+    assert (lttb(x[:50], y[:50], 200) == np.arange(50)).all()
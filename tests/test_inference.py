@@ -0,0 +1,122 @@
+# tests/test_inference.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.preprocessing import MinMaxScaler
+
+from inference import predict_batch, predict_heads, score_frame
+
+
+def _toy_assets(n_rows=300, n_features=5):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n_rows, n_features))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    scaler = MinMaxScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=20, random_state=42).fit(scaler.transform(X), y)
+    return X, model, scaler
+
+
+def test_predict_batch_sama_dengan_predict_per_baris():
+    """Hasil batch harus identik dengan predict/predict_proba per baris (cara lama)."""
+    X, model, scaler = _toy_assets()
+    pred, prob = predict_batch(model, scaler, X)
+
+    for i in range(0, len(X), 37):
+        row = scaler.transform(X[i].reshape(1, -1))
+        assert pred[i] == model.predict(row)[0]
+        assert prob[i] == model.predict_proba(row)[0][1]
+
+
+@pytest.mark.filterwarnings("error::UserWarning")
+def test_score_frame_menjaga_index():
+    """score_frame mengembalikan prediksi dengan index yang sama dengan input."""
+    X, model, scaler = _toy_assets()
+    cols = [f"f{i}" for i in range(X.shape[1])]
+    df = pd.DataFrame(X, columns=cols, index=np.arange(100, 100 + len(X)))
+
+    scores = score_frame(df.iloc[50:], cols, model, scaler)
+    assert list(scores.index) == list(df.index[50:])
+    assert set(scores["prediction"].unique()) <= {0, 1}
+    assert scores["probability"].between(0, 1).all()
+
+
+def test_micro_batcher_mengembalikan_hasil_per_request():
+    """Beberapa request digabung jadi 1 batch, hasil tetap kembali ke request masing-masing."""
+    from serve import MicroBatcher
+
+    X, model, scaler = _toy_assets()
+    expected_pred, expected_prob = predict_batch(model, scaler, X)
+
+    batcher = MicroBatcher(model, scaler, max_batch_size=64, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(X[i:i + 3]) for i in range(0, 30, 3)]
+        for k, fut in enumerate(futures):
+            pred, prob, rul = fut.result(timeout=5)
+            assert np.array_equal(pred, expected_pred[3 * k:3 * k + 3])
+            assert np.allclose(prob, expected_prob[3 * k:3 * k + 3])
+            assert rul is None   # Tanpa head RUL
+    finally:
+        batcher.close()
+
+
+def test_flat_forest_sama_dengan_predict_proba(tmp_path):
+    """Forest hasil export (mmap) harus memberi probabilitas yang sama dengan RandomForest asli."""
+    from forest_export import FlatForest, export_forest
+
+    X, model, scaler = _toy_assets()
+    X_scaled = scaler.transform(X)
+    flat = FlatForest.load(export_forest(model, tmp_path / "forest"))
+
+    assert np.allclose(flat.predict_proba(X_scaled), model.predict_proba(X_scaled))
+    assert np.array_equal(flat.predict(X_scaled), model.predict(X_scaled))
+    assert np.array_equal(flat.classes_, model.classes_)
+
+
+def test_model_fused_identik_termasuk_di_batas_threshold(tmp_path):
+    """Forest fused (tanpa scaler) harus memilih daun yang sama persis, juga tepat di nilai threshold."""
+    from forest_export import FlatForest, export_forest, verify_fused
+
+    X, model, scaler = _toy_assets()
+    fused = FlatForest.load(export_forest(model, tmp_path / "fused", scaler=scaler))
+    unfused = FlatForest.from_model(model)
+    assert verify_fused(fused, unfused, scaler, X) == 0
+
+    # Baris uji tepat di threshold hasil fusi dan 1 ulp di atasnya
+    nodes = np.flatnonzero(~fused.is_leaf)[:200]
+    rows = np.repeat(X[:1], 2 * len(nodes), axis=0)
+    for j, n in enumerate(nodes):
+        rows[2 * j, fused.feature[n]] = fused.threshold[n]
+        rows[2 * j + 1, fused.feature[n]] = np.nextafter(fused.threshold[n], np.inf)
+    assert verify_fused(fused, unfused, scaler, rows) == 0
+
+    pred, prob = predict_batch(fused, None, X)
+    expected_pred, expected_prob = predict_batch(model, scaler, X)
+    assert np.array_equal(pred, expected_pred)
+    assert np.allclose(prob, expected_prob)
+
+
+def test_head_rul_regresi_fused_dan_input_bersama(tmp_path):
+    """Forest regresi hasil export (biasa & fused) identik dengan RandomForestRegressor, 1 input untuk 2 head."""
+    from forest_export import FlatForest, export_forest, load_rul_model, verify_fused
+
+    X, model, scaler = _toy_assets()
+    rul_target = np.clip(50 - 20 * X[:, 0], 0, 125)
+    regressor = RandomForestRegressor(n_estimators=10, random_state=0).fit(scaler.transform(X), rul_target)
+    expected_rul = regressor.predict(scaler.transform(X))
+
+    flat = FlatForest.load(export_forest(regressor, tmp_path / "rul_forest"))
+    fused = FlatForest.load(export_forest(regressor, tmp_path / "rul_forest_fused", scaler=scaler))
+    assert flat.task == "regression" and flat.classes_ is None
+    assert np.allclose(flat.predict(scaler.transform(X)), expected_rul)
+    assert verify_fused(fused, flat, scaler, X) == 0
+
+    # Pasangan yang dipilih mengikuti classifier: scaler None (fused) -> rul_forest_fused
+    assert load_rul_model(tmp_path, None).meta["input_space"] == "raw"
+    assert load_rul_model(tmp_path, scaler).meta["input_space"] == "scaled"
+
+    pred, prob, rul = predict_heads(model, scaler, X, flat)
+    expected_pred, expected_prob = predict_batch(model, scaler, X)
+    assert np.array_equal(pred, expected_pred) and np.allclose(prob, expected_prob)
+    assert np.allclose(rul, expected_rul)
+    assert np.allclose(score_frame(pd.DataFrame(X), list(range(X.shape[1])), model, scaler, flat)["rul"], expected_rul)
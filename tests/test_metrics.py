@@ -0,0 +1,47 @@
+# tests/test_metrics.py
+from metrics import MetricsRegistry
+
+
+def test_timer_dan_snapshot_per_stage():
+    reg = MetricsRegistry(window=4)
+    for seconds in [0.001, 0.002, 0.003]:
+        reg.observe("predict_proba", seconds)
+    with reg.timer("db_commit"):
+        pass
+    reg.inc("db_rows_written", 5)
+    reg.inc("db_rows_written")
+
+    table = reg.snapshot().set_index("Stage")
+    assert table.loc["predict_proba", "Count"] == 3
+    assert abs(table.loc["predict_proba", "p50 (ms)"] - 2.0) < 1e-9
+    assert abs(table["Share"].sum() - 1.0) < 1e-9
+    assert table.index[0] == "predict_proba"   # Urut dari total waktu terbesar
+    assert reg.counters() == {"db_rows_written": 6}
+
+    # Persentil hanya dari `window` observasi terakhir, count tetap total
+    for _ in range(4):
+        reg.observe("predict_proba", 0.010)
+    table = reg.snapshot().set_index("Stage")
+    assert table.loc["predict_proba", "Count"] == 7
+    assert abs(table.loc["predict_proba", "p99 (ms)"] - 10.0) < 1e-9
+
+
+def test_prometheus_bucket_kumulatif(tmp_path):
+    reg = MetricsRegistry(prefix="t")
+    reg.observe("scaler", 0.0004)
+    reg.observe("scaler", 0.003)
+    reg.observe("scaler", 10.0)
+    reg.inc("http_requests", 2)
+
+    text = reg.to_prometheus()
+    assert 't_stage_seconds_bucket{stage="scaler",le="0.0005"} 1' in text
+    assert 't_stage_seconds_bucket{stage="scaler",le="0.005"} 2' in text
+    assert 't_stage_seconds_bucket{stage="scaler",le="5.0"} 2' in text
+    assert 't_stage_seconds_bucket{stage="scaler",le="+Inf"} 3' in text
+    assert 't_stage_seconds_count{stage="scaler"} 3' in text
+    assert "t_http_requests_total 2" in text
+
+    path = tmp_path / "out" / "dashboard.prom"
+    assert reg.maybe_write(path, interval=60)
+    assert not reg.maybe_write(path, interval=60)   # Masih dalam interval
+    assert path.read_text(encoding="utf-8") == text
@@ -0,0 +1,76 @@
+# tests/test_pipeline.py
+import ast
+import os
+
+from pipeline import SRC_DIR, STAGES, StageCache, hash_paths, stage_fingerprint
+
+CFG = {
+    "raw_data_path": "raw.txt", "output_dir": "data", "model_dir": "models", "storage_format": "columnar",
+    "rul_threshold": 30, "test_split_engine_id": 200, "selected_features": ["sensor_2"],
+    "eda": {"sample_units": [1, 2, 3]},
+}
+
+
+def test_fingerprint_hanya_berubah_untuk_stage_terkait(tmp_path, monkeypatch):
+    """rul_threshold mengubah ingest (dan turunannya lewat artifact), setting EDA hanya mengubah eda."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "raw.txt").write_text("1 1 0.0\n")
+    upstream = {"ingest": {"data/ingested_train/label.npy": "abc"}, "preprocess": {}}
+
+    def fingerprints(cfg):
+        return {name: stage_fingerprint(name, cfg, upstream) for name in STAGES}
+
+    base = fingerprints(CFG)
+    changed_rul = fingerprints({**CFG, "rul_threshold": 25})
+    changed_eda = fingerprints({**CFG, "eda": {"sample_units": [1]}})
+
+    assert [n for n in STAGES if base[n] != changed_rul[n]] == ["ingest"]
+    assert [n for n in STAGES if base[n] != changed_eda[n]] == ["eda"]
+    # Fitur terpilih juga menentukan sensor yang diplot EDA (behavior_sensors: null)
+    changed_features = fingerprints({**CFG, "selected_features": ["sensor_3"]})
+    assert {"eda", "preprocess", "train"} <= {n for n in STAGES if base[n] != changed_features[n]}
+
+    # Isi file raw berubah -> ingest berubah
+    (tmp_path / "raw.txt").write_text("1 1 0.5\n")
+    assert fingerprints(CFG)["ingest"] != base["ingest"]
+
+
+def test_cache_restore_dan_eviction_lru(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = StageCache(tmp_path / "cache", max_bytes=2500)
+
+    out = tmp_path / "out"
+    out.mkdir()
+    for i, name in enumerate(["a", "b", "c"]):
+        (out / "model.bin").write_bytes(bytes([i]) * 1000)
+        cache.put(name, "train", hash_paths(["out"]))
+        os.utime(cache._manifest(name), (i, i))
+
+    # Batas 2500 byte -> hanya 2 entry terakhir yang tersisa
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.size() <= 2500
+
+    # File sisa stage lain dihapus, output dipulihkan dari cache
+    (out / "stale.bin").write_bytes(b"x")
+    assert cache.restore(cache.get("b"), ["out"]) == 1
+    assert (out / "model.bin").read_bytes() == bytes([1]) * 1000
+    assert not (out / "stale.bin").exists()
+
+
+def test_daftar_code_stage_mencakup_semua_modul_lokal_yang_diimport():
+    """Perubahan di modul src/ yang diimport (langsung/tidak langsung) sebuah stage harus mengubah fingerprint-nya."""
+    def local_imports(name):
+        tree = ast.parse((SRC_DIR / f"{name}.py").read_text(encoding="utf-8"))
+        names = {a.name for node in tree.body if isinstance(node, ast.Import) for a in node.names}
+        names |= {node.module for node in tree.body if isinstance(node, ast.ImportFrom) and node.module}
+        return {n.split(".")[0] for n in names if (SRC_DIR / f"{n.split('.')[0]}.py").exists()}
+
+    for name, stage in STAGES.items():
+        seen, todo = set(), [stage["entry"][0]]
+        while todo:
+            module = todo.pop()
+            if module not in seen:
+                seen.add(module)
+                todo += local_imports(module)
+        assert {f"{m}.py" for m in seen} <= set(stage["code"]), name
@@ -0,0 +1,58 @@
+# tests/test_regimes.py
+import numpy as np
+import pandas as pd
+
+from regimes import RegimeNormalizer
+
+CFG = {
+    "selected_features": ["op_setting_1", "op_setting_2", "op_setting_3", "sensor_2", "sensor_9"],
+    "regimes": {"enabled": True, "decimals": [0, 2, 0]},
+}
+# Kondisi operasi ala FD002: (altitude, Mach, TRA) -> level sensor berbeda jauh
+CONDITIONS = [(0.0, 0.0, 100.0), (20.0, 0.70, 100.0), (42.0, 0.84, 100.0), (10.0, 0.25, 100.0)]
+
+
+def _regime_df(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    regime = rng.integers(0, len(CONDITIONS), size=n)
+    ops = np.asarray(CONDITIONS)[regime] + rng.normal(0, [0.002, 0.0003, 0.0], size=(n, 3))
+    return pd.DataFrame({
+        "op_setting_1": ops[:, 0],
+        "op_setting_2": ops[:, 1],
+        "op_setting_3": ops[:, 2],
+        "sensor_2": 550 + 40 * regime + rng.normal(0, 1.0, size=n),
+        "sensor_9": 9000 - 500 * regime + rng.normal(0, 20.0, size=n),
+    }), regime
+
+
+def test_regime_dari_lookup_dan_zscore_per_regime():
+    df, regime = _regime_df()
+    normalizer = RegimeNormalizer.fit(df, CFG)
+    assert normalizer.n_regimes == len(CONDITIONS)
+
+    assigned = normalizer.assign(df[normalizer.op_columns].to_numpy())
+    # Setiap regime asli dipetakan ke tepat 1 index regime
+    assert all(len(np.unique(assigned[regime == r])) == 1 for r in range(len(CONDITIONS)))
+
+    out = normalizer.transform_frame(df)
+    for r in np.unique(assigned):
+        sensors = out.loc[assigned == r, normalizer.columns]
+        assert np.allclose(sensors.mean(), 0, atol=1e-9)
+        assert np.allclose(sensors.std(ddof=0), 1)
+    # op_setting tidak ikut dinormalisasi
+    assert out["op_setting_1"].equals(df["op_setting_1"])
+
+
+def test_regime_tidak_dikenal_ke_pusat_terdekat_dan_save_load(tmp_path):
+    df, _ = _regime_df()
+    normalizer = RegimeNormalizer.fit(df, CFG)
+    loaded = RegimeNormalizer.load(normalizer.save(tmp_path / "regimes.json"))
+
+    # Nilai di luar pembulatan training (42.6 -> 43) tetap dapat regime terdekat (42, 0.84)
+    ops = np.array([[42.6, 0.84, 100.0], [0.0, 0.0, 100.0]])
+    expected = normalizer.assign(np.array([[42.0, 0.84, 100.0], [0.0, 0.0, 100.0]]))
+    assert np.array_equal(loaded.assign(ops), expected)
+
+    features = CFG["selected_features"]
+    X = df[features].to_numpy()
+    assert np.array_equal(loaded.transform(X, features), normalizer.transform(X, features))
@@ -0,0 +1,113 @@
+# tests/test_registry.py
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import MinMaxScaler
+
+from db_logger import PredictionLogger
+from inference import predict_batch
+from registry import ModelRegistry
+
+
+def _two_versions(n_rows=300, n_features=5):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n_rows, n_features))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    scaler = MinMaxScaler().fit(X)
+    v1 = RandomForestClassifier(n_estimators=20, random_state=1).fit(scaler.transform(X), y)
+    v2 = RandomForestClassifier(n_estimators=5, max_depth=2, random_state=2).fit(scaler.transform(X), y)
+    return X, scaler, v1, v2
+
+
+def test_primary_dan_shadow_dicatat_per_versi(tmp_path):
+    X, scaler, v1, v2 = _two_versions()
+    logger = PredictionLogger(str(tmp_path / "logs.db"), flush_interval=0.05)
+    registry = ModelRegistry(logger, warm_up_rows=8)
+    try:
+        registry.add("v1", v1, scaler)
+        registry.add("v2", v2, scaler)
+        registry.set_shadow("v2")
+
+        units, cycles = np.arange(len(X)) % 7, np.arange(len(X))
+        pred, prob, rul = registry.score(X, units, cycles)
+        registry.close()   # Tunggu shadow selesai
+        logger.flush()
+
+        # Hasil yang dikembalikan = primary
+        expected_pred, expected_prob = predict_batch(v1, scaler, X)
+        assert np.array_equal(pred, expected_pred) and np.allclose(prob, expected_prob) and rul is None
+
+        conn = sqlite3.connect(tmp_path / "logs.db")
+        rows = conn.execute("SELECT model_version, role, COUNT(*), MIN(latency_ms) > 0 FROM prediction_logs "
+                            "GROUP BY 1, 2 ORDER BY 1").fetchall()
+        rollup = conn.execute("SELECT SUM(n) FROM prediction_rollup_hourly").fetchone()[0]
+        conn.close()
+        assert rows == [("v1", "primary", len(X), 1), ("v2", "shadow", len(X), 1)]
+        assert rollup == len(X)   # Shadow tidak ikut rollup
+
+        table = registry.summary().set_index("Version")
+        assert table.loc["v1", "Role"] == "primary" and table.loc["v2", "Batches"] == 1
+        assert 0.5 < table.loc["v2", "Agreement"] <= 1.0
+    finally:
+        logger.close()
+
+
+def test_promote_shadow_membalik_ab_tanpa_reload():
+    X, scaler, v1, v2 = _two_versions()
+    registry = ModelRegistry(warm_up_rows=0)
+    registry.add("v1", v1, scaler)
+    registry.add("v2", v2, scaler)
+    registry.set_shadow("v2")
+
+    registry.promote("v2")
+    assert (registry.primary, registry.shadow) == ("v2", "v1")
+    pred, _, _ = registry.score(X)
+    assert np.array_equal(pred, predict_batch(v2, scaler, X)[0])
+
+    with pytest.raises(ValueError):
+        registry.set_shadow("v2")
+    with pytest.raises(KeyError):
+        registry.promote("v3")
+    registry.close()
+
+
+def test_latency_primary_tidak_termasuk_drift_dan_rul():
+    X, scaler, v1, v2 = _two_versions()
+
+    class SlowMonitor:
+        def update(self, X):
+            time.sleep(0.2)
+
+    registry = ModelRegistry(warm_up_rows=0)
+    registry.add("v1", v1, scaler)
+    registry.score(X, monitor=SlowMonitor())
+    registry.close()
+    # Latency versi = scaler + classifier saja, sama dengan jalur yang diukur untuk shadow
+    assert registry.versions["v1"].latencies[0] < 0.2
+
+
+def test_swap_atomik_dan_versi_beda_fitur_ditolak():
+    X, scaler, v1, v2 = _two_versions()
+    registry = ModelRegistry(warm_up_rows=0)
+    registry.add("v1", v1, scaler)
+    registry.add("v2", v2, scaler)
+
+    # Shadow tidak valid -> primary juga tidak berubah
+    with pytest.raises(KeyError):
+        registry.swap(primary="v2", shadow="v3")
+    with pytest.raises(ValueError):
+        registry.swap(primary="v2", shadow="v2")
+    assert (registry.primary, registry.shadow) == ("v1", None)
+    registry.swap(primary="v2", shadow="v1")
+    assert (registry.primary, registry.shadow) == ("v2", "v1")
+
+    X4, _, v4, _ = _two_versions(n_features=4)
+    with pytest.raises(ValueError, match="fitur"):
+        registry.add("v4", v4, MinMaxScaler().fit(X4))
+    with pytest.raises(ValueError, match="scaler"):
+        registry.add("v4", v4, scaler)
+    assert "v4" not in registry.versions
+    registry.close()
@@ -0,0 +1,92 @@
+# tests/test_serve.py
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import MinMaxScaler
+
+from registry import ModelRegistry
+from serve import MicroBatcher, PredictionServer, make_handler
+
+
+def _two_versions(n_rows=200, n_features=5):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n_rows, n_features))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = MinMaxScaler().fit(X)
+    v1 = RandomForestClassifier(n_estimators=5, random_state=1).fit(scaler.transform(X), y)
+    v2 = RandomForestClassifier(n_estimators=5, max_depth=2, random_state=2).fit(scaler.transform(X), y)
+    return X, scaler, v1, v2
+
+
+def _post_models(port, body, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers["X-Admin-Token"] = token
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/models", data=json.dumps(body).encode(),
+                                     headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize("admin_token", [None, "rahasia"])
+def test_post_models_butuh_token_dan_swap_atomik(admin_token):
+    X, scaler, v1, v2 = _two_versions()
+    registry = ModelRegistry(warm_up_rows=0)
+    registry.add("v1", v1, scaler)
+    registry.add("v2", v2, scaler)
+    batcher = MicroBatcher(v1, scaler, registry=registry)
+    server = PredictionServer(("127.0.0.1", 0), make_handler(batcher, ["f"] * 5, admin_token=admin_token))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        if admin_token is None:
+            # Tanpa token di config, hot-swap lewat HTTP mati sama sekali
+            assert _post_models(port, {"primary": "v2"}, "apa saja")[0] == 403
+        else:
+            assert _post_models(port, {"primary": "v2"})[0] == 401
+            assert _post_models(port, {"primary": "v2"}, "salah")[0] == 401
+            # Shadow tidak ada -> 400 dan primary tetap
+            assert _post_models(port, {"primary": "v2", "shadow": "v3"}, admin_token)[0] == 400
+            assert registry.primary == "v1"
+            status, body = _post_models(port, {"primary": "v2", "shadow": "v1"}, admin_token)
+            assert status == 200 and (body["primary"], body["shadow"]) == ("v2", "v1")
+        assert (registry.primary == "v1") == (admin_token is None)
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+        registry.close()
+
+
+def test_close_menggagalkan_request_yang_belum_di_scoring():
+    X, scaler, v1, _ = _two_versions()
+
+    class SlowModel:
+        classes_ = v1.classes_
+        n_features_in_ = v1.n_features_in_
+
+        def predict_proba(self, X_in):
+            time.sleep(1.5)
+            return v1.predict_proba(X_in)
+
+    batcher = MicroBatcher(SlowModel(), scaler)
+    running = batcher.submit(X[:1])
+    time.sleep(0.2)   # Worker sedang scoring batch pertama
+    waiting = batcher.submit(X[1:2])
+    batcher.close()
+
+    # Request yang masih di antrian & request setelah close gagal, tidak menggantung
+    with pytest.raises(RuntimeError):
+        waiting.result(timeout=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit(X[:1]).result(timeout=1)
+    assert len(running.result(timeout=5)[0]) == 1
@@ -0,0 +1,71 @@
+# tests/test_streaming.py
+import asyncio
+import time
+
+import pandas as pd
+
+from streaming import BackpressureQueue, ReplaySource, StreamRunner
+
+
+def _fill(policy, records, maxsize=3):
+    async def run():
+        queue = BackpressureQueue(maxsize, policy)
+        for key, payload in records:
+            await queue.put(key, payload)
+        await queue.close()
+        return [(k, p) for k, p, _ in await queue.get_batch(10, 0)], queue.stats
+    return asyncio.run(run())
+
+
+def test_policy_drop_dan_coalesce_saat_antrian_penuh():
+    records = [(1, "a1"), (2, "b1"), (3, "c1"), (1, "a2"), (4, "d1")]
+
+    # drop: record terlama dibuang, yang terbaru selalu masuk
+    items, stats = _fill("drop", records)
+    assert items == [(3, "c1"), (1, "a2"), (4, "d1")]
+    assert stats["dropped"] == 2
+
+    # coalesce: unit 1 yang masih antri ditimpa, unit baru menggeser record terlama
+    items, stats = _fill("coalesce", records)
+    assert items == [(2, "b1"), (3, "c1"), (4, "d1")]
+    assert stats["coalesced"] == 1 and stats["dropped"] == 1
+
+
+def test_batch_sebagian_dikirim_setelah_max_wait():
+    """Batch yang belum penuh dikembalikan setelah max_wait habis (tanpa exception timeout)."""
+    async def run():
+        queue = BackpressureQueue(10, "block")
+        await queue.put(1, "a")
+        await queue.put(2, "b")
+        start = time.perf_counter()
+        batch = await queue.get_batch(5, 0.05)
+        return [p for _, p, _ in batch], time.perf_counter() - start
+
+    payloads, waited = asyncio.run(run())
+    assert payloads == ["a", "b"]
+    assert waited >= 0.04
+
+
+def test_runner_block_tidak_kehilangan_data_dengan_consumer_lambat():
+    df = pd.DataFrame({"unit_number": [1, 2] * 50})
+    seen = []
+
+    def slow_handler(batch):
+        time.sleep(0.005)
+        seen.extend(i for _, i in batch)
+
+    runner = StreamRunner(ReplaySource(df), slow_handler, queue_size=8, policy="block", max_batch=4, max_wait_ms=1)
+    runner.run()
+    summary = runner.summary()
+    assert seen == list(range(100))
+    assert summary["consumed"] == 100 and summary["dropped"] == 0
+    assert summary["max_depth"] <= 8 and summary["blocked"] > 0
+
+
+def test_runner_background_bisa_dihentikan():
+    df = pd.DataFrame({"unit_number": [1] * 1000})
+    runner = StreamRunner(ReplaySource(df, rate_hz=100), lambda batch: None, max_wait_ms=1).start()
+    time.sleep(0.1)
+    runner.stop()
+    assert runner.done
+    assert 0 < runner.stats["consumed"] < 1000
@@ -0,0 +1,99 @@
+# tests/test_train.py
+import numpy as np
+import optuna
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from train import select_trial, serving_cost
+
+
+def _study(values, first="maximize"):
+    study = optuna.create_study(directions=[first, "minimize", "minimize"])
+    for v in values:
+        study.add_trial(optuna.trial.create_trial(values=list(v)))
+    return study
+
+
+def test_select_trial_f1_terbaik_di_dalam_budget():
+    # (F1, latency ms, ukuran MB) -> semuanya di Pareto front
+    study = _study([(0.90, 40.0, 5.0), (0.85, 12.0, 2.0), (0.80, 5.0, 1.0)])
+
+    assert select_trial(study).values[0] == 0.90
+    assert select_trial(study, latency_budget_ms=20).values[0] == 0.85
+    # Tidak ada yang masuk budget -> trial tercepat
+    assert select_trial(study, latency_budget_ms=1).values[1] == 5.0
+
+
+def test_select_trial_rmse_terendah_untuk_head_rul():
+    # (RMSE, latency ms, ukuran MB): makin lambat makin akurat
+    study = _study([(15.0, 60.0, 9.0), (18.0, 20.0, 3.0), (22.0, 5.0, 1.0)], first="minimize")
+
+    assert select_trial(study, maximize=False).values[0] == 15.0
+    assert select_trial(study, latency_budget_ms=25, maximize=False).values[0] == 18.0
+
+
+def test_serving_cost_ukur_flat_forest():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 4)).astype(np.float32)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, X[:, 0] > 0.5)
+
+    cost = serving_cost(model, X, batch_size=300, repeats=2)
+    assert cost["latency_ms"] > 0
+    assert 0 < cost["model_size_mb"] < 1
+
+    regressor = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, X[:, 0] * 100)
+    assert serving_cost(regressor, X, batch_size=300, repeats=2)["latency_ms"] > 0
+
+
+def test_trial_jelek_di_prune_dan_run_mlflow_ditutup(tmp_path, monkeypatch):
+    """Trial di bawah threshold dihentikan di chunk pertama; run MLflow nested tidak tertinggal aktif."""
+    import mlflow
+    from evaluation import build_folds
+    from train import Objective, make_pruner
+
+    rng = np.random.default_rng(0)
+    groups = np.repeat(np.arange(10), 30)
+    X = rng.random((300, 4)).astype(np.float32)
+    y = (rng.random(300) > 0.5).astype(int)   # Label acak -> F1 jauh di bawah threshold
+    data = {"folds": build_folds(X, y, groups, n_splits=2)}
+
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"sqlite:///{tmp_path / 'mlflow.db'}")
+    mlflow.set_experiment("test_pruning")
+    study = optuna.create_study(direction="maximize", pruner=optuna.pruners.ThresholdPruner(lower=0.99))
+    study.enqueue_trial({"n_estimators": 120, "max_depth": 10, "min_samples_split": 2,
+                         "min_samples_leaf": 1, "max_features": "sqrt"})
+    study.optimize(Objective(data, forest_jobs=1, tree_chunk=50), n_trials=1)
+
+    trial = study.trials[0]
+    assert trial.state == optuna.trial.TrialState.PRUNED
+    assert trial.last_step == 50   # Dihentikan sebelum 120 pohon selesai
+    assert mlflow.active_run() is None
+    run = mlflow.search_runs(experiment_names=["test_pruning"]).iloc[0]
+    assert run["tags.pruned_at_trees"] == "50"
+
+    # Hyperband: resource maksimum = batas atas ruang n_estimators
+    assert make_pruner({"enabled": True, "pruner": "hyperband", "tree_chunk": 50})._max_resource == 400
+
+
+def test_pengukuran_latency_menunggu_fit_trial_lain():
+    """exclusive() (ukur latency) baru masuk setelah semua shared() (fit fold) yang berjalan selesai."""
+    import threading
+    import time
+
+    from train import TimingGate
+
+    gate, events = TimingGate(), []
+    fitting = threading.Event()
+
+    def fit():
+        with gate.shared():
+            fitting.set()
+            time.sleep(0.1)
+            events.append("fit selesai")
+
+    worker = threading.Thread(target=fit)
+    worker.start()
+    fitting.wait()
+    with gate.exclusive():
+        events.append("ukur")
+    worker.join()
+    assert events == ["fit selesai", "ukur"]